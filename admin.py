@@ -4,15 +4,23 @@
 import streamlit as st
 import json
 import pandas as pd
+import altair as alt
 from auth import create_user, format_trial_remaining
-from database import load_student_fees, save_student_fees, generate_student_id, check_fee_setting_exists, get_all_students_with_fees
+from user_store import user_store
+from display import prepare, show_table
+from exports import export_controls
+from perf import traced_page, page_summary, span_summary, histogram, log_path, reset as reset_performance
+from database import load_student_fees, set_student_fee, delete_student_fee, generate_student_id, check_fee_setting_exists, get_all_students_with_fees
 
+@traced_page
 def admin_page(selected_menu):
     """Admin functions page"""
     if selected_menu == "User Management":
         user_management()
     elif selected_menu == "Set Student Fees":
         set_student_fees()
+    elif selected_menu == "Performance":
+        performance()
 
 def user_management():
     """Admin interface for user management"""
@@ -47,8 +55,7 @@ def user_management():
 
     with st.expander("👀 View All Users"):
         try:
-            with open("users.json", 'r') as f:
-                users = json.load(f)
+            users = user_store.all()
                 
             user_data = []
             for username, details in users.items():
@@ -83,15 +90,7 @@ def user_management():
                         st.error("You cannot delete your own account!")
                     else:
                         try:
-                            with open("users.json", 'r') as f:
-                                users = json.load(f)
-                            
-                            if user_to_delete in users:
-                                del users[user_to_delete]
-                                
-                                with open("users.json", 'w') as f:
-                                    json.dump(users, f)
-                                
+                            if user_store.delete(user_to_delete):
                                 st.success(f"User '{user_to_delete}' deleted successfully!")
                                 st.rerun()
                             else:
@@ -104,10 +103,7 @@ def user_management():
 
     with st.expander("🔑 Reset Password"):
         try:
-            with open("users.json", 'r') as f:
-                users = json.load(f)
-            
-            users_list = list(users.keys())
+            users_list = list(user_store.all())
             selected_user = st.selectbox("Select User", users_list, key="reset_user_select")
             
             with st.form("reset_password_form"):
@@ -127,9 +123,7 @@ def user_management():
                         st.error("Passwords do not match!")
                     else:
                         from auth import hash_password
-                        users[selected_user]['password'] = hash_password(new_password)
-                        with open("users.json", 'w') as f:
-                            json.dump(users, f)
+                        user_store.update(selected_user, password=hash_password(new_password))
                         st.success(f"Password for {selected_user} reset successfully!")
                         st.info(f"New password: {new_password}")
         except Exception as e:
@@ -168,21 +162,18 @@ def set_student_fees():
                     st.error("Please fill all required fields (*)")
                 else:
                     student_id = generate_student_id(student_name, class_category)
-                    fees_data = load_student_fees()
                     
                     # Check if fee setting already exists
                     fee_exists = check_fee_setting_exists(student_name, class_category)
                     
-                    fees_data[student_id] = {
+                    if set_student_fee(student_id, {
                         "student_name": student_name,
                         "class_category": class_category,
                         "monthly_fee": monthly_fee,
                         "annual_charges": annual_charges,
                         "admission_fee": admission_fee,
                         "updated_at": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S")
-                    }
-                    
-                    if save_student_fees(fees_data):
+                    }):
                         if fee_exists:
                             st.success(f"✅ Fee settings updated for {student_name} ({class_category})")
                         else:
@@ -202,30 +193,25 @@ def set_student_fees():
         if not fees_data:
             st.info("No student fees settings found")
         else:
-            from utils import format_currency
             fee_records = [
                 {
                     "Student ID": student_id,
                     "Student Name": details["student_name"],
                     "Class": details["class_category"],
-                    "Monthly Fee": format_currency(details["monthly_fee"]),
-                    "Annual Charges": format_currency(details["annual_charges"]),
-                    "Admission Fee": format_currency(details["admission_fee"]),
+                    "Monthly Fee": details["monthly_fee"],
+                    "Annual Charges": details["annual_charges"],
+                    "Admission Fee": details["admission_fee"],
                     "Updated At": details["updated_at"]
                 }
                 for student_id, details in fees_data.items()
             ]
             fee_df = pd.DataFrame(fee_records)
-            st.dataframe(fee_df, use_container_width=True)
+            fee_columns = ["Monthly Fee", "Annual Charges", "Admission Fee"]
+            show_table(prepare(fee_df, fee_columns), fee_columns)
             
             # Download option
-            csv = fee_df.to_csv(index=False).encode('utf-8')
-            st.download_button(
-                label="📥 Download Student Fees as CSV",
-                data=csv,
-                file_name="student_fees.csv",
-                mime="text/csv"
-            )
+            export_controls("student_fees", "student_fees", lambda fmt: [("Student Fees", lambda: iter([fee_df]))],
+                            signature=fees_data)
             
             st.subheader("Edit/Delete Fee Settings")
             if not fee_df.empty:
@@ -263,33 +249,55 @@ def set_student_fees():
                             st.error("Please fill all required fields (*)")
                         else:
                             new_student_id = generate_student_id(edit_name, edit_class)
-                            fees_data = load_student_fees()
                             
                             if new_student_id != student_to_edit:
-                                fees_data.pop(student_to_edit, None)
+                                delete_student_fee(student_to_edit)
                             
-                            fees_data[new_student_id] = {
+                            if set_student_fee(new_student_id, {
                                 "student_name": edit_name,
                                 "class_category": edit_class,
                                 "monthly_fee": edit_monthly_fee,
                                 "annual_charges": edit_annual_charges,
                                 "admission_fee": edit_admission_fee,
                                 "updated_at": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S")
-                            }
-                            
-                            if save_student_fees(fees_data):
+                            }):
                                 st.success(f"✅ Fee settings updated for {edit_name} ({edit_class})")
                                 st.rerun()
                             else:
                                 st.error("❌ Failed to update fee settings")
                     
                     if delete_btn:
-                        fees_data = load_student_fees()
-                        if student_to_edit in fees_data:
-                            del fees_data[student_to_edit]
-                            if save_student_fees(fees_data):
-                                st.success("✅ Fee settings deleted successfully")
-                                st.rerun()
-                            else:
-                                st.error("❌ Failed to delete fee settings")
+                        if delete_student_fee(student_to_edit):
+                            st.success("✅ Fee settings deleted successfully")
+                            st.rerun()
+                        else:
+                            st.error("❌ Failed to delete fee settings")
+
+def performance():
+    """Admin view of page latency percentiles, call counts and bytes read since the app started"""
+    st.header("⏱️ Performance")
+
+    summary = page_summary()
+    if not summary:
+        st.info("No page runs recorded yet.")
+        return
+
+    st.dataframe(pd.DataFrame(summary), hide_index=True, use_container_width=True)
+
+    page_name = st.selectbox("Page", [row["Page"] for row in summary], key="performance_page")
+    latency = pd.DataFrame(histogram(page_name), columns=["Latency", "Runs"])
+    st.altair_chart(
+        alt.Chart(latency).mark_bar().encode(x=alt.X("Latency", sort=None), y="Runs"),
+        use_container_width=True
+    )
+
+    st.subheader("Functions")
+    st.caption("Times include the functions each one calls.")
+    st.dataframe(pd.DataFrame(span_summary(page_name)), hide_index=True, use_container_width=True)
+
+    if log_path():
+        st.caption(f"Every run is also logged to {log_path()}")
+    if st.button("🔄 Reset Statistics"):
+        reset_performance()
+        st.rerun()
 # [file content end]
\ No newline at end of file
@@ -0,0 +1,94 @@
+#type:ignore
+import base64
+import functools
+import hashlib
+import io
+import os
+import streamlit as st
+from fileinfo import file_signature
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # without Pillow images are served as they are, still by reference
+    Image = None
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Streamlit serves this directory at app/static/ when server.enableStaticServing is on
+STATIC_DIR = os.path.join(APP_DIR, "static")
+STATIC_URL = "app/static"
+
+# The logo is shown in a 200px circle; it is rendered at twice that for high-DPI screens
+LOGO_PATH = os.path.join(APP_DIR, "school-pic.png")
+LOGO_SIZE = (400, 400)
+
+WEBP_QUALITY = 80
+
+MIME_TYPES = {"webp": "image/webp", "png": "image/png"}
+
+def _extension(original_extension):
+    """Extension of the variants _encode writes"""
+    if Image is None:
+        return original_extension
+    return "webp" if features.check("webp") else "png"
+
+def _encode(data, size, extension):
+    """Crop and resize image bytes to size, compressed as extension"""
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.fit(ImageOps.exif_transpose(image).convert("RGB"), size, Image.LANCZOS)
+    out = io.BytesIO()
+    if extension == "webp":
+        image.save(out, format="WEBP", quality=WEBP_QUALITY, method=6)
+    else:
+        image.save(out, format="PNG", optimize=True)
+    return out.getvalue()
+
+@functools.lru_cache(maxsize=None)
+def _variant(source, signature, size):
+    """File name of the display variant of source in STATIC_DIR, written on first use
+
+    The name carries a hash of the source and the variant settings and is
+    known before encoding, so a replaced image gets a new name and an
+    existing file, e.g. one written by another process, is never rebuilt.
+    signature only keys the cache to the current version of the source.
+    """
+    with open(source, 'rb') as f:
+        data = f.read()
+    stem, original_extension = os.path.splitext(os.path.basename(source))
+    extension = _extension(original_extension.lstrip("."))
+    settings = f"{size}:{WEBP_QUALITY}:{extension}".encode('utf-8')
+    digest = hashlib.sha256(data + settings).hexdigest()[:12]
+
+    name = f"{stem}.{digest}.{extension}"
+    path = os.path.join(STATIC_DIR, name)
+    if not os.path.exists(path):
+        encoded = data if Image is None else _encode(data, size, extension)
+        os.makedirs(STATIC_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(encoded)
+        os.replace(tmp_path, path)
+    return name
+
+@functools.lru_cache(maxsize=None)
+def _data_uri(name):
+    """Inline data URI of a generated variant, encoded once per process"""
+    with open(os.path.join(STATIC_DIR, name), 'rb') as f:
+        encoded = base64.b64encode(f.read()).decode('utf-8')
+    mime = MIME_TYPES.get(name.rsplit(".", 1)[-1], "application/octet-stream")
+    return f"data:{mime};base64,{encoded}"
+
+def image_url(source, size):
+    """URL of source resized for display at size
+
+    With static file serving the browser fetches (and caches) the variant
+    by its content-hashed name; otherwise the small variant is inlined.
+    """
+    name = _variant(source, file_signature(source), size)
+    if st.get_option("server.enableStaticServing"):
+        return f"{STATIC_URL}/{name}"
+    return _data_uri(name)
+
+def logo_url():
+    """URL of the school logo as shown on the home page"""
+    return image_url(LOGO_PATH, LOGO_SIZE)
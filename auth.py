@@ -7,6 +7,8 @@ import os
 from datetime import datetime, timedelta
 from hashlib import sha256
 import re
+from user_store import user_store, DuplicateUserError
+from outbox import Outbox
 # ________________sensitive data______________________________________
 import smtplib
 
@@ -14,8 +16,26 @@ import smtplib
 GMAIL_ID = "nidakhurramalvi9@gmail.com"
 GMAIL_PSW = "zhkk ubtv saeo huxu"
 
+# Point these at a local stand-in (e.g. python -m aiosmtpd -n -l localhost:8025) for testing
+SMTP_HOST = os.environ.get("FEES_SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.environ.get("FEES_SMTP_PORT", "587"))
+
+def connect_smtp():
+    """Open an SMTP connection, using TLS and login only where the server offers them"""
+    s = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=30)
+    s.ehlo()
+    if s.has_extn("starttls"):
+        s.starttls()
+        s.ehlo()
+    if s.has_extn("auth"):
+        s.login(GMAIL_ID, GMAIL_PSW)
+    return s
+
+# Signup notifications are queued here and sent by a background worker
+signup_outbox = Outbox(connect_smtp)
+
 def send_signup_notification(username, user_email):
-    """Send email notification when a new user signs up"""
+    """Queue an email notification for the admin when a new user signs up"""
     sub = "New User Registration - School Fees Management System"
     msg = f"""
 New user registration details:
@@ -31,15 +51,11 @@ School Management System
 """
 
     try:
-        s = smtplib.SMTP('smtp.gmail.com', 587)
-        s.starttls()
-        s.login(GMAIL_ID, GMAIL_PSW)
-        s.sendmail("School Management System", GMAIL_ID, f"Subject: {sub}\n\n{msg}")
-        s.quit()
-        print(f"Signup notification sent for user: {username}")
+        signup_outbox.enqueue("School Management System", GMAIL_ID, f"Subject: {sub}\n\n{msg}")
+        print(f"Signup notification queued for user: {username}")
         return True
     except Exception as e:
-        print(f"Failed to send signup notification: {str(e)}")
+        print(f"Failed to queue signup notification: {str(e)}")
         return False
 # ________________sensitive data______________________________________
 
@@ -58,26 +74,23 @@ def verify_password(stored_password, provided_password):
 
 def initialize_user_db():
     """Initialize the user database if it doesn't exist"""
-    if not os.path.exists("users.json"):
-        with open("users.json", 'w') as f:
-            json.dump({}, f)
+    user_store.initialize()
 
 def authenticate_user(username, password):
     """Authenticate a user and check trial status"""
     try:
         initialize_user_db()
-        with open("users.json", 'r') as f:
-            users = json.load(f)
+        user = user_store.get(username)
         
-        if username in users:
-            if verify_password(users[username]['password'], password):
+        if user is not None:
+            if verify_password(user['password'], password):
                 # Set session state variables
                 st.session_state.authenticated = True
                 st.session_state.current_user = username
-                st.session_state.is_admin = users[username].get('is_admin', False)
+                st.session_state.is_admin = user.get('is_admin', False)
                 
                 # Check trial status
-                trial_end = users[username].get('trial_end')
+                trial_end = user.get('trial_end')
                 if trial_end:
                     trial_end_date = datetime.strptime(trial_end, "%Y-%m-%d %H:%M:%S")
                     if datetime.now() > trial_end_date:
@@ -99,37 +112,28 @@ def create_user(username, password, email, is_admin=False):
     """Create a new user account with email and 1-month trial"""
     try:
         initialize_user_db()
-        with open("users.json", 'r') as f:
-            users = json.load(f)
         
         if not validate_email(email):
             return False, "Please use a valid Gmail address (e.g., username@gmail.com)"
         
-        # Check if username already exists
-        if username in users:
-            return False, "Username already exists. Please choose a different username."
-        
-        # Check for email uniqueness
-        for user in users.values():
-            if 'email' in user and user['email'] == email:
-                return False, "This Gmail address is already registered. Please use a different Gmail address or log in."
-        
         trial_start = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         trial_end = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d %H:%M:%S")
                 
-        users[username] = {
+        # The store checks username and email uniqueness atomically with the write
+        user_store.add(username, {
             "password": hash_password(password),
             "is_admin": is_admin,
             "email": email,
             "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "trial_start": trial_start,
             "trial_end": trial_end
-        }
-        
-        with open("users.json", 'w') as f:
-            json.dump(users, f)
+        })
         
         return True, "User created successfully"
+    except DuplicateUserError as e:
+        if e.field == "username":
+            return False, "Username already exists. Please choose a different username."
+        return False, "This Gmail address is already registered. Please use a different Gmail address or log in."
     except Exception as e:
         return False, f"Error creating user: {str(e)}"
 
@@ -216,12 +220,11 @@ def login_page():
                         st.success(f"{message} Your 1-month free trial has started!") 
                         st.info(f"User '{new_username}' created with email: {new_email}")
                         
-                        # Send email notification ONLY ONCE here
-                        with st.spinner("Sending registration notification..."):
-                            if send_signup_notification(new_username, new_email):
-                                st.success("Registration notification sent to admin!")
-                            else:
-                                st.warning("User created but couldn't send notification email")
+                        # Queue email notification ONLY ONCE here; it is sent in the background
+                        if send_signup_notification(new_username, new_email):
+                            st.success("Registration notification queued for admin!")
+                        else:
+                            st.warning("User created but couldn't queue notification email")
                         
                         # Auto-login after successful signup
                         if authenticate_user(new_username, new_password):
@@ -0,0 +1 @@
+#type:ignore
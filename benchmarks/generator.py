@@ -0,0 +1,153 @@
+#type:ignore
+"""Deterministic synthetic school data: ledger, fee settings and users
+
+Run from the repository root: python -m benchmarks.generator <directory> [rows]
+"""
+import json
+import os
+import sys
+from hashlib import md5, sha256
+import numpy as np
+import pandas as pd
+from schema import LEDGER_COLUMNS, RECORD_KEY, CLASS_CATEGORIES, MONTHS, PAYMENT_METHODS
+
+# Monthly fee tiers by class: nursery and KG, primary, middle, secondary
+CLASS_FEES = dict(zip(CLASS_CATEGORIES, [1500] * 3 + [2000] * 5 + [2500] * 3 + [3000] * 2))
+ANNUAL_CHARGES = 2000
+ADMISSION_FEE = 1000
+
+# How receipts are paid, in PAYMENT_METHODS order
+PAYMENT_MIX = [0.6, 0.2, 0.1, 0.08, 0.02]
+
+SIGNATURES = ["Accounts Office", "Principal", "Clerk A", "Clerk B"]
+
+def _student_ids(names, classes):
+    """Same IDs database.generate_student_id gives"""
+    return [md5(f"{name}_{category}".encode('utf-8')).hexdigest()[:8].upper() for name, category in zip(names, classes)]
+
+def academic_years(count, last=None):
+    """The count academic years ending with last (the current one by default)"""
+    if last is None:
+        now = pd.Timestamp.now()
+        last = now.year if now.month >= 4 else now.year - 1
+    else:
+        last = int(str(last)[:4])
+    return [f"{year}-{year + 1}" for year in range(last - count + 1, last + 1)]
+
+def generate_ledger(rows, years=3, paid_share=0.85, annual_share=0.9, admission_share=0.3,
+                    partial_share=0.05, last_year=None, seed=0):
+    """A ledger of exactly rows receipts spread over the given number of academic years
+
+    Students are enrolled in every year; each pays about paid_share of the
+    months, most pay the annual charges and some an admission fee in their
+    first year. A few receipts are partial payments. Same arguments, same
+    ledger.
+    """
+    rng = np.random.default_rng(seed)
+    year_names = academic_years(years, last_year)
+    per_student = years * (len(MONTHS) * paid_share + annual_share) + admission_share
+    # A little headroom so the random draw still yields enough receipts to cut to rows
+    students = max(1, int(np.ceil(rows * 1.1 / per_student)))
+
+    names = [f"Student {i:06d}" for i in range(students)]
+    classes = rng.choice(CLASS_CATEGORIES, size=students)
+    ids = np.array(_student_ids(names, classes))
+    sections = rng.choice(["A", "B", "C"], size=students)
+    monthly_fees = np.array([CLASS_FEES[category] for category in classes])
+
+    # Candidate receipts: every student x year x (12 months, annual, admission)
+    items = MONTHS + ["ANNUAL", "ADMISSION"]
+    student = np.repeat(np.arange(students), years * len(items))
+    year = np.tile(np.repeat(np.arange(years), len(items)), students)
+    item = np.tile(np.arange(len(items)), students * years)
+    share = np.where(item < len(MONTHS), paid_share, np.where(item == len(MONTHS), annual_share, admission_share))
+    keep = rng.random(len(item)) < share
+    keep &= (item != len(MONTHS) + 1) | (year == 0)
+    student, year, item = student[keep][:rows], year[keep][:rows], item[keep][:rows]
+    n = len(item)
+
+    is_month = item < len(MONTHS)
+    monthly = np.where(is_month, monthly_fees[student], 0)
+    annual = np.where(item == len(MONTHS), ANNUAL_CHARGES, 0)
+    admission = np.where(item == len(MONTHS) + 1, ADMISSION_FEE, 0)
+    due = monthly + annual + admission
+    partial = rng.random(n) < partial_share
+    received = np.where(partial, (due * rng.uniform(0.3, 0.9, n)).round(-1), due).astype(np.int64)
+
+    # Monthly receipts fall in their month, annual and admission ones in April
+    start_years = np.array([int(name[:4]) for name in year_names])[year]
+    month_offset = np.where(is_month, item, 0)
+    calendar_month = (3 + month_offset) % 12 + 1
+    calendar_year = start_years + (3 + month_offset) // 12
+    day = rng.integers(1, 29, n)
+    dates = pd.to_datetime({"year": calendar_year, "month": calendar_month, "day": day})
+    timestamps = dates + pd.to_timedelta(rng.integers(8 * 3600, 16 * 3600, n), unit="s")
+
+    df = pd.DataFrame({
+        "ID": ids[student],
+        "Student Name": np.array(names, dtype=object)[student],
+        "Class Category": classes[student],
+        "Class Section": sections[student],
+        "Month": np.array(items, dtype=object)[item],
+        "Monthly Fee": monthly,
+        "Annual Charges": annual,
+        "Admission Fee": admission,
+        "Received Amount": received,
+        "Payment Method": rng.choice(PAYMENT_METHODS, size=n, p=PAYMENT_MIX),
+        "Date": dates.dt.strftime("%Y-%m-%d"),
+        "Signature": rng.choice(SIGNATURES, size=n),
+        "Entry Timestamp": timestamps.dt.strftime("%Y-%m-%d %H:%M:%S"),
+        "Academic Year": np.array(year_names, dtype=object)[year],
+        RECORD_KEY: [f"r{i:012x}" for i in range(n)],
+    })
+    # Receipts arrive roughly in date order, as the app appends them
+    return df.sort_values("Entry Timestamp", kind="stable").reset_index(drop=True)[LEDGER_COLUMNS]
+
+def generate_fee_settings(ledger, custom_share=0.1, seed=0):
+    """Admin fee settings for a share of the ledger's students, keyed by student ID"""
+    rng = np.random.default_rng(seed)
+    students = ledger.drop_duplicates("ID").sort_values("ID")
+    chosen = students[rng.random(len(students)) < custom_share]
+    return {
+        row["ID"]: {
+            "student_name": row["Student Name"],
+            "class_category": row["Class Category"],
+            "monthly_fee": int(CLASS_FEES[row["Class Category"]] * rng.choice([0.5, 0.75, 1.2])),
+            "annual_charges": ANNUAL_CHARGES,
+            "admission_fee": ADMISSION_FEE,
+            "updated_at": "2025-04-01 09:00:00",
+        }
+        for _, row in chosen.iterrows()
+    }
+
+def generate_users(count=20):
+    """Users as stored in users.json: one admin and count - 1 staff accounts"""
+    return {
+        ("admin" if i == 0 else f"staff{i:03d}"): {
+            "password": sha256(f"password{i}".encode('utf-8')).hexdigest(),
+            "is_admin": i == 0,
+            "email": f"{'admin' if i == 0 else f'staff{i:03d}'}@gmail.com",
+            "created_at": "2025-04-01 09:00:00",
+            "trial_start": "2025-04-01 09:00:00",
+            "trial_end": "2099-04-01 09:00:00",
+        }
+        for i in range(count)
+    }
+
+def write_school(directory, rows, seed=0, **options):
+    """Write fees_data.csv, student_fees.json and users.json for a synthetic school; returns the ledger"""
+    os.makedirs(directory, exist_ok=True)
+    ledger = generate_ledger(rows, seed=seed, **options)
+    ledger.to_csv(os.path.join(directory, "fees_data.csv"), index=False)
+    with open(os.path.join(directory, "student_fees.json"), 'w') as f:
+        json.dump(generate_fee_settings(ledger, seed=seed), f, indent=4)
+    with open(os.path.join(directory, "users.json"), 'w') as f:
+        json.dump(generate_users(), f)
+    return ledger
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python -m benchmarks.generator <directory> [rows]")
+        sys.exit(2)
+    ledger = write_school(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 10000)
+    print(f"Wrote {len(ledger)} receipts of {ledger['ID'].nunique()} students to {sys.argv[1]}")
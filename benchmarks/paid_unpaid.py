@@ -0,0 +1,63 @@
+#type:ignore
+"""Time the Paid & Unpaid Students report on a synthetic school
+
+Run from the repository root: python -m benchmarks.paid_unpaid [students]
+"""
+import sys
+import time
+import numpy as np
+import pandas as pd
+from schema import MONTHS, CLASS_CATEGORIES, normalize_ledger
+from report_data import expected_monthly_fees, paid_unpaid_grid, student_payment_summary
+
+BUDGET_SECONDS = 1.0
+
+def synthetic_ledger(students, paid_share=0.8, seed=0):
+    """One academic year of monthly fee rows where about paid_share of student-months are paid"""
+    rng = np.random.default_rng(seed)
+    ids = np.repeat([f"S{i:06d}" for i in range(students)], len(MONTHS))
+    months = np.tile(MONTHS, students)
+    keep = rng.random(len(ids)) < paid_share
+    fees = rng.choice([1500, 2000, 2500, 3000], size=students).repeat(len(MONTHS))
+    df = pd.DataFrame({
+        "ID": ids[keep],
+        "Student Name": np.char.add("Student ", ids[keep]),
+        "Class Category": np.repeat(rng.choice(CLASS_CATEGORIES, size=students), len(MONTHS))[keep],
+        "Month": months[keep],
+        "Monthly Fee": fees[keep],
+        "Received Amount": fees[keep],
+        "Academic Year": "2025-2026",
+    })
+    return normalize_ledger(df)
+
+def student_fees_frame(ids, custom_share=0.1, seed=0):
+    """Stand-in for database.get_student_fees with some students on custom fees"""
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame(index=pd.Index(ids, dtype=object))
+    frame["monthly_fee"] = 2000.0
+    frame["annual_charges"] = 2000.0
+    frame["admission_fee"] = 1000.0
+    frame["custom"] = rng.random(len(frame)) < custom_share
+    return frame
+
+def run(students=5000, repeat=5):
+    ledger = synthetic_ledger(students)
+    student_fees = student_fees_frame(ledger["ID"].unique())
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        grid = paid_unpaid_grid(ledger, expected_monthly_fees(ledger, student_fees))
+        student_payment_summary(grid)
+        timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+    print(f"{students} students x {len(MONTHS)} months ({len(ledger)} ledger rows, {len(grid)} grid rows): "
+          f"best {best * 1000:.1f} ms, median {np.median(timings) * 1000:.1f} ms")
+    return best
+
+if __name__ == "__main__":
+    best = run(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
+    if best > BUDGET_SECONDS:
+        print(f"Slower than the {BUDGET_SECONDS:.1f} s budget")
+        sys.exit(1)
@@ -0,0 +1,196 @@
+#type:ignore
+"""Time and measure peak memory of the main data paths on synthetic schools
+
+Run from the repository root:
+
+    python -m benchmarks.suite [--sizes 1000,10000] [--only load_data_cold,...]
+                               [--save baseline.json] [--compare baseline.json]
+
+Each size gets its own generated school in a temporary directory. --save
+writes the results as a baseline; --compare prints a report against one and
+exits non-zero when something got slower or bigger than TOLERANCE allows.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from streamlit import config as streamlit_config
+from streamlit import logger as streamlit_logger
+import database
+import display
+import reports
+import utils
+from benchmarks.generator import write_school
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# A result regresses when it is this much worse than the baseline and the
+# difference is above the noise floor
+TOLERANCE = 0.3
+NOISE_SECONDS = 0.025
+NOISE_MB = 1.0
+
+# Receipts appended per save_to_csv run and students looked up per get_unpaid_months run
+SAVE_BATCH = 20
+LOOKUP_STUDENTS = 200
+
+def _reset_caches():
+    """Forget every process-wide cache so the next read starts cold"""
+    database.reset_caches()
+    display.clear_cache()
+
+def _receipts(ledger, count):
+    """New receipts for existing students, shaped like fees_entry writes them"""
+    rows = ledger.sample(count, random_state=0)
+    now = pd.Timestamp.now()
+    return [
+        {
+            "ID": row["ID"], "Student Name": row["Student Name"], "Class Category": row["Class Category"],
+            "Class Section": row["Class Section"], "Month": row["Month"], "Monthly Fee": row["Monthly Fee"],
+            "Annual Charges": row["Annual Charges"], "Admission Fee": row["Admission Fee"],
+            "Received Amount": row["Received Amount"], "Payment Method": "Cash", "Date": now.strftime("%Y-%m-%d"),
+            "Signature": "Benchmark", "Entry Timestamp": now.strftime("%Y-%m-%d %H:%M:%S"),
+            "Academic Year": row["Academic Year"],
+        }
+        for _, row in rows.iterrows()
+    ]
+
+def _benchmarks(ledger):
+    """Benchmark name -> (prepare, run); prepare runs untimed before every run"""
+    receipts = _receipts(ledger, SAVE_BATCH)
+    students = ledger["ID"].drop_duplicates().head(LOOKUP_STUDENTS).tolist()
+    years = sorted(ledger["Academic Year"].unique())
+
+    def warm():
+        database.load_data()
+        database.get_collection_cube()
+
+    def nothing():
+        pass
+
+    def cold_report():
+        warm()
+        display._cache.clear()
+
+    return {
+        "load_data_cold": (_reset_caches, database.load_data),
+        "load_data_warm": (warm, database.load_data),
+        "save_to_csv": (warm, lambda: database.save_to_csv(receipts)),
+        "update_data": (nothing, lambda: database.update_data(database.load_data())),
+        "get_unpaid_months": (warm, lambda: [utils.get_unpaid_months(student, years[-1]) for student in students]),
+        "paid_unpaid_records": (cold_report, reports.paid_unpaid_records),
+        "student_yearly_report": (warm, reports.student_yearly_report),
+    }
+
+def _measure(prepare, run, repeat):
+    """Best and median seconds over repeat runs, then peak traced memory of one more run"""
+    timings = []
+    for _ in range(repeat):
+        prepare()
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+
+    prepare()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": min(timings), "median_seconds": float(np.median(timings)), "peak_mb": peak / 2**20}
+
+def run_suite(sizes=SIZES, only=None, repeat=5):
+    """Run the benchmarks at every size; returns {name: {rows: result}}"""
+    # Page functions run in Streamlit's bare mode; silence its missing-context warnings
+    # (the level is re-read from config when Streamlit parses it, so set both)
+    streamlit_config.set_option("logger.level", "error")
+    streamlit_logger.set_log_level("error")
+    results = {}
+    origin = os.getcwd()
+    for rows in sizes:
+        with tempfile.TemporaryDirectory(prefix="fee_bench_") as directory:
+            ledger = write_school(directory, rows)
+            os.chdir(directory)
+            try:
+                _reset_caches()
+                for name, (prepare, run) in _benchmarks(ledger).items():
+                    if only and name not in only:
+                        continue
+                    result = _measure(prepare, run, repeat)
+                    results.setdefault(name, {})[str(rows)] = result
+                    print(f"{name:<24} {rows:>9,} rows  {result['seconds'] * 1000:>10.1f} ms  "
+                          f"{result['peak_mb']:>8.1f} MB peak")
+            finally:
+                os.chdir(origin)
+                _reset_caches()
+    return results
+
+def save_baseline(results, path=BASELINE_PATH):
+    with open(path, 'w') as f:
+        json.dump({
+            "created": pd.Timestamp.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "results": results,
+        }, f, indent=2)
+
+def compare(results, baseline):
+    """Report lines comparing results with a baseline, and whether anything regressed"""
+    lines = [f"{'benchmark':<24} {'rows':>9}  {'baseline':>10}  {'current':>10}  {'ratio':>6}  "
+             f"{'peak MB':>15}  status"]
+    regressed = False
+    for name, by_size in results.items():
+        for rows, result in by_size.items():
+            base = baseline.get("results", {}).get(name, {}).get(rows)
+            if base is None:
+                lines.append(f"{name:<24} {int(rows):>9,}  {'-':>10}  {result['seconds'] * 1000:>8.1f}ms  "
+                             f"{'':>6}  {result['peak_mb']:>15.1f}  new")
+                continue
+            ratio = result["seconds"] / base["seconds"] if base["seconds"] else float("inf")
+            slower = (result["seconds"] > base["seconds"] * (1 + TOLERANCE)
+                      and result["seconds"] - base["seconds"] > NOISE_SECONDS)
+            bigger = (result["peak_mb"] > base["peak_mb"] * (1 + TOLERANCE)
+                      and result["peak_mb"] - base["peak_mb"] > NOISE_MB)
+            status = "REGRESSION" if slower or bigger else ("faster" if ratio < 1 - TOLERANCE else "ok")
+            regressed |= slower or bigger
+            lines.append(
+                f"{name:<24} {int(rows):>9,}  {base['seconds'] * 1000:>8.1f}ms  {result['seconds'] * 1000:>8.1f}ms  "
+                f"{ratio:>5.2f}x  {base['peak_mb']:>6.1f} -> {result['peak_mb']:>6.1f}  {status}"
+            )
+    return lines, regressed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(str(size) for size in SIZES),
+                        help="comma-separated ledger sizes in rows")
+    parser.add_argument("--only", help="comma-separated benchmark names")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", nargs="?", const=BASELINE_PATH, help="write the results as a baseline")
+    parser.add_argument("--compare", nargs="?", const=BASELINE_PATH, help="compare with a saved baseline")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    only = set(args.only.split(",")) if args.only else None
+    results = run_suite(sizes, only, args.repeat)
+
+    if args.save:
+        save_baseline(results, args.save)
+        print(f"Saved baseline to {args.save}")
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            lines, regressed = compare(results, json.load(f))
+        print("\n".join(lines))
+        return 1 if regressed else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+#type:ignore
+"""Run reports, exports and maintenance jobs without the Streamlit UI
+
+    fee-app report defaulters outstanding --year 2025-2026 --month APRIL --month MAY
+    fee-app export records.parquet --year 2025-2026
+    fee-app compact [--close-years]
+    fee-app rebuild
+    fee-app check
+
+Run from the school's data directory or pass --data-dir. Reports run in
+parallel worker processes, one per report and month. Exit status is
+non-zero when a job fails or the integrity check finds errors.
+"""
+import argparse
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from streamlit import config as streamlit_config
+from streamlit import logger as streamlit_logger
+import snapshot
+from collection_cube import CollectionCube, collection_cube
+from database import generate_student_id, get_student_fees, ensure_initialized
+from exports import FORMATS, available_formats, build_export, ledger_sheets
+from ledger_cache import get_entry
+from report_data import (
+    year_grid, month_defaulters, student_payment_summary, student_totals, collection_by_class
+)
+from schema import MONTHS, CATEGORY_COLUMNS, RECORD_KEY, AMOUNT_COLUMNS, get_academic_year
+from storage import get_backend
+
+# Reports by name: (description, whether it is built per month)
+REPORTS = {
+    "defaulters": ("Students who haven't paid a month, with the fee due", True),
+    "paid-unpaid": ("Paid and unpaid status of every student for a month", True),
+    "outstanding": ("Unpaid months and total outstanding per student for the year", False),
+    "student-totals": ("Fees and amount received per student for the year", False),
+    "collection": ("Amount received per class and month for the year", False),
+}
+
+def _quiet():
+    """Silence Streamlit's bare-mode warnings; the level is re-read from config, so set both"""
+    streamlit_config.set_option("logger.level", "error")
+    streamlit_logger.set_log_level("error")
+
+def _format(name, path=None):
+    """Export format from its name, or from the file extension when name is None"""
+    if name is None:
+        extension = os.path.splitext(path or "")[1].lstrip(".").lower()
+        name = next((fmt for fmt, (ext, _) in FORMATS.items() if ext == extension), "CSV")
+    fmt = next((fmt for fmt in FORMATS if fmt.lower() == name.lower()), None)
+    if fmt not in available_formats():
+        raise SystemExit(f"Format '{name}' is not available; choose one of: {', '.join(available_formats())}")
+    return fmt
+
+def _write(frame, sheet, fmt, path):
+    """Write one frame with the export writers and move the file into place"""
+    tmp_path = build_export(fmt, [(sheet, lambda: [frame])])
+    shutil.move(tmp_path, path)
+
+def build_report(name, academic_year, month=None):
+    """The frame of one report; raises on storage errors instead of showing them"""
+    ledger = get_backend().load_ledger()
+    if name == "collection":
+        return collection_by_class(ledger[ledger["Academic Year"] == academic_year])
+    if name == "student-totals":
+        return student_totals(ledger[ledger["Academic Year"] == academic_year])
+
+    grid = year_grid(ledger, academic_year, get_student_fees)
+    if name == "outstanding":
+        return student_payment_summary(grid)
+    if name == "defaulters":
+        return month_defaulters(grid, month)
+    return grid[grid["Month"] == month].reset_index(drop=True)
+
+def run_report(name, academic_year, month, fmt, out_dir):
+    """Worker entry point: build one report and write it; returns (path, rows, seconds)"""
+    _quiet()
+    start = time.perf_counter()
+    frame = build_report(name, academic_year, month)
+    stem = "-".join(part for part in (name, academic_year, month and month.lower()) if part)
+    path = os.path.join(out_dir, f"{stem}.{FORMATS[fmt][0]}")
+    _write(frame, name, fmt, path)
+    return path, len(frame), time.perf_counter() - start
+
+def report_command(args):
+    academic_year = args.year or get_academic_year(pd.Timestamp.now())
+    months = [month.upper() for month in args.month] or [pd.Timestamp.now().strftime("%B").upper()]
+    unknown = [month for month in months if month not in MONTHS]
+    if unknown:
+        raise SystemExit(f"Unknown month(s): {', '.join(unknown)}")
+    fmt = _format(args.format)
+    os.makedirs(args.out_dir, exist_ok=True)
+    ensure_initialized()
+
+    jobs = [
+        (name, academic_year, month if per_month else None)
+        for name in dict.fromkeys(args.reports)
+        for per_month in [REPORTS[name][1]]
+        for month in (months if per_month else [None])
+    ]
+    failed = 0
+    with ProcessPoolExecutor(max_workers=min(args.workers, len(jobs)), initializer=_quiet) as pool:
+        futures = {pool.submit(run_report, *job, fmt, args.out_dir): job for job in jobs}
+        for future in as_completed(futures):
+            label = " ".join(part for part in futures[future] if part)
+            try:
+                path, rows, seconds = future.result()
+                print(f"{label}: {rows} rows -> {path} ({seconds:.1f}s)")
+            except Exception as e:
+                failed += 1
+                print(f"{label}: failed: {str(e)}", file=sys.stderr)
+    return 1 if failed else 0
+
+def export_command(args):
+    fmt = _format(args.format, args.path)
+    filters = {"Academic Year": args.year, "Class Category": args.class_category, "Month": args.month}
+    ensure_initialized()
+    tmp_path = build_export(fmt, ledger_sheets({k: v for k, v in filters.items() if v}, by_class=args.by_class))
+    shutil.move(tmp_path, args.path)
+    print(f"Exported to {args.path}")
+    return 0
+
+def compact_command(args):
+    """Compact the ledger, which is safe while the app runs; closing old years is not"""
+    backend = get_backend()
+    backend.initialize()
+    backend.compact()
+    print(f"Compacted the {backend.name} ledger")
+    if args.close_years:
+        if not hasattr(backend, "close_stale_years"):
+            print(f"The {backend.name} ledger has no academic years to close", file=sys.stderr)
+            return 1
+        backend.close_stale_years()
+        print("Closed the old academic years")
+    return 0
+
+def rebuild_command(args):
+    """Rebuild the persisted collection cube and the Parquet snapshot from the ledger"""
+    backend = get_backend()
+    backend.initialize()
+    df = backend.ledger_view()
+    collection_cube.rebuild(df, backend.logical_version())
+    collection_cube.flush()
+    print(f"Rebuilt the collection cube from {len(df)} records")
+
+    ledger_path = getattr(backend, "ledger_path", None)
+    entry = get_entry(ledger_path) if ledger_path else None
+    if snapshot.pq is not None and entry is not None and len(entry.df):
+        snapshot.write(ledger_path, entry)
+        print(f"Rewrote the snapshot {snapshot.snapshot_path(ledger_path)}")
+    return 0
+
+def integrity_problems(df, backend):
+    """Errors and warnings found in a typed ledger, as two lists of messages"""
+    errors, warnings = [], []
+
+    def count(mask, message, into):
+        found = int(mask.sum())
+        if found:
+            into.append(f"{found} {message}")
+
+    count(df[RECORD_KEY].isna(), "records without a record key", errors)
+    count(df[RECORD_KEY].duplicated() & df[RECORD_KEY].notna(), "records with a duplicate record key", errors)
+    for col in ["ID", "Student Name", "Class Category", "Academic Year"]:
+        count(df[col].isna(), f"records without {col}", errors)
+    for col in AMOUNT_COLUMNS:
+        count(df[col] < 0, f"records with a negative {col}", errors)
+    for col, known in CATEGORY_COLUMNS.items():
+        if known:
+            count(df[col].notna() & ~df[col].isin(known), f"records with an unknown {col}", warnings)
+    count(df["Date"].isna(), "records with a missing or unreadable Date", warnings)
+
+    years = df["Academic Year"].astype(str)
+    starts = pd.to_numeric(years.str[:4], errors="coerce")
+    well_formed = years.str.fullmatch(r"\d{4}-\d{4}") & (pd.to_numeric(years.str[5:], errors="coerce") == starts + 1)
+    count(df["Academic Year"].notna() & ~well_formed, "records with a malformed Academic Year", errors)
+
+    students = df[["ID", "Student Name", "Class Category"]].drop_duplicates().dropna()
+    expected = [generate_student_id(name, category) for name, category in zip(students["Student Name"], students["Class Category"])]
+    count(students["ID"] != pd.Series(expected, index=students.index), "students whose ID doesn't match their name and class", warnings)
+
+    billed = df[(df["Monthly Fee"] > 0) & df["Month"].isin(MONTHS)]
+    count(billed.duplicated(["ID", "Academic Year", "Month"]), "monthly fees paid more than once for the same month", warnings)
+
+    stored = CollectionCube()
+    if stored.load(backend.logical_version()):
+        received = df.groupby("Academic Year", observed=True)["Received Amount"].sum()
+        for year, total in received.items():
+            if abs(stored.totals(**{"Academic Year": str(year)})["Received Amount"] - total) > 0.5:
+                errors.append(f"collection cube total for {year} differs from the ledger; run rebuild")
+    return errors, warnings
+
+def check_command(args):
+    backend = get_backend()
+    try:
+        df = backend.load_ledger()
+    except Exception as e:
+        print(f"ERROR: the ledger can't be read: {str(e)}")
+        return 1
+    errors, warnings = integrity_problems(df, backend)
+    for message in errors:
+        print(f"ERROR: {message}")
+    for message in warnings:
+        print(f"WARNING: {message}")
+    print(f"Checked {len(df)} records of the {backend.name} ledger: {len(errors)} errors, {len(warnings)} warnings")
+    return 1 if errors else 0
+
+def parser():
+    root = argparse.ArgumentParser(prog="fee-app", description=__doc__.splitlines()[0])
+    root.add_argument("--data-dir", help="directory holding the ledger and settings (default: current)")
+    commands = root.add_subparsers(dest="command", required=True)
+
+    report = commands.add_parser("report", help="build reports in parallel worker processes")
+    report.add_argument("reports", nargs="+", choices=list(REPORTS), metavar="REPORT",
+                        help="; ".join(f"{name}: {description}" for name, (description, _) in REPORTS.items()))
+    report.add_argument("--year", help="academic year, e.g. 2025-2026 (default: current)")
+    report.add_argument("--month", action="append", default=[], help="month of monthly reports, repeatable (default: current)")
+    report.add_argument("--format", default="CSV", help="CSV, Parquet or Excel")
+    report.add_argument("--out-dir", default="batch_reports")
+    report.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    report.set_defaults(run=report_command)
+
+    export = commands.add_parser("export", help="export ledger records")
+    export.add_argument("path")
+    export.add_argument("--format", help="CSV, Parquet or Excel (default: from the file extension)")
+    export.add_argument("--year")
+    export.add_argument("--class", dest="class_category")
+    export.add_argument("--month")
+    export.add_argument("--by-class", action="store_true", help="one sheet per class (Excel)")
+    export.set_defaults(run=export_command)
+
+    compact = commands.add_parser("compact", help="compact ledger storage, also while the app runs")
+    compact.add_argument("--close-years", action="store_true",
+                         help="also close old academic years of the partitioned backend; stop the app first")
+    compact.set_defaults(run=compact_command)
+    commands.add_parser("rebuild", help="rebuild the collection cube and snapshot").set_defaults(run=rebuild_command)
+    commands.add_parser("check", help="check the ledger for integrity problems").set_defaults(run=check_command)
+    return root
+
+def main(argv=None):
+    args = parser().parse_args(argv)
+    _quiet()
+    if args.data_dir:
+        os.chdir(args.data_dir)
+    return args.run(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+#type:ignore
+import json
+import logging
+import os
+import threading
+import pandas as pd
+from schema import AMOUNT_COLUMNS, CATEGORY_COLUMNS
+
+CUBE_PATH = "fees_cube.json"
+
+# Cube dimensions, in key order
+DIMENSIONS = ["Academic Year", "Class Category", "Month", "Payment Method"]
+
+# Writes are persisted at most this often; a stale file only means a rebuild on the next start
+SAVE_DELAY_SECONDS = 30
+
+logger = logging.getLogger(__name__)
+
+def _key_part(value):
+    return None if pd.isna(value) else str(value)
+
+def _amount(value):
+    """Treat missing or unparsable amounts as zero"""
+    try:
+        return 0.0 if pd.isna(value) else float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+class Cell:
+    """Row count and amount sums of the ledger rows sharing one combination of dimension values"""
+    __slots__ = ("count", "amounts")
+
+    def __init__(self):
+        self.count = 0
+        self.amounts = [0.0] * len(AMOUNT_COLUMNS)
+
+    def add(self, amounts, sign=1, count=1):
+        self.count += sign * count
+        for i, amount in enumerate(amounts):
+            self.amounts[i] += sign * amount
+
+class CollectionCube:
+    """Ledger totals by academic year x class x month x payment method
+
+    Like the payment status index it remembers the ledger version it
+    reflects: writers apply their rows and stamp the new version, anything
+    else forces a rebuild (or a load of the persisted cube if that matches).
+    Queries only walk the cells and every cell has a fixed size, so queries
+    and the persisted file cost the same however long the ledger history
+    gets. Distinct student counts aren't additive and are left to
+    report_data.student_counts.
+    """
+
+    def __init__(self, path=CUBE_PATH):
+        self.path = path
+        self._cells = {}
+        self.version = None
+        self.lock = threading.RLock()
+        self._save_timer = None
+
+    def _cell(self, key):
+        cell = self._cells.get(key)
+        if cell is None:
+            cell = self._cells[key] = Cell()
+        return cell
+
+    def rebuild(self, df, version):
+        """Recompute every cell from a full ledger DataFrame"""
+        with self.lock:
+            self._cells = {}
+            if not df.empty:
+                frame = df[DIMENSIONS + AMOUNT_COLUMNS].copy()
+                for col in AMOUNT_COLUMNS:
+                    frame[col] = pd.to_numeric(frame[col], errors="coerce").fillna(0)
+                frame["Rows"] = 1
+                grouped = frame.groupby(DIMENSIONS, observed=True, dropna=False).sum()
+                for dims, *values in zip(grouped.index, *(grouped[col] for col in AMOUNT_COLUMNS + ["Rows"])):
+                    self._cell(tuple(_key_part(value) for value in dims)).add(values[:-1], count=int(values[-1]))
+            self.version = version
+        self.save_soon(delay=0)
+
+    def apply(self, records, sign=1):
+        """Add (sign=1) or remove (sign=-1) ledger records from the cube"""
+        with self.lock:
+            for record in records:
+                amounts = [_amount(record.get(col)) for col in AMOUNT_COLUMNS]
+                key = tuple(_key_part(record.get(dim)) for dim in DIMENSIONS)
+                cell = self._cell(key)
+                cell.add(amounts, sign)
+                if cell.count <= 0:
+                    del self._cells[key]
+        self.save_soon()
+
+    def _matching(self, filters):
+        wanted = [(DIMENSIONS.index(dim), value) for dim, value in filters.items() if value is not None]
+        return [
+            (key, cell) for key, cell in self._cells.items()
+            if all(key[i] == value for i, value in wanted)
+        ]
+
+    def totals(self, **filters):
+        """Row count and amount sums of the cells matching filters
+
+        Filters are given by dimension name, e.g. totals(**{"Class Category": "KGI"}).
+        """
+        with self.lock:
+            cells = [cell for _, cell in self._matching(filters)]
+            result = {"Records": sum(cell.count for cell in cells)}
+            for i, col in enumerate(AMOUNT_COLUMNS):
+                result[col] = sum(cell.amounts[i] for cell in cells)
+            return result
+
+    def by(self, dimension, **filters):
+        """Row count and amount sums per value of one dimension, in the dimension's natural order"""
+        position = DIMENSIONS.index(dimension)
+        with self.lock:
+            rows = {}
+            for key, cell in self._matching(filters):
+                row = rows.setdefault(key[position], [0] + [0.0] * len(AMOUNT_COLUMNS))
+                row[0] += cell.count
+                for i, amount in enumerate(cell.amounts):
+                    row[i + 1] += amount
+        known = CATEGORY_COLUMNS.get(dimension) or []
+        order = [value for value in known if value in rows] + sorted((value for value in rows if value not in known), key=str)
+        return pd.DataFrame([rows[value] for value in order], index=pd.Index(order, name=dimension),
+                            columns=["Records"] + AMOUNT_COLUMNS)
+
+    def save_soon(self, delay=SAVE_DELAY_SECONDS):
+        """Persist the cube after a delay, coalescing the writes that arrive meanwhile"""
+        with self.lock:
+            if self._save_timer is not None:
+                return
+            self._save_timer = threading.Timer(delay, self._save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def flush(self):
+        """Persist the cube now instead of waiting for a pending save"""
+        with self.lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+        self._save()
+
+    def _save(self):
+        try:
+            with self.lock:
+                self._save_timer = None
+                payload = json.dumps({
+                    "version": json.dumps(self.version),
+                    "cells": [
+                        [list(key), cell.count, cell.amounts]
+                        for key, cell in self._cells.items()
+                    ],
+                })
+            tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(payload)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            logger.exception("Failed to save the collection cube to %s", self.path)
+
+    def load(self, version):
+        """Adopt the persisted cube if it reflects the given ledger version; returns success"""
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception:
+            return False
+        # Files from before cells were fixed-size carry per-student counts and are rebuilt
+        if data.get("version") != json.dumps(version) or any(len(cell) != 3 for cell in data["cells"]):
+            return False
+
+        with self.lock:
+            self._cells = {}
+            for key, count, amounts in data["cells"]:
+                cell = self._cell(tuple(key))
+                cell.count = count
+                cell.amounts = amounts
+            self.version = version
+        return True
+
+collection_cube = CollectionCube()
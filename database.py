@@ -128,18 +128,67 @@
 # [file content begin]
 #type:ignore
 import pandas as pd
-import numpy as np
 import json
 import os
 from datetime import datetime
 from hashlib import md5
+import threading
 import streamlit as st
+import ledger_cache
+import snapshot
+from storage import get_backend, reset_backend, LEDGER_COLUMNS
+from schema import memory_report
+from payment_index import payment_index
+from collection_cube import collection_cube
+from rerun_cache import memoize_per_rerun, invalidate as invalidate_reads
+from ledger_writer import LedgerWriter
+from perf import timed
 
+# Serializes ledger writes so the payment index sees them in order
+_write_lock = threading.Lock()
+
+# Derived views of the ledger that writers keep current instead of forcing rebuilds
+_LEDGER_INDEXES = (payment_index, collection_cube)
+
+# Fee setting fields by fee type, and the fees of students the admin hasn't set
+FEE_FIELDS = {"monthly": "monthly_fee", "annual": "annual_charges", "admission": "admission_fee"}
+DEFAULT_FEES = {"monthly_fee": 2000, "annual_charges": 2000, "admission_fee": 1000}
+
+# Custom fees as a DataFrame, rebuilt when the fee settings change
+_fee_table = (None, None)
+
+# Backend whose files this process has initialized
+_initialized_backend = None
+_initialize_lock = threading.Lock()
+
+@timed
 def initialize_files():
     """Initialize all required files"""
-    initialize_csv()
+    get_backend().initialize()
     initialize_user_db()
-    initialize_student_fees()
+
+def ensure_initialized():
+    """Initialize the files once per process and backend instead of on every rerun"""
+    global _initialized_backend
+    backend = get_backend()
+    if _initialized_backend is backend:
+        return
+    with _initialize_lock:
+        if _initialized_backend is not backend:
+            initialize_files()
+            _initialized_backend = backend
+
+def reset_caches():
+    """Forget every process-wide cache of ledger and fee data so the next read starts cold"""
+    global _initialized_backend, _fee_table
+    ledger_cache.invalidate()
+    snapshot.reset()
+    reset_backend()
+    with payment_index.lock, collection_cube.lock:
+        payment_index.version = None
+        collection_cube.version = None
+    _fee_table = (None, None)
+    _initialized_backend = None
 
 def initialize_user_db():
     """Initialize the user database if it doesn't exist"""
@@ -147,139 +196,269 @@ def initialize_user_db():
         with open("users.json", 'w') as f:
             json.dump({}, f)
 
-def initialize_student_fees():
-    """Initialize the student fees JSON file if it doesn't exist"""
-    if not os.path.exists("student_fees.json"):
-        with open("student_fees.json", 'w') as f:
-            json.dump({}, f)
-
-def initialize_csv():
-    """Initialize the CSV file with proper columns if it doesn't exist"""
-    if not os.path.exists("fees_data.csv"):
-        columns = [
-            "ID", "Student Name", "Class Category", "Class Section", "Month", 
-            "Monthly Fee", "Annual Charges", "Admission Fee", 
-            "Received Amount", "Payment Method", "Date", "Signature", 
-            "Entry Timestamp", "Academic Year"
-        ]
-        pd.DataFrame(columns=columns).to_csv("fees_data.csv", index=False)
-
 def generate_student_id(student_name, class_category):
     """Generate a unique 8-character ID based on student name and class"""
     unique_str = f"{student_name}_{class_category}".encode('utf-8')
     return md5(unique_str).hexdigest()[:8].upper()
 
+def _commit_batch(records):
+    """Durably append one batch of records and apply it to the payment index"""
+    backend = get_backend()
+    with _write_lock, payment_index.lock, collection_cube.lock:
+        version = backend.logical_version()
+        current = [index for index in _LEDGER_INDEXES if index.version == version]
+        backend.append_records(records, sync=True)
+        version = backend.logical_version()
+        for index in current:
+            index.apply(records)
+            index.version = version
+
+# All sessions hand their receipts to one writer thread that group-commits them
+_ledger_writer = LedgerWriter(_commit_batch)
+
+@timed
 def save_to_csv(data):
     """Save data to CSV with proper validation"""
+    invalidate_reads()
     try:
-        if os.path.exists("fees_data.csv"):
-            df = pd.read_csv("fees_data.csv")
-        else:
-            df = pd.DataFrame(columns=data[0].keys())
-        
-        new_df = pd.DataFrame(data)
-        df = pd.concat([df, new_df], ignore_index=True)
-        
-        df.to_csv("fees_data.csv", index=False)
+        _ledger_writer.submit(data)
         return True
     except Exception as e:
         st.error(f"Error saving data: {str(e)}")
         return False
 
-def load_data():
-    """Load data from CSV with robust error handling"""
-    if not os.path.exists("fees_data.csv"):
-        return pd.DataFrame()
-    
+@timed
+def compact_ledger():
+    """Compact the ledger storage of the active backend"""
+    invalidate_reads()
     try:
-        df = pd.read_csv("fees_data.csv")
-        
-        expected_columns = [
-            "ID", "Student Name", "Class Category", "Class Section", "Month", 
-            "Monthly Fee", "Annual Charges", "Admission Fee", 
-            "Received Amount", "Payment Method", "Date", "Signature", 
-            "Entry Timestamp", "Academic Year"
-        ]
-        
-        for col in expected_columns:
-            if col not in df.columns:
-                df[col] = np.nan
-        
-        try:
-            df['Date'] = pd.to_datetime(df['Date']).dt.strftime('%d-%m-%Y')
-        except:
-            pass
-        
-        try:
-            df['Entry Timestamp'] = pd.to_datetime(df['Entry Timestamp']).dt.strftime('%d-%m-%Y %H:%M')
-        except:
-            pass
-        
-        return df.dropna(how='all')
-    
+        get_backend().compact()
+        return True
+    except Exception as e:
+        st.error(f"Error compacting data: {str(e)}")
+        return False
+
+@timed
+@memoize_per_rerun
+def load_data(columns=None):
+    """Load data from CSV with robust error handling, optionally only the given columns"""
+    try:
+        return get_backend().load_ledger(columns)
     except Exception as e:
         st.error(f"Error loading data: {str(e)}")
         return pd.DataFrame()
 
+@timed
+@memoize_per_rerun
+def load_student_records(student_id, academic_year=None):
+    """Load the ledger rows of one student, optionally for one academic year"""
+    try:
+        return get_backend().student_records(student_id, academic_year)
+    except Exception as e:
+        st.error(f"Error loading data: {str(e)}")
+        return pd.DataFrame(columns=LEDGER_COLUMNS)
+
+@timed
+def query_records(filters=None, sort_by="Date", descending=True, offset=0, limit=50):
+    """Load one sorted page of the ledger records matching filters, and the number of matches"""
+    try:
+        return get_backend().query_records(filters, sort_by, descending, offset, limit)
+    except Exception as e:
+        st.error(f"Error loading data: {str(e)}")
+        return pd.DataFrame(columns=LEDGER_COLUMNS), 0
+
+@timed
+def iter_records(filters=None, sort_by="Date", descending=True):
+    """Yield the ledger records matching filters as DataFrame chunks; errors are left to the caller"""
+    return get_backend().iter_records(filters, sort_by, descending)
+
+@timed
+def get_payment_status(student_id, academic_year):
+    """Get the indexed payment status of a student for one academic year (None if no records)"""
+    try:
+        backend = get_backend()
+        with payment_index.lock:
+            version = backend.logical_version()
+            if payment_index.version != version:
+                payment_index.rebuild(backend.ledger_view(), version)
+            return payment_index.status(student_id, academic_year)
+    except Exception as e:
+        st.error(f"Error loading payment status: {str(e)}")
+        return None
+
+@timed
+def get_collection_cube():
+    """Get the collection totals cube, current with the stored ledger"""
+    backend = get_backend()
+    with collection_cube.lock:
+        version = backend.logical_version()
+        if collection_cube.version != version and not collection_cube.load(version):
+            collection_cube.rebuild(backend.ledger_view(), version)
+        return collection_cube
+
+@timed
+def data_version():
+    """Return a value that changes whenever the stored ledger or fee settings change"""
+    backend = get_backend()
+    return backend.logical_version(), backend.fees_version()
+
+@timed
+def get_ledger_memory_report():
+    """Get per-column memory use of the typed ledger"""
+    return memory_report(load_data())
+
+@timed
 def update_data(updated_df):
     """Update the CSV file with the modified DataFrame"""
+    invalidate_reads()
     try:
-        updated_df.to_csv("fees_data.csv", index=False)
+        backend = get_backend()
+        with _write_lock, payment_index.lock, collection_cube.lock:
+            backend.replace_ledger(updated_df)
+            payment_index.rebuild(updated_df, backend.logical_version())
+            collection_cube.rebuild(updated_df, backend.logical_version())
         return True
     except Exception as e:
         st.error(f"Error updating data: {str(e)}")
         return False
 
+@timed
+def update_record(record_key, values):
+    """Change some fields of one ledger record without rewriting the ledger"""
+    invalidate_reads()
+    try:
+        backend = get_backend()
+        with _write_lock, payment_index.lock, collection_cube.lock:
+            version = backend.logical_version()
+            current = [index for index in _LEDGER_INDEXES if index.version == version]
+            old = backend.update_record(record_key, values)
+            version = backend.logical_version()
+            for index in current:
+                index.apply([old], sign=-1)
+                index.apply([dict(old, **values)])
+                index.version = version
+        return True
+    except Exception as e:
+        st.error(f"Error updating data: {str(e)}")
+        return False
+
+@timed
+def delete_record(record_key):
+    """Delete one ledger record without rewriting the ledger"""
+    invalidate_reads()
+    try:
+        backend = get_backend()
+        with _write_lock, payment_index.lock, collection_cube.lock:
+            version = backend.logical_version()
+            current = [index for index in _LEDGER_INDEXES if index.version == version]
+            old = backend.delete_record(record_key)
+            version = backend.logical_version()
+            for index in current:
+                index.apply([old], sign=-1)
+                index.version = version
+        return True
+    except Exception as e:
+        st.error(f"Error deleting data: {str(e)}")
+        return False
+
+@timed
+@memoize_per_rerun
 def load_student_fees():
     """Load student-specific fees from JSON file"""
     try:
-        if os.path.exists("student_fees.json"):
-            with open("student_fees.json", 'r') as f:
-                return json.load(f)
-        return {}
+        return get_backend().load_fees()
     except Exception as e:
         st.error(f"Error loading student fees: {str(e)}")
         return {}
 
+@timed
 def save_student_fees(fees_data):
     """Save student-specific fees to JSON file"""
+    invalidate_reads()
+    try:
+        get_backend().save_fees(fees_data)
+        return True
+    except Exception as e:
+        st.error(f"Error saving student fees: {str(e)}")
+        return False
+
+def _fee_settings_view():
+    """Shared, read-only fee settings; parsed again only after the file changed"""
+    try:
+        return get_backend().fees_view()
+    except Exception as e:
+        st.error(f"Error loading student fees: {str(e)}")
+        return {}
+
+@timed
+def set_student_fee(student_id, details):
+    """Create or replace the fee settings of one student"""
+    invalidate_reads()
     try:
-        with open("student_fees.json", 'w') as f:
-            json.dump(fees_data, f, indent=4)
+        get_backend().upsert_fees(student_id, details)
         return True
     except Exception as e:
         st.error(f"Error saving student fees: {str(e)}")
         return False
 
+@timed
+def delete_student_fee(student_id):
+    """Remove the fee settings of one student"""
+    invalidate_reads()
+    try:
+        get_backend().delete_fees(student_id)
+        return True
+    except Exception as e:
+        st.error(f"Error deleting student fees: {str(e)}")
+        return False
+
+@timed
 def get_student_fee_amount(student_id, fee_type):
     """Get specific fee amount for a student - dynamic fees system"""
-    fees_data = load_student_fees()
-    
-    if student_id in fees_data:
-        fee_mapping = {
-            "monthly": "monthly_fee",
-            "annual": "annual_charges", 
-            "admission": "admission_fee"
-        }
-        
-        if fee_type in fee_mapping:
-            fee_key = fee_mapping[fee_type]
-            return fees_data[student_id].get(fee_key, 0)
+    fee_key = FEE_FIELDS.get(fee_type)
+    if fee_key is None:
+        return 0
+
+    details = _fee_settings_view().get(student_id)
+    if details is not None:
+        return details.get(fee_key, 0)
     
     # Default fees if not set by admin
-    default_fees = {
-        "monthly": 2000,
-        "annual": 2000,
-        "admission": 1000
-    }
-    return default_fees.get(fee_type, 0)
+    return DEFAULT_FEES[fee_key]
+
+@timed
+def get_student_fees(student_ids):
+    """Resolve the monthly, annual and admission fees of many students in one call
+
+    Returns a DataFrame indexed by student ID with one column per fee field
+    and a boolean 'custom' column; students without admin fee settings get
+    the default fees.
+    """
+    global _fee_table
+    try:
+        backend = get_backend()
+        version = backend.fees_version()
+        cached_version, table = _fee_table
+        if table is None or version is None or cached_version != version:
+            fees = backend.fees_view()
+            table = pd.DataFrame.from_dict(fees, orient="index").reindex(columns=list(DEFAULT_FEES))
+            table = table.apply(pd.to_numeric, errors="coerce").fillna(0)
+            _fee_table = (version, table)
+    except Exception as e:
+        st.error(f"Error loading student fees: {str(e)}")
+        table = pd.DataFrame(columns=list(DEFAULT_FEES), dtype=float)
+
+    resolved = table.reindex(pd.Index(student_ids, dtype=object))
+    resolved["custom"] = resolved.index.isin(table.index)
+    return resolved.fillna(DEFAULT_FEES)
 
+@timed
 def get_student_fee_details(student_id):
     """Get all fee details for a student"""
-    fees_data = load_student_fees()
+    fees_data = _fee_settings_view()
     
     if student_id in fees_data:
-        return fees_data[student_id]
+        return dict(fees_data[student_id])
     
     # Return default fees if not set
     return {
@@ -290,12 +469,13 @@ def get_student_fee_details(student_id):
         "class_category": "Not Set"
     }
 
+@timed
 def check_fee_setting_exists(student_name, class_category):
     """Check if fee setting already exists for a student"""
     student_id = generate_student_id(student_name, class_category)
-    fees_data = load_student_fees()
-    return student_id in fees_data
+    return student_id in _fee_settings_view()
 
+@timed
 def get_all_students_with_fees():
     """Get all students who have custom fee settings"""
     fees_data = load_student_fees()
@@ -0,0 +1,69 @@
+#type:ignore
+import threading
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Amounts are shown as whole rupees with thousand separators, formatted by the browser
+CURRENCY_FORMAT = "Rs. %,d"
+DATE_FORMAT = "DD-MM-YYYY"
+TIMESTAMP_FORMAT = "DD-MM-YYYY HH:mm"
+
+# Payment status as text, so no per-cell styling is needed to tell them apart
+STATUS_LABELS = {"Paid": "🟢 Paid", "Unpaid": "🔴 Unpaid"}
+
+# Display frames kept per key, each valid for one data version
+_cache = {}
+_cache_lock = threading.Lock()
+
+def column_config(df, currency=()):
+    """Streamlit column configuration for the currency and datetime columns of df"""
+    config = {
+        col: st.column_config.NumberColumn(col, format=CURRENCY_FORMAT)
+        for col in currency if col in df.columns
+    }
+    for col, fmt in (("Date", DATE_FORMAT), ("Entry Timestamp", TIMESTAMP_FORMAT)):
+        if col in df.columns and pd.api.types.is_datetime64_any_dtype(df[col]):
+            config[col] = st.column_config.DatetimeColumn(col, format=fmt)
+    return config
+
+def prepare(df, currency=(), status=None, mark_unbilled=False):
+    """Return a copy of df ready for show_table, built with whole-column operations
+
+    Currency columns become whole numbers (missing ones zero), the status
+    column gets its labels and, when mark_unbilled is set during the first
+    ten days of the month, the first column is prefixed with a red or green
+    dot for rows with and without a monthly fee.
+    """
+    df = df.copy()
+    for col in currency:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype("int64")
+    if status is not None and status in df.columns:
+        df[status] = df[status].astype(str).map(STATUS_LABELS).fillna(df[status].astype(str))
+    if mark_unbilled and 1 <= datetime.now().day <= 10 and "Monthly Fee" in df.columns:
+        first = df.columns[0]
+        unbilled = pd.to_numeric(df["Monthly Fee"], errors="coerce").fillna(0).eq(0).to_numpy()
+        df[first] = np.where(unbilled, "🔴 ", "🟢 ") + df[first].astype(str).to_numpy(dtype=object)
+    return df
+
+def show_table(df, currency=()):
+    """Show a prepared frame; formatting happens client side through column configuration"""
+    st.dataframe(df, column_config=column_config(df, currency), use_container_width=True)
+
+def cached(key, version, build):
+    """Return build() for key, reusing the last result while version is unchanged"""
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+    value = build()
+    with _cache_lock:
+        _cache[key] = (version, value)
+    return value
+
+def clear_cache():
+    """Forget every cached display frame"""
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,208 @@
+#type:ignore
+import os
+import tempfile
+import pandas as pd
+import streamlit as st
+from database import iter_records
+from schema import CLASS_CATEGORIES
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet exports are offered only when pyarrow is installed
+    pa = None
+    pq = None
+
+try:
+    import xlsxwriter
+except ImportError:  # Excel exports fall back to openpyxl's write-only mode, if present
+    xlsxwriter = None
+
+# Export formats: file extension and MIME type
+FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+def available_formats():
+    """Export formats whose writer libraries are installed"""
+    formats = ["CSV"]
+    if pq is not None:
+        formats.append("Parquet")
+    if xlsxwriter is not None or _openpyxl() is not None:
+        formats.append("Excel")
+    return formats
+
+def _openpyxl():
+    try:
+        import openpyxl
+        return openpyxl
+    except ImportError:
+        return None
+
+def _plain(chunk):
+    """Categories as plain values, so every chunk writes with the same column types"""
+    chunk = chunk.copy()
+    for col in chunk.select_dtypes("category").columns:
+        chunk[col] = chunk[col].astype(object)
+    return chunk
+
+def _arrow_schema(chunk):
+    """Parquet schema from the column dtypes instead of the values of one chunk
+
+    Text, category and object columns are always strings, so a column that
+    is empty in the first chunk isn't typed null for the whole file.
+    """
+    typed = [
+        col for col, dtype in chunk.dtypes.items()
+        if not (pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype)
+                or isinstance(dtype, pd.CategoricalDtype))
+    ]
+    inferred = pa.Schema.from_pandas(chunk[typed].head(0), preserve_index=False)
+    return pa.schema([
+        inferred.field(col) if col in typed else pa.field(col, pa.string())
+        for col in chunk.columns
+    ])
+
+def ledger_sheets(filters=None, sort_by="Date", descending=True, by_class=False):
+    """Sheets of a ledger export as (name, chunk factory) pairs; by_class gives one sheet per class"""
+    filters = dict(filters or {})
+    if not by_class:
+        return [("Records", lambda: iter_records(filters, sort_by, descending))]
+    classes = [filters["Class Category"]] if filters.get("Class Category") else CLASS_CATEGORIES
+    return [
+        (category, lambda category=category: iter_records({**filters, "Class Category": category}, sort_by, descending))
+        for category in classes
+    ]
+
+def write_csv(sheets, f):
+    """Write the chunks of every sheet to one CSV with a single header"""
+    header = True
+    for _, chunks in sheets:
+        for chunk in chunks():
+            _plain(chunk).to_csv(f, header=header, index=False)
+            header = False
+
+def write_parquet(sheets, path):
+    """Write the chunks of every sheet to one Parquet file, one row group per chunk"""
+    writer = None
+    try:
+        for _, chunks in sheets:
+            for chunk in chunks():
+                if writer is None:
+                    writer = pq.ParquetWriter(path, _arrow_schema(chunk))
+                writer.write_table(pa.Table.from_pandas(_plain(chunk), schema=writer.schema, preserve_index=False))
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        pq.write_table(pa.table({}), path)
+
+def _cell(value):
+    """Excel-ready value: missing values blank, timestamps as datetimes"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    return value.item() if hasattr(value, "item") else value
+
+def write_excel(sheets, path):
+    """Write one worksheet per sheet with a constant-memory writer; empty sheets are skipped"""
+    if xlsxwriter is not None:
+        workbook = xlsxwriter.Workbook(path, {"constant_memory": True, "default_date_format": "dd-mm-yyyy"})
+        add_sheet = workbook.add_worksheet
+        def write_row(sheet, row_number, values):
+            sheet.write_row(row_number, 0, values)
+    else:
+        workbook = _openpyxl().Workbook(write_only=True)
+        add_sheet = workbook.create_sheet
+        def write_row(sheet, row_number, values):
+            sheet.append(values)
+
+    written = 0
+    for name, chunks in sheets:
+        sheet = None
+        row_number = 0
+        for chunk in chunks():
+            if sheet is None:
+                sheet = add_sheet(name[:31])
+                write_row(sheet, 0, list(chunk.columns))
+            for row in chunk.itertuples(index=False):
+                row_number += 1
+                write_row(sheet, row_number, [_cell(value) for value in row])
+        written += sheet is not None
+    if not written:
+        write_row(add_sheet("Records"), 0, ["No records"])
+
+    if xlsxwriter is not None:
+        workbook.close()
+    else:
+        workbook.save(path)
+
+def build_export(fmt, sheets):
+    """Write an export to a temporary file and return its path"""
+    extension, _ = FORMATS[fmt]
+    fd, path = tempfile.mkstemp(suffix=f".{extension}", prefix="fee_export_")
+    try:
+        if fmt == "CSV":
+            with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+                write_csv(sheets, f)
+        else:
+            os.close(fd)
+            if fmt == "Parquet":
+                write_parquet(sheets, path)
+            else:
+                write_excel(sheets, path)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+def _discard(key):
+    """Forget a prepared export once it was downloaded or went stale"""
+    prepared = st.session_state.pop(key, None)
+    if prepared is not None and os.path.exists(prepared[-1]):
+        os.remove(prepared[-1])
+
+def export_controls(key, file_name, make_sheets, signature=None):
+    """Format picker with a prepare button; the file is only built when asked for
+
+    make_sheets(fmt) returns the sheets to export in that format. Until the
+    user prepares an export nothing is read or written, so the page renders
+    as fast without the download as with it. A prepared file is dropped
+    when the format or signature (e.g. the active filters) changes.
+    """
+    state_key = f"{key}_export"
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        fmt = st.selectbox("Export format", available_formats(), key=f"{key}_export_format")
+    with col2:
+        st.write("")
+        prepare_clicked = st.button("📦 Prepare Export", key=f"{key}_export_prepare")
+
+    if prepare_clicked:
+        _discard(state_key)
+        try:
+            with st.spinner("Preparing export..."):
+                st.session_state[state_key] = (fmt, signature, build_export(fmt, make_sheets(fmt)))
+        except Exception as e:
+            st.error(f"Error preparing export: {str(e)}")
+
+    prepared = st.session_state.get(state_key)
+    if prepared is None:
+        return
+    if prepared[:2] != (fmt, signature) or not os.path.exists(prepared[2]):
+        _discard(state_key)
+        return
+    extension, mime = FORMATS[fmt]
+    with open(prepared[2], 'rb') as f:
+        st.download_button(
+            label=f"📥 Download {fmt}",
+            data=f,
+            file_name=f"{file_name}.{extension}",
+            mime=mime,
+            key=f"{key}_export_download",
+            on_click=_discard,
+            args=(state_key,)
+        )
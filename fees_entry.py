@@ -3,10 +3,14 @@
 # type:ignore
 import streamlit as st
 from datetime import datetime
-from database import generate_student_id, save_to_csv, load_data, load_student_fees, get_student_fee_amount
+from database import generate_student_id, save_to_csv, load_student_records, load_student_fees, get_student_fee_amount
 from utils import format_currency, get_academic_year, check_annual_admission_paid, get_unpaid_months
+from display import prepare, show_table
+from schema import AMOUNT_COLUMNS
+from perf import traced_page
 
 
+@traced_page
 def fees_entry_page():
     """Fees entry page"""
    
@@ -85,6 +89,10 @@ def fees_entry_page():
                                    key=f"payment_date_{st.session_state.form_key}")
         academic_year = get_academic_year(payment_date)
         
+        # Unpaid months follow the academic year of the chosen payment date
+        if student_id:
+            st.session_state.available_months = get_unpaid_months(student_id, academic_year)
+        
         fee_type = st.radio("Select Fee Type*", 
                           ["Monthly Fee", "Annual Charges", "Admission Fee"],
                           horizontal=True,
@@ -239,7 +247,8 @@ def update_student_data(student_name, class_category):
     if student_name and class_category:
         student_id = generate_student_id(student_name, class_category)
         st.session_state.current_student_id = student_id
-        st.session_state.available_months = get_unpaid_months(student_id)
+        payment_date = st.session_state.get(f"payment_date_{st.session_state.form_key}", datetime.now())
+        st.session_state.available_months = get_unpaid_months(student_id, get_academic_year(payment_date))
         
         # Reset fee calculation when student changes
         st.session_state.current_total_amount = 0
@@ -254,8 +263,7 @@ def display_student_records(student_id):
     """Display student payment history"""
     st.subheader("📋 Student Payment History")
     
-    df = load_data()
-    student_records = df[df['ID'] == student_id]
+    student_records = load_student_records(student_id)
     
     if not student_records.empty:
         # Display all records for the student
@@ -264,15 +272,7 @@ def display_student_records(student_id):
             "Admission Fee", "Received Amount", "Payment Method", "Date", "Academic Year"
         ]].sort_values("Date", ascending=False)
         
-        st.dataframe(
-            display_df.style.format({
-                "Monthly Fee": format_currency,
-                "Annual Charges": format_currency,
-                "Admission Fee": format_currency,
-                "Received Amount": format_currency
-            }),
-            use_container_width=True
-        )
+        show_table(prepare(display_df, AMOUNT_COLUMNS), AMOUNT_COLUMNS)
         
         # Calculate totals
         total_monthly = student_records["Monthly Fee"].sum()
@@ -563,7 +563,7 @@ def handle_form_submission(
             st.session_state.last_class_category = class_category
             st.session_state.last_class_section = class_section or ""
             st.session_state.form_key += 1
-            st.session_state.available_months = get_unpaid_months(student_id)
+            st.session_state.available_months = get_unpaid_months(student_id, academic_year)
             st.session_state.last_saved_records = fee_records
             st.session_state.current_total_amount = 0
             st.session_state.previous_fee_type = "Monthly Fee"
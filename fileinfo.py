@@ -0,0 +1,7 @@
+#type:ignore
+import os
+
+def file_signature(path):
+    """Return the (device, inode, mtime, size) version of a file"""
+    st = os.stat(path)
+    return (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
@@ -1,7 +1,10 @@
 # type:ignore
 import streamlit as st
-import base64
+from styles import stylesheet
+from assets import logo_url
+from perf import traced_page
 
+@traced_page
 def home_page():
     """Display beautiful home page with logo and school name"""
     st.set_page_config(page_title="School Fees Management", layout="wide", page_icon="🏫")
@@ -10,95 +13,14 @@ def home_page():
     if 'show_login' not in st.session_state:
         st.session_state.show_login = False
     
-    st.markdown("""
-    <style>
-    .main {
-        background-color: #f8f9fa;
-    }
-    .stApp {
-        background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%);
-    }
-    .title-text {
-        font-size: 3.5rem !important;
-        font-weight: 600 !important;
-        color: #2c3e50 !important;
-        text-align: center;
-        margin-bottom: 0.5rem !important;
-    }
-    .subtitle-text {
-        font-size: 1.5rem !important;
-        font-weight: 400 !important;
-        color: #7f8c8d !important;
-        text-align: center;
-        margin-bottom: 2rem !important;
-    }
-    .feature-card {
-        background-color: white;
-        border-radius: 10px;
-        padding: 1.5rem;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-        transition: transform 0.3s ease;
-        height: 100%;
-    }
-    .feature-card:hover {
-        transform: translateY(-5px);
-        box-shadow: 0 10px 20px rgba(0, 0, 0, 0.1);
-    }
-    .feature-icon {
-        font-size: 2.5rem;
-        margin-bottom: 1rem;
-        color: #3498db;
-    }
-    .feature-title {
-        font-size: 1.2rem;
-        font-weight: 600;
-        margin-bottom: 0.5rem;
-        color: #2c3e50;
-    }
-    .feature-desc {
-        color: #7f8c8d;
-        font-size: 0.9rem;
-    }
-    .login-btn {
-        background: linear-gradient(135deg, #3498db 0%, #2c3e50 100%) !important;
-        color: white !important;
-        border: none !important;
-        padding: 0.5rem 1.5rem;
-        border-radius: 8px !important;
-        font-weight: 600 !important;
-        margin-top: 2rem !important;
-    }
-    .circle-container {
-        display: flex;
-        justify-content: center;
-        margin-bottom: 1rem;
-    }
-    .circle {
-        width: 200px;
-        height: 200px;
-        border-radius: 50%;
-        background-color: white;
-        box-shadow: 0 5px 15px rgba(0, 0, 0, 0.1);
-        display: flex;
-        justify-content: center;
-        align-items: center;
-        overflow: hidden;
-    }
-    .circle img {
-        width: 100%;
-        height: 100%;
-        object-fit: cover;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    st.markdown(stylesheet("home"), unsafe_allow_html=True)
     
     # Logo at the very top
     st.markdown('<div class="circle-container">', unsafe_allow_html=True)
     
     try:
-        with open("school-pic.png", "rb") as img_file:
-            img_base64 = base64.b64encode(img_file.read()).decode('utf-8')
-        img_html = f'<img src="data:image/png;base64,{img_base64}" alt="School Logo">'
+        # A small content-hashed variant, served as a static file, instead of the full PNG inline
+        img_html = f'<img src="{logo_url()}" alt="School Logo">'
     except:
         img_html = '<div style="color: gray; text-align: center; padding: 20px;">School Logo</div>'
     
@@ -0,0 +1,124 @@
+#type:ignore
+import io
+import threading
+import pandas as pd
+from fileinfo import file_signature
+from perf import count_bytes_read
+from schema import CSV_READ_OPTIONS
+
+# Bytes kept from the end of the parsed range to detect in-place rewrites
+PROBE_BYTES = 64
+
+class CacheEntry:
+    """Parsed CSV plus the file version and byte range it was built from"""
+
+    def __init__(self, df, columns, signature, offset, raw_rows, probe):
+        self.df = df
+        self.columns = columns
+        self.signature = signature
+        self.offset = offset
+        self.raw_rows = raw_rows
+        self.probe = probe
+
+_entries = {}
+_locks = {}
+_locks_guard = threading.Lock()
+stats = {"hits": 0, "tail_reads": 0, "full_reads": 0, "seeded": 0}
+
+def _lock_for(path):
+    with _locks_guard:
+        return _locks.setdefault(path, threading.Lock())
+
+def _complete_lines(data):
+    """Trim a byte string to its last newline so half-written rows are left for later"""
+    end = data.rfind(b"\n")
+    return data[:end + 1] if end >= 0 else b""
+
+def _parse(data, transform, columns=None, first_row=0):
+    """Parse ledger CSV bytes (with a header unless columns are given) and apply transform
+
+    Text columns are read as strings in every chunk, so an appended tail
+    can't guess a different type for them than the rows before it.
+    """
+    if columns is None:
+        df = pd.read_csv(io.BytesIO(data), **CSV_READ_OPTIONS)
+    elif data.strip():
+        df = pd.read_csv(io.BytesIO(data), header=None, names=columns, **CSV_READ_OPTIONS)
+    else:
+        df = pd.DataFrame(columns=columns)
+    columns = list(df.columns)
+    raw_rows = len(df)
+    df.index = pd.RangeIndex(first_row, first_row + raw_rows)
+    return transform(df), columns, raw_rows
+
+def _full_read(path, transform):
+    with open(path, 'rb') as f:
+        data = f.read()
+    count_bytes_read(len(data))
+    df, columns, raw_rows = _parse(data, transform)
+    stats["full_reads"] += 1
+    return CacheEntry(df, columns, None, len(data), raw_rows, data[-PROBE_BYTES:])
+
+def read_tail(path, entry, transform, concat=pd.concat):
+    """Parse only the bytes appended since the entry was built, or None if not possible"""
+    with open(path, 'rb') as f:
+        probe_start = entry.offset - len(entry.probe)
+        f.seek(probe_start)
+        if f.read(len(entry.probe)) != entry.probe:
+            return None
+        data = _complete_lines(f.read())
+    count_bytes_read(len(entry.probe) + len(data))
+    if not data:
+        return entry
+
+    tail, _, raw_rows = _parse(data, transform, entry.columns, entry.raw_rows)
+    stats["tail_reads"] += 1
+    df = concat([entry.df, tail]) if len(entry.df) else tail
+    probe = (entry.probe + data)[-PROBE_BYTES:]
+    return CacheEntry(df, entry.columns, None, entry.offset + len(data),
+                       entry.raw_rows + raw_rows, probe)
+
+def read_csv_cached(path, transform=lambda df: df, copy=True, concat=pd.concat, seed=None):
+    """Return the parsed CSV at path, reusing the process-wide cache when the file is unchanged
+
+    When the file only grew since the last read, just the appended rows are
+    parsed and concatenated. A new inode, a shrink or a changed prefix
+    triggers a full parse. A copy is returned so callers may mutate it;
+    pass copy=False for read-only access to the shared frame. concat joins
+    the cached and newly parsed frames. seed may return a CacheEntry (e.g.
+    from a snapshot) to start from when nothing is cached yet.
+    """
+    with _lock_for(path):
+        signature = file_signature(path)
+        entry = _entries.get(path)
+        if entry is None and seed is not None:
+            entry = seed()
+            if entry is not None:
+                stats["seeded"] += 1
+
+        if entry is not None and entry.signature == signature:
+            stats["hits"] += 1
+            return entry.df.copy() if copy else entry.df
+
+        updated = None
+        if (entry is not None and entry.signature[:2] == signature[:2]
+                and signature[3] >= entry.offset and entry.probe):
+            updated = read_tail(path, entry, transform, concat)
+        if updated is None:
+            updated = _full_read(path, transform)
+
+        updated.signature = signature
+        _entries[path] = updated
+        return updated.df.copy() if copy else updated.df
+
+def get_entry(path):
+    """Return the current cache entry of a file without touching the file"""
+    return _entries.get(path)
+
+def invalidate(path=None):
+    """Drop the cached parse of one file, or of every file"""
+    with _locks_guard:
+        if path is None:
+            _entries.clear()
+        else:
+            _entries.pop(path, None)
@@ -0,0 +1,87 @@
+#type:ignore
+import queue
+import threading
+from concurrent.futures import Future
+
+# Most receipts committed in one batch, and how long the writer lingers for more
+MAX_BATCH_REQUESTS = 256
+BATCH_WAIT_SECONDS = 0.005
+
+# How long a caller waits for its batch to be acknowledged
+SUBMIT_TIMEOUT_SECONDS = 30
+
+stats = {"batches": 0, "requests": 0, "rows": 0, "largest_batch": 0}
+
+class LedgerWriter:
+    """Single background thread that group-commits ledger records from all sessions
+
+    Each submit() enqueues one save and blocks until the batch containing it
+    was committed (one commit_batch call, one fsync) or failed. A save that
+    times out while still queued is withdrawn, so it is never written behind
+    the caller's back.
+    """
+
+    def __init__(self, commit_batch):
+        self.commit_batch = commit_batch
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="ledger-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, records, timeout=SUBMIT_TIMEOUT_SECONDS):
+        """Queue records for the next batch and wait until they are durably written"""
+        future = Future()
+        self._ensure_started()
+        self._queue.put((list(records), future))
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            if future.cancel():
+                # Withdrawn before its batch started, so retrying cannot save it twice
+                raise
+            # Its batch is already being written; wait for the outcome instead of guessing it
+            return future.result()
+
+    def _next_batch(self):
+        """Block for one request, then gather whatever else arrives within the batch window"""
+        batch = [self._queue.get()]
+        while len(batch) < MAX_BATCH_REQUESTS:
+            try:
+                batch.append(self._queue.get(timeout=BATCH_WAIT_SECONDS))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            # Requests withdrawn by a timed-out caller are dropped here
+            batch = [(request, future) for request, future in self._next_batch() if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            records = [record for request, _ in batch for record in request]
+            try:
+                self.commit_batch(records)
+            except Exception as e:
+                if len(batch) == 1:
+                    batch[0][1].set_exception(e)
+                    continue
+                # Commit requests one by one so a bad receipt only fails its own caller
+                for request, future in batch:
+                    try:
+                        self.commit_batch(request)
+                        future.set_result(True)
+                    except Exception as e:
+                        future.set_exception(e)
+                continue
+
+            for _, future in batch:
+                future.set_result(True)
+            stats["batches"] += 1
+            stats["requests"] += len(batch)
+            stats["rows"] += len(records)
+            stats["largest_batch"] = max(stats["largest_batch"], len(batch))
@@ -3,17 +3,22 @@
 ##uv run streamlit run main.py
 #type:ignore
 import streamlit as st
-from auth import check_authentication, logout, login_page
+from auth import check_authentication, logout, login_page, signup_outbox
 from home import home_page
-from fees_entry import fees_entry_page
-from reports import reports_page
-from admin import admin_page
-from utils import hide_streamlit_elements, navbar_component, navbar_collapsible_component
-from database import initialize_files
+from styles import hide_streamlit_elements
+from rerun_cache import rerun_scope
+from perf import trace
 
 def main():
-    # Initialize files and hide elements
-    initialize_files()
+    # Identical data reads are loaded once for the rest of this script run,
+    # and the whole run is timed under the page it renders
+    with rerun_scope(), trace():
+        run_app()
+
+def run_app():
+    # Deliver notifications still queued from before a restart
+    signup_outbox.start()
+    # Hide elements with a stylesheet built once per process
     hide_streamlit_elements()
     
     # Initialize session state if it doesn't exist
@@ -35,12 +40,23 @@ def main():
     
     # If authenticated, show main app with navbar
     st.set_page_config(page_title="School Fees Management", layout="wide")
+
+    # The data pages need pandas; they are imported only past the login so the
+    # home and login pages start without it
+    from database import ensure_initialized
+    from utils import navbar_component, navbar_collapsible_component
+    from fees_entry import fees_entry_page
+    from reports import reports_page
+    from admin import admin_page
+
+    # Create missing data files once per process, not on every interaction
+    ensure_initialized()
     
     # Define navigation options based on user role
     if st.session_state.is_admin:
         menu_options = [
             "Enter Fees", "View All Records", "Paid & Unpaid Students Record", 
-            "Student Yearly Report", "User Management", "Set Student Fees"
+            "Student Yearly Report", "User Management", "Set Student Fees", "Performance"
         ]
     else:
         menu_options = ["Enter Fees"]
@@ -54,7 +70,7 @@ def main():
         fees_entry_page()
     elif selected_menu in ["View All Records", "Paid & Unpaid Students Record", "Student Yearly Report"]:
         reports_page(selected_menu)
-    elif selected_menu in ["User Management", "Set Student Fees"]:
+    elif selected_menu in ["User Management", "Set Student Fees", "Performance"]:
         admin_page(selected_menu)
 
 if __name__ == "__main__":
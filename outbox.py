@@ -0,0 +1,189 @@
+#type:ignore
+import logging
+import smtplib
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+OUTBOX_DB = "outbox.db"
+
+# Messages sent over one SMTP connection before the worker looks for new ones
+BATCH_SIZE = 50
+
+# Retries back off exponentially from the base delay; after MAX_ATTEMPTS a message is given up
+MAX_ATTEMPTS = 8
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+
+# How long a claimed message stays hidden from other workers while it is being sent
+CLAIM_SECONDS = 120
+
+# Longest the worker sleeps when nothing is due
+IDLE_SECONDS = 300
+
+logger = logging.getLogger(__name__)
+
+stats = {"sent": 0, "failed_attempts": 0, "given_up": 0, "connections": 0}
+
+def _connection_lost(error):
+    """Tell a dropped connection apart from a server rejecting one message"""
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    # SMTPException subclasses OSError, so only plain socket errors count here
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+class Outbox:
+    """Persistent email queue in SQLite, delivered by a background worker thread
+
+    enqueue() only stores the message and wakes the worker, so callers never
+    wait on the mail server. The worker sends every due message over one
+    connection per batch and reschedules failures with exponential backoff.
+    connect must return a ready smtplib.SMTP-like object.
+    """
+
+    def __init__(self, connect, path=OUTBOX_DB):
+        self.connect = connect
+        self.path = path
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._initialized = False
+
+    def _db(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS messages (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        sender TEXT NOT NULL,
+                        recipient TEXT NOT NULL,
+                        body TEXT NOT NULL,
+                        status TEXT NOT NULL DEFAULT 'pending',
+                        attempts INTEGER NOT NULL DEFAULT 0,
+                        next_attempt_at REAL NOT NULL,
+                        created_at REAL NOT NULL,
+                        sent_at REAL,
+                        last_error TEXT
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_due ON messages (status, next_attempt_at)")
+            self._initialized = True
+        return conn
+
+    def start(self):
+        """Start the worker thread unless it is already running"""
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="outbox", daemon=True)
+                self._thread.start()
+
+    def enqueue(self, sender, recipient, body):
+        """Store a message for delivery and wake the worker; returns the message ID"""
+        now = time.time()
+        with closing(self._db()) as conn, conn:
+            message_id = conn.execute(
+                "INSERT INTO messages (sender, recipient, body, next_attempt_at, created_at) VALUES (?, ?, ?, ?, ?)",
+                (sender, recipient, body, now, now)
+            ).lastrowid
+        self.start()
+        self._wakeup.set()
+        return message_id
+
+    def pending_count(self):
+        with closing(self._db()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM messages WHERE status = 'pending'").fetchone()[0]
+
+    def _claim_due(self):
+        """Take up to BATCH_SIZE due messages, hiding them from other workers for CLAIM_SECONDS"""
+        now = time.time()
+        with closing(self._db()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute(
+                    "SELECT id, sender, recipient, body, attempts FROM messages "
+                    "WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY next_attempt_at LIMIT ?",
+                    (now, BATCH_SIZE)
+                ).fetchall()
+                conn.executemany("UPDATE messages SET next_attempt_at = ? WHERE id = ?",
+                                 [(now + CLAIM_SECONDS, row[0]) for row in rows])
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return rows
+
+    def _seconds_until_due(self):
+        with closing(self._db()) as conn:
+            row = conn.execute("SELECT MIN(next_attempt_at) FROM messages WHERE status = 'pending'").fetchone()
+        if row[0] is None:
+            return IDLE_SECONDS
+        return min(max(row[0] - time.time(), 0), IDLE_SECONDS)
+
+    def _record_failure(self, conn, message_id, attempts, error):
+        attempts += 1
+        if attempts >= MAX_ATTEMPTS:
+            conn.execute("UPDATE messages SET status = 'failed', attempts = ?, last_error = ? WHERE id = ?",
+                         (attempts, str(error), message_id))
+            stats["given_up"] += 1
+        else:
+            delay = min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+            conn.execute("UPDATE messages SET attempts = ?, last_error = ?, next_attempt_at = ? WHERE id = ?",
+                         (attempts, str(error), time.time() + delay, message_id))
+        stats["failed_attempts"] += 1
+
+    def deliver_due(self):
+        """Send one batch of due messages over a single connection; returns how many were sent"""
+        rows = self._claim_due()
+        if not rows:
+            return 0
+
+        sent = 0
+        with closing(self._db()) as conn:
+            try:
+                server = self.connect()
+                stats["connections"] += 1
+            except Exception as e:
+                with conn:
+                    for message_id, _, _, _, attempts in rows:
+                        self._record_failure(conn, message_id, attempts, e)
+                logger.warning("Failed to connect to the mail server: %s", e)
+                return 0
+
+            try:
+                for message_id, sender, recipient, body, attempts in rows:
+                    try:
+                        server.sendmail(sender, recipient, body)
+                    except Exception as e:
+                        with conn:
+                            self._record_failure(conn, message_id, attempts, e)
+                        logger.warning("Failed to send queued email %s: %s", message_id, e)
+                        if _connection_lost(e):
+                            # The connection is gone; the rest of the batch is retried once its claim expires
+                            break
+                        continue
+                    with conn:
+                        conn.execute("UPDATE messages SET status = 'sent', sent_at = ?, last_error = NULL WHERE id = ?",
+                                     (time.time(), message_id))
+                    sent += 1
+                    stats["sent"] += 1
+            finally:
+                try:
+                    server.quit()
+                except Exception:
+                    pass
+        return sent
+
+    def _run(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                if self.deliver_due() == BATCH_SIZE:
+                    continue
+                delay = self._seconds_until_due()
+            except Exception:
+                logger.exception("Outbox worker error")
+                delay = RETRY_BASE_SECONDS
+            self._wakeup.wait(delay)
@@ -0,0 +1,112 @@
+#type:ignore
+import threading
+import pandas as pd
+from schema import MONTHS
+
+MONTH_BITS = {month: 1 << i for i, month in enumerate(MONTHS)}
+
+def _amount(value):
+    """Treat missing or unparsable amounts as zero"""
+    try:
+        return 0.0 if pd.isna(value) else float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+class StudentStatus:
+    """Payment totals of one student for one academic year"""
+    __slots__ = ("month_amounts", "annual_total", "admission_total", "received_total", "records")
+
+    def __init__(self):
+        self.month_amounts = [0.0] * len(MONTHS)
+        self.annual_total = 0.0
+        self.admission_total = 0.0
+        self.received_total = 0.0
+        self.records = 0
+
+    @property
+    def paid_mask(self):
+        """12-bit mask of paid months, bit 0 is APRIL"""
+        mask = 0
+        for i, amount in enumerate(self.month_amounts):
+            if amount > 0:
+                mask |= 1 << i
+        return mask
+
+    @property
+    def annual_paid(self):
+        return self.annual_total > 0
+
+    @property
+    def admission_paid(self):
+        return self.admission_total > 0
+
+    def unpaid_months(self):
+        mask = self.paid_mask
+        return [month for month in MONTHS if not mask & MONTH_BITS[month]]
+
+    def add(self, month, monthly_fee, annual, admission, received, sign=1, count=1):
+        if month in MONTH_BITS:
+            i = MONTHS.index(month)
+            self.month_amounts[i] += sign * monthly_fee
+        self.annual_total += sign * annual
+        self.admission_total += sign * admission
+        self.received_total += sign * received
+        self.records += sign * count
+
+class PaymentStatusIndex:
+    """In-memory index of payment status keyed by (student ID, academic year)
+
+    The index remembers the ledger version it reflects; writers apply their
+    rows with apply() and stamp the new version, anything else forces a
+    rebuild from the ledger.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self.version = None
+        self.lock = threading.RLock()
+
+    def rebuild(self, df, version):
+        """Recompute every entry from a full ledger DataFrame"""
+        with self.lock:
+            self._entries = {}
+            if not df.empty:
+                frame = df[["ID", "Academic Year", "Month", "Monthly Fee",
+                            "Annual Charges", "Admission Fee", "Received Amount"]].copy()
+                for col in ["Monthly Fee", "Annual Charges", "Admission Fee", "Received Amount"]:
+                    frame[col] = pd.to_numeric(frame[col], errors="coerce").fillna(0)
+                frame["Records"] = 1
+                grouped = frame.groupby(["ID", "Academic Year", "Month"], observed=True, dropna=False).sum()
+                for (student_id, academic_year, month), monthly, annual, admission, received, count in zip(
+                    grouped.index, grouped["Monthly Fee"], grouped["Annual Charges"],
+                    grouped["Admission Fee"], grouped["Received Amount"], grouped["Records"]
+                ):
+                    self._entry(student_id, academic_year).add(
+                        month, monthly, annual, admission, received, count=int(count)
+                    )
+            self.version = version
+
+    def _entry(self, student_id, academic_year):
+        key = (str(student_id), str(academic_year))
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = StudentStatus()
+        return entry
+
+    def apply(self, records, sign=1):
+        """Add (sign=1) or remove (sign=-1) ledger records from the index"""
+        with self.lock:
+            for record in records:
+                entry = self._entry(record.get("ID"), record.get("Academic Year"))
+                entry.add(record.get("Month"), _amount(record.get("Monthly Fee")),
+                          _amount(record.get("Annual Charges")), _amount(record.get("Admission Fee")),
+                          _amount(record.get("Received Amount")), sign)
+                if entry.records <= 0:
+                    self._entries.pop((str(record.get("ID")), str(record.get("Academic Year"))), None)
+
+    def status(self, student_id, academic_year):
+        """Return the StudentStatus of a student for a year, or None without records"""
+        with self.lock:
+            return self._entries.get((str(student_id), str(academic_year)))
+
+payment_index = PaymentStatusIndex()
@@ -0,0 +1,219 @@
+#type:ignore
+import contextvars
+import functools
+import json
+import logging
+import os
+import statistics
+import threading
+from bisect import bisect_left
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+# Environment variable naming the JSON-lines log of page runs; empty turns the log off
+PERF_LOG_ENV_VAR = "FEES_PERF_LOG"
+PERF_LOG = "perf_log.jsonl"
+
+# The log is moved to <name>.1 once it grows past this size
+PERF_LOG_MAX_BYTES = 5 * 2**20
+
+# Recent runs kept per page for the latency percentiles
+SAMPLES_PER_PAGE = 1000
+
+# Upper bounds in milliseconds of the latency histogram buckets; the last one is open
+HISTOGRAM_BOUNDS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+logger = logging.getLogger(__name__)
+
+_trace = contextvars.ContextVar("perf_trace", default=None)
+_lock = threading.Lock()
+_log_lock = threading.Lock()
+
+class Trace:
+    """Spans and bytes read during one script run"""
+
+    def __init__(self, page=None):
+        self.page = page
+        self.start = time.perf_counter()
+        self.spans = {}
+        self.bytes_read = 0
+
+    def add(self, name, seconds, bytes_read):
+        span = self.spans.setdefault(name, [0, 0.0, 0])
+        span[0] += 1
+        span[1] += seconds
+        span[2] += bytes_read
+
+class PageStats:
+    """Run counts, latency samples and per-span totals of one page"""
+
+    def __init__(self):
+        self.runs = 0
+        self.bytes_read = 0
+        self.samples = deque(maxlen=SAMPLES_PER_PAGE)
+        self.histogram = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+        self.spans = {}
+
+    def record(self, milliseconds, trace):
+        self.runs += 1
+        self.bytes_read += trace.bytes_read
+        self.samples.append(milliseconds)
+        self.histogram[bisect_left(HISTOGRAM_BOUNDS_MS, milliseconds)] += 1
+        for name, (calls, seconds, bytes_read) in trace.spans.items():
+            span = self.spans.setdefault(name, [0, 0.0, 0])
+            span[0] += calls
+            span[1] += seconds
+            span[2] += bytes_read
+
+# Process-wide statistics by page
+pages = {}
+
+def current_trace():
+    """Return the active Trace, or None outside a traced run"""
+    return _trace.get()
+
+@contextmanager
+def trace(page=None):
+    """Collect spans until the block exits, then record the run under its page
+
+    Nested calls join the active trace, naming its page if it has none yet,
+    so main can trace a whole rerun and the page it routes to labels it.
+    """
+    current = _trace.get()
+    if current is not None:
+        if current.page is None:
+            current.page = page
+        yield current
+        return
+
+    current = Trace(page)
+    token = _trace.set(current)
+    try:
+        yield current
+    finally:
+        _trace.reset(token)
+        _finish(current)
+
+@contextmanager
+def span(name):
+    """Time a block as one call of name in the active trace; free outside a trace"""
+    current = _trace.get()
+    if current is None:
+        yield
+        return
+    bytes_before = current.bytes_read
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        current.add(name, time.perf_counter() - start, current.bytes_read - bytes_before)
+
+def timed(func):
+    """Record every call of func as a span named after it"""
+    name = f"{func.__module__}.{func.__name__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _trace.get() is None:
+            return func(*args, **kwargs)
+        with span(name):
+            return func(*args, **kwargs)
+    return wrapper
+
+def traced_page(func):
+    """Trace a page entry point; a string first argument (the menu) joins the page name"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        label = func.__name__
+        if args and isinstance(args[0], str):
+            label = f"{label}: {args[0]}"
+        with trace(label), span(f"{func.__module__}.{func.__name__}"):
+            return func(*args, **kwargs)
+    return wrapper
+
+def count_bytes_read(count):
+    """Add bytes read from disk to the active trace"""
+    current = _trace.get()
+    if current is not None:
+        current.bytes_read += count
+
+def _finish(current):
+    milliseconds = (time.perf_counter() - current.start) * 1000
+    page_name = current.page or "other"
+    with _lock:
+        pages.setdefault(page_name, PageStats()).record(milliseconds, current)
+    _log({
+        "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "page": page_name,
+        "ms": round(milliseconds, 2),
+        "bytes_read": current.bytes_read,
+        "spans": {
+            name: {"calls": calls, "ms": round(seconds * 1000, 2), "bytes_read": bytes_read}
+            for name, (calls, seconds, bytes_read) in current.spans.items()
+        },
+    })
+
+def log_path():
+    """Path of the JSON-lines log, or None when it is turned off"""
+    return os.environ.get(PERF_LOG_ENV_VAR, PERF_LOG).strip() or None
+
+def _log(entry):
+    path = log_path()
+    if path is None:
+        return
+    try:
+        with _log_lock:
+            if os.path.exists(path) and os.path.getsize(path) > PERF_LOG_MAX_BYTES:
+                os.replace(path, f"{path}.1")
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + "\n")
+    except OSError:
+        logger.exception("Failed to write the performance log %s", path)
+
+def _percentiles(samples):
+    """p50, p95 and p99 of the samples, interpolated like numpy.percentile"""
+    if len(samples) < 2:
+        return [samples[0]] * 3 if samples else [0.0] * 3
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return cuts[49], cuts[94], cuts[98]
+
+def page_summary():
+    """One row per page: runs, latency percentiles in milliseconds and bytes read"""
+    with _lock:
+        rows = []
+        for name, stats in pages.items():
+            p50, p95, p99 = _percentiles(stats.samples)
+            rows.append({
+                "Page": name, "Runs": stats.runs,
+                "p50 ms": round(p50, 1), "p95 ms": round(p95, 1), "p99 ms": round(p99, 1),
+                "Bytes Read": stats.bytes_read,
+            })
+    return rows
+
+def span_summary(page_name):
+    """One row per span of a page: calls, total and mean milliseconds and bytes read"""
+    with _lock:
+        stats = pages.get(page_name)
+        spans = {name: tuple(span) for name, span in stats.spans.items()} if stats is not None else {}
+    return [
+        {
+            "Function": name, "Calls": calls, "Total ms": round(seconds * 1000, 1),
+            "Mean ms": round(seconds * 1000 / calls, 2), "Bytes Read": bytes_read,
+        }
+        for name, (calls, seconds, bytes_read) in sorted(spans.items(), key=lambda item: -item[1][1])
+    ]
+
+def histogram(page_name):
+    """Run counts of a page per latency bucket, as (label, count) pairs"""
+    with _lock:
+        stats = pages.get(page_name)
+        counts = list(stats.histogram) if stats is not None else [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+    labels = [f"≤{bound} ms" for bound in HISTOGRAM_BOUNDS_MS] + [f">{HISTOGRAM_BOUNDS_MS[-1]} ms"]
+    return list(zip(labels, counts))
+
+def reset():
+    """Forget the statistics of every page"""
+    with _lock:
+        pages.clear()
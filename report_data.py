@@ -0,0 +1,104 @@
+#type:ignore
+import numpy as np
+import pandas as pd
+from schema import MONTHS, CATEGORY_COLUMNS
+
+def expected_monthly_fees(ledger, student_fees):
+    """Monthly fee each student is expected to pay, as a Series indexed by student ID
+
+    Admin fee settings win, then the student's last paid monthly fee in the
+    ledger, then the default fee. student_fees is the frame returned by
+    database.get_student_fees.
+    """
+    last_paid = ledger[ledger["Monthly Fee"] > 0].groupby("ID")["Monthly Fee"].last()
+    fallback = last_paid.reindex(student_fees.index).fillna(student_fees["monthly_fee"])
+    return student_fees["monthly_fee"].where(student_fees["custom"], fallback)
+
+def paid_unpaid_grid(ledger, monthly_fees):
+    """One row per student and month with what was paid and what is still due
+
+    ledger should hold one academic year; monthly_fees maps student ID to the
+    expected monthly fee. Built with one groupby and one reindex over the
+    student x month product instead of per-student lookups.
+    """
+    students = ledger.drop_duplicates("ID", keep="last").set_index("ID")[["Student Name", "Class Category"]]
+
+    monthly = ledger[ledger["Month"].isin(MONTHS)]
+    paid = (monthly.assign(Month=monthly["Month"].astype(str))
+            .groupby(["ID", "Month"])[["Monthly Fee", "Received Amount"]].sum())
+    grid_index = pd.MultiIndex.from_product([students.index, MONTHS], names=["ID", "Month"])
+    grid = paid.reindex(grid_index).reset_index().join(students, on="ID")
+
+    grid["Estimated Monthly Fee"] = grid["ID"].map(monthly_fees)
+    is_paid = grid["Monthly Fee"] > 0
+    grid["Status"] = np.where(is_paid, "Paid", "Unpaid")
+    grid["Outstanding"] = grid["Estimated Monthly Fee"].where(~is_paid, 0)
+    return grid[[
+        "ID", "Student Name", "Class Category", "Month", "Monthly Fee", "Received Amount",
+        "Estimated Monthly Fee", "Status", "Outstanding"
+    ]]
+
+def student_payment_summary(grid):
+    """Unpaid months and total outstanding per student from a paid_unpaid_grid"""
+    return (grid.assign(**{"Unpaid Months": grid["Status"].eq("Unpaid")})
+            .groupby(["ID", "Student Name", "Class Category"], observed=True)
+            .agg(**{"Unpaid Months": ("Unpaid Months", "sum"), "Total Outstanding": ("Outstanding", "sum")})
+            .reset_index())
+
+def year_grid(ledger, academic_year, get_fees):
+    """paid_unpaid_grid of one academic year; get_fees resolves student IDs as database.get_student_fees does"""
+    year = ledger[ledger["Academic Year"] == academic_year]
+    return paid_unpaid_grid(year, expected_monthly_fees(ledger, get_fees(year["ID"].unique())))
+
+def month_status(grid, month):
+    """Student counts and outstanding total of one month of a paid_unpaid_grid"""
+    month_rows = grid[grid["Month"] == month]
+    unpaid = month_rows["Status"] == "Unpaid"
+    return {
+        "Total Students": len(month_rows),
+        "Paid Students": int((~unpaid).sum()),
+        "Unpaid Students": int(unpaid.sum()),
+        "Total Outstanding": month_rows.loc[unpaid, "Outstanding"].sum(),
+    }
+
+def student_counts(ledger):
+    """Distinct students per class, and those with a receipt without a monthly fee
+
+    ledger needs the ID, Class Category and Monthly Fee columns.
+    """
+    unbilled = ledger["Monthly Fee"] == 0
+    grouped = ledger.assign(Unbilled=ledger["ID"].where(unbilled)).groupby("Class Category", observed=True)
+    return pd.DataFrame({"Students": grouped["ID"].nunique(), "Unbilled Students": grouped["Unbilled"].nunique()})
+
+def month_defaulters(grid, month):
+    """Students who haven't paid one month of a paid_unpaid_grid, with the fee due"""
+    rows = grid[(grid["Month"] == month) & (grid["Status"] == "Unpaid")]
+    return rows[["ID", "Student Name", "Class Category", "Month", "Outstanding"]].reset_index(drop=True)
+
+def fee_totals(records):
+    """Monthly fees, annual charges, admission fees and amount received summed over ledger rows"""
+    return {col: records[col].sum() for col in ["Monthly Fee", "Annual Charges", "Admission Fee", "Received Amount"]}
+
+def monthly_fee_report(records):
+    """Monthly fee and amount received per academic month of ledger rows, with a paid status"""
+    report = pd.DataFrame({"Month": MONTHS})
+    paid = records.groupby("Month", observed=True).agg({"Monthly Fee": "sum", "Received Amount": "sum"}).reset_index()
+    report = report.merge(paid.assign(Month=paid["Month"].astype(str)), on="Month", how="left").fillna(0)
+    report["Status"] = np.where(report["Monthly Fee"] > 0, "Paid", "Unpaid")
+    return report
+
+def student_totals(ledger):
+    """fee_totals per student, with the number of receipts"""
+    amounts = ["Monthly Fee", "Annual Charges", "Admission Fee", "Received Amount"]
+    return (ledger.groupby(["ID", "Student Name", "Class Category"], observed=True)
+            .agg(Receipts=("Received Amount", "size"), **{col: (col, "sum") for col in amounts})
+            .reset_index())
+
+def collection_by_class(ledger):
+    """Amount received per class and academic month"""
+    table = ledger.pivot_table(index="Class Category", columns="Month", values="Received Amount",
+                               aggfunc="sum", observed=True, fill_value=0)
+    table = table.reindex(columns=[month for month in CATEGORY_COLUMNS["Month"] if month in table.columns])
+    table.columns = [str(month) for month in table.columns]
+    table["Total"] = table.sum(axis=1)
+    return table.reset_index()
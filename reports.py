@@ -3,9 +3,22 @@
 #type:ignore
 import streamlit as st
 import pandas as pd
-from database import load_data
-from utils import format_currency, style_row
+from database import load_data, query_records, update_record, delete_record, get_student_fees, get_collection_cube, data_version
+from utils import format_currency, get_academic_year, lazy_tabs
+from report_data import year_grid, student_payment_summary, month_status, fee_totals, monthly_fee_report, student_counts
+from schema import RECORD_KEY, CLASS_CATEGORIES, CATEGORY_COLUMNS, AMOUNT_COLUMNS
+from display import prepare, show_table, cached
+from exports import export_controls, ledger_sheets
+from perf import traced_page
 
+# Columns the records grid can be sorted by, and its page sizes
+SORTABLE_COLUMNS = ["Date", "Entry Timestamp", "Student Name", "Class Category", "Month", "Received Amount", "Academic Year"]
+PAGE_SIZES = [25, 50, 100, 200]
+
+# Money columns of the paid & unpaid month table, as displayed
+PAID_UNPAID_CURRENCY = ["Monthly Fee", "Amount Paid", "Balance Due"]
+
+@traced_page
 def reports_page(selected_menu):
     """Reports page for viewing records"""
     if selected_menu == "View All Records":
@@ -15,12 +28,64 @@ def reports_page(selected_menu):
     elif selected_menu == "Student Yearly Report":
         student_yearly_report()
 
+def records_grid(key, class_category=None):
+    """Filter, sort and show one page of ledger records fetched from storage; returns that page"""
+    with st.expander("🔎 Filter & Sort"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            if class_category is None:
+                class_choice = st.selectbox("Class", ["All"] + CLASS_CATEGORIES, key=f"{key}_class")
+                class_category = None if class_choice == "All" else class_choice
+            month = st.selectbox("Month", ["All"] + CATEGORY_COLUMNS["Month"], key=f"{key}_month")
+        with col2:
+            years = sorted((year for year in get_collection_cube().by("Academic Year").index if year), reverse=True)
+            year = st.selectbox("Academic Year", ["All"] + years, key=f"{key}_year")
+            name_prefix = st.text_input("Student Name starts with", key=f"{key}_name")
+        with col3:
+            date_range = st.date_input("Payment Date range", value=(), key=f"{key}_dates")
+            sort_by = st.selectbox("Sort by", SORTABLE_COLUMNS, key=f"{key}_sort")
+            descending = st.checkbox("Descending", value=True, key=f"{key}_descending")
+
+    filters = {
+        "Class Category": class_category,
+        "Month": None if month == "All" else month,
+        "Academic Year": None if year == "All" else year,
+        "name_prefix": name_prefix.strip() or None,
+    }
+    if len(date_range) == 2:
+        filters["date_from"], filters["date_to"] = date_range
+
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        page_size = st.selectbox("Rows per page", PAGE_SIZES, index=1, key=f"{key}_page_size")
+    with col2:
+        page_number = st.number_input("Page", min_value=1, value=1, step=1, key=f"{key}_page")
+
+    page, total = query_records(filters, sort_by, descending, (page_number - 1) * page_size, page_size)
+    pages = max(1, -(-total // page_size))
+    if page_number > pages:
+        # The filters narrowed the results below the chosen page; show the last one
+        page_number = pages
+        page, total = query_records(filters, sort_by, descending, (page_number - 1) * page_size, page_size)
+    st.caption(f"{total:,} matching records · page {page_number} of {pages}")
+
+    if not page.empty:
+        show_table(prepare(page.drop(columns=[RECORD_KEY]), AMOUNT_COLUMNS, mark_unbilled=True), AMOUNT_COLUMNS)
+
+    if total:
+        export_controls(
+            key, "fee_records" if class_category is None else f"fee_records_{class_category}",
+            lambda fmt: ledger_sheets(filters, sort_by, descending, by_class=fmt == "Excel"),
+            signature=(sorted(filters.items(), key=lambda item: item[0]), sort_by, descending)
+        )
+    return page
+
 def view_all_records():
     """View all fee records"""
     st.header("👀 View All Fee Records")
     
-    df = load_data()
-    if df.empty:
+    cube = get_collection_cube()
+    if cube.totals()["Records"] == 0:
         st.info("No fee records found")
     else:
         CLASS_CATEGORIES = [
@@ -29,251 +94,184 @@ def view_all_records():
             "Class 6", "Class 7", "Class 8", "Class 9", "Class 10 (Matric)"
         ]
         
-        tabs = st.tabs(["All Records"] + CLASS_CATEGORIES)
+        section = lazy_tabs(["All Records"] + CLASS_CATEGORIES, key="records_section")
         
-        with tabs[0]:
+        if section == "All Records":
             st.subheader("All Fee Records")
+            page = records_grid("all_records")
             
-            st.markdown("## Select a record to edit or delete:")
+            if page.empty:
+                st.info("No records match the filters")
+            else:
+                st.markdown("## Select a record to edit or delete:")
             
-            edit_index = st.selectbox(
-                "Select Record",
-                options=df.index,
-                format_func=lambda x: f"{df.loc[x, 'Student Name']} - {df.loc[x, 'Class Category']} - {df.loc[x, 'Month']}"
-            )
+                edit_index = st.selectbox(
+                    "Select Record",
+                    options=page.index,
+                    format_func=lambda x: f"{page.loc[x, 'Student Name']} - {page.loc[x, 'Class Category']} - {page.loc[x, 'Month']}"
+                )
             
-            with st.form("edit_form"):
-                record = df.loc[edit_index]
-                
-                col1, col2 = st.columns(2)
-                with col1:
-                    edit_name = st.text_input("Student Name", value=record['Student Name'])
-                    edit_class = st.selectbox("Class Category", CLASS_CATEGORIES, 
-                                            index=CLASS_CATEGORIES.index(record['Class Category']))
-                    edit_section = st.text_input("Class Section", value=record['Class Section'])
-                    edit_month = st.selectbox("Month", [
-                        "APRIL", "MAY", "JUNE", "JULY", "AUGUST", "SEPTEMBER",
-                        "OCTOBER", "NOVEMBER", "DECEMBER", "JANUARY", "FEBRUARY", "MARCH",
-                        "ANNUAL", "ADMISSION"
-                    ], index=[
-                        "APRIL", "MAY", "JUNE", "JULY", "AUGUST", "SEPTEMBER",
-                        "OCTOBER", "NOVEMBER", "DECEMBER", "JANUARY", "FEBRUARY", "MARCH",
-                        "ANNUAL", "ADMISSION"
-                    ].index(record['Month']))
-                with col2:
-                    edit_monthly_fee = st.number_input("Monthly Fee", value=float(record['Monthly Fee'] or 0))
-                    edit_annual_charges = st.number_input("Annual Charges", value=float(record['Annual Charges'] or 0))
-                    edit_admission_fee = st.number_input("Admission Fee", value=float(record['Admission Fee'] or 0))
-                    edit_received = st.number_input("Received Amount", value=float(record['Received Amount'] or 0))
-                    edit_payment_method = st.selectbox("Payment Method", ["Cash", "Bank Transfer", "Cheque", "Online Payment", "Other"], 
-                                                     index=["Cash", "Bank Transfer", "Cheque", "Online Payment", "Other"].index(record['Payment Method'] if pd.notna(record['Payment Method']) else "Cash"))
-                
-                try:
-                    edit_date_value = pd.to_datetime(record['Date'])
-                except:
-                    edit_date_value = pd.to_datetime('today')
+                with st.form("edit_form"):
+                    record = page.loc[edit_index]
                 
-                edit_date = st.date_input("Payment Date", value=edit_date_value)
-                edit_signature = st.text_input("Received By (Signature)", value=record['Signature'])
-                edit_academic_year = st.text_input("Academic Year", 
-                                                 value=record['Academic Year'] if pd.notna(record['Academic Year']) else f"{edit_date.year}-{edit_date.year+1}")
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        edit_name = st.text_input("Student Name", value=record['Student Name'])
+                        edit_class = st.selectbox("Class Category", CLASS_CATEGORIES, 
+                                                index=CLASS_CATEGORIES.index(record['Class Category']))
+                        edit_section = st.text_input("Class Section", value=record['Class Section'])
+                        edit_month = st.selectbox("Month", [
+                            "APRIL", "MAY", "JUNE", "JULY", "AUGUST", "SEPTEMBER",
+                            "OCTOBER", "NOVEMBER", "DECEMBER", "JANUARY", "FEBRUARY", "MARCH",
+                            "ANNUAL", "ADMISSION"
+                        ], index=[
+                            "APRIL", "MAY", "JUNE", "JULY", "AUGUST", "SEPTEMBER",
+                            "OCTOBER", "NOVEMBER", "DECEMBER", "JANUARY", "FEBRUARY", "MARCH",
+                            "ANNUAL", "ADMISSION"
+                        ].index(record['Month']))
+                    with col2:
+                        edit_monthly_fee = st.number_input("Monthly Fee", value=float(record['Monthly Fee'] or 0))
+                        edit_annual_charges = st.number_input("Annual Charges", value=float(record['Annual Charges'] or 0))
+                        edit_admission_fee = st.number_input("Admission Fee", value=float(record['Admission Fee'] or 0))
+                        edit_received = st.number_input("Received Amount", value=float(record['Received Amount'] or 0))
+                        edit_payment_method = st.selectbox("Payment Method", ["Cash", "Bank Transfer", "Cheque", "Online Payment", "Other"], 
+                                                         index=["Cash", "Bank Transfer", "Cheque", "Online Payment", "Other"].index(record['Payment Method'] if pd.notna(record['Payment Method']) else "Cash"))
                 
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    update_btn = st.form_submit_button("🔄 Update Record")
-                with col2:
-                    delete_btn = st.form_submit_button("🗑️ Delete Record")
+                    edit_date_value = record['Date']
+                    if pd.isna(edit_date_value):
+                        edit_date_value = pd.to_datetime('today')
                 
-                if update_btn:
-                    from database import update_data
-                    df.loc[edit_index, 'Student Name'] = edit_name
-                    df.loc[edit_index, 'Class Category'] = edit_class
-                    df.loc[edit_index, 'Class Section'] = edit_section
-                    df.loc[edit_index, 'Month'] = edit_month
-                    df.loc[edit_index, 'Monthly Fee'] = edit_monthly_fee
-                    df.loc[edit_index, 'Annual Charges'] = edit_annual_charges
-                    df.loc[edit_index, 'Admission Fee'] = edit_admission_fee
-                    df.loc[edit_index, 'Received Amount'] = edit_received
-                    df.loc[edit_index, 'Payment Method'] = edit_payment_method
-                    df.loc[edit_index, 'Date'] = edit_date.strftime('%d-%m-%Y')
-                    df.loc[edit_index, 'Signature'] = edit_signature
-                    df.loc[edit_index, 'Academic Year'] = edit_academic_year
-                    df.loc[edit_index, 'Entry Timestamp'] = pd.Timestamp.now().strftime('%d-%m-%Y %H:%M')
-                    
-                    if update_data(df):
-                        st.success("✅ Record updated successfully!")
-                        st.rerun()
+                    edit_date = st.date_input("Payment Date", value=edit_date_value)
+                    edit_signature = st.text_input("Received By (Signature)", value=record['Signature'])
+                    edit_academic_year = st.text_input("Academic Year", 
+                                                     value=record['Academic Year'] if pd.notna(record['Academic Year']) else f"{edit_date.year}-{edit_date.year+1}")
                 
-                if delete_btn:
-                    from database import update_data
-                    df = df.drop(index=edit_index)
-                    if update_data(df):
-                        st.success("✅ Record deleted successfully!")
-                        st.rerun()
-        
-            st.dataframe(
-                df.style.apply(style_row, axis=1).format({
-                    'Monthly Fee': format_currency,
-                    'Annual Charges': format_currency,
-                    'Admission Fee': format_currency,
-                    'Received Amount': format_currency
-                }),
-                use_container_width=True
-            )
-        
-        for i, category in enumerate(CLASS_CATEGORIES, start=1):
-            with tabs[i]:
-                st.subheader(f"{category} Records")
-                class_df = df[df["Class Category"] == category]
-                
-                if not class_df.empty:
-                    st.dataframe(
-                        class_df.style.apply(style_row, axis=1).format({
-                            'Monthly Fee': format_currency,
-                            'Annual Charges': format_currency,
-                            'Admission Fee': format_currency,
-                            'Received Amount': format_currency
-                        }),
-                        use_container_width=True
-                    )
-                    
-                    st.subheader("Summary")
                     col1, col2, col3 = st.columns(3)
                     with col1:
-                        st.metric("Total Students", class_df['Student Name'].nunique())
+                        update_btn = st.form_submit_button("🔄 Update Record")
                     with col2:
-                        st.metric("Total Received", format_currency(class_df['Received Amount'].sum()))
-                    with col3:
-                        unpaid = class_df[class_df['Monthly Fee'] == 0]['Student Name'].nunique()
-                        st.metric("Unpaid Students", unpaid, delta_color="inverse")
-                    
-                    st.markdown("Monthly Collection:")
-                    monthly_summary = class_df.groupby('Month')['Received Amount'].sum().reset_index()
-                    st.bar_chart(monthly_summary.set_index('Month'))
+                        delete_btn = st.form_submit_button("🗑️ Delete Record")
+                
+                    if update_btn:
+                        if update_record(record[RECORD_KEY], {
+                            'Student Name': edit_name,
+                            'Class Category': edit_class,
+                            'Class Section': edit_section,
+                            'Month': edit_month,
+                            'Monthly Fee': edit_monthly_fee,
+                            'Annual Charges': edit_annual_charges,
+                            'Admission Fee': edit_admission_fee,
+                            'Received Amount': edit_received,
+                            'Payment Method': edit_payment_method,
+                            'Date': edit_date,
+                            'Signature': edit_signature,
+                            'Academic Year': edit_academic_year,
+                            'Entry Timestamp': pd.Timestamp.now()
+                        }):
+                            st.success("✅ Record updated successfully!")
+                            st.rerun()
+                
+                    if delete_btn:
+                        if delete_record(record[RECORD_KEY]):
+                            st.success("✅ Record deleted successfully!")
+                            st.rerun()
         
-        st.divider()
-        csv = df.to_csv(index=False).encode('utf-8')
-        st.download_button(
-            label="📥 Download All Records as CSV",
-            data=csv,
-            file_name="all_fee_records.csv",
-            mime="text/csv"
-        )
+        else:
+            category = section
+            st.subheader(f"{category} Records")
+            class_totals = cube.totals(**{"Class Category": category})
+            counts = cached("student_counts", data_version(),
+                            lambda: student_counts(load_data(["ID", "Class Category", "Monthly Fee"])))
+            counts = counts.reindex([category], fill_value=0).iloc[0]
+            
+            if class_totals["Records"]:
+                records_grid(f"class_{CLASS_CATEGORIES.index(category) + 1}", class_category=category)
+                
+                st.subheader("Summary")
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("Total Students", counts['Students'])
+                with col2:
+                    st.metric("Total Received", format_currency(class_totals['Received Amount']))
+                with col3:
+                    st.metric("Unpaid Students", counts['Unbilled Students'], delta_color="inverse")
+                
+                st.markdown("Monthly Collection:")
+                monthly_summary = cube.by("Month", **{"Class Category": category})[['Received Amount']]
+                st.bar_chart(monthly_summary)
+
+
+def paid_unpaid_tables(academic_year):
+    """Paid/unpaid grid of one academic year with its display tables, rebuilt only when the data changes"""
+    def build():
+        merged = year_grid(load_data(), academic_year, get_student_fees)
+        month_table = merged[[
+            "Student Name", "Class Category", "Estimated Monthly Fee",
+            "Received Amount", "Outstanding", "Status"
+        ]].rename(columns={
+            "Estimated Monthly Fee": "Monthly Fee",
+            "Received Amount": "Amount Paid",
+            "Outstanding": "Balance Due"
+        })
+        month_table = prepare(month_table, PAID_UNPAID_CURRENCY, status="Status")
+        summary_table = prepare(student_payment_summary(merged), ["Total Outstanding"])
+        return merged, month_table, summary_table
+    return cached(("paid_unpaid", academic_year), data_version(), build)
 
 def paid_unpaid_records():
     """Paid and unpaid students records"""
     st.header("✅ Paid & ❌ Unpaid Students Record")
-    df = load_data()
+    cube = get_collection_cube()
     
-    if df.empty:
+    if cube.totals()["Records"] == 0:
         st.info("No fee records found")
     else:
-        all_students = df[['ID', 'Student Name', 'Class Category']].drop_duplicates()
-        
+        academic_years = sorted((year for year in cube.by("Academic Year").index if year), reverse=True)
+        current_year = get_academic_year(pd.Timestamp.now())
+        selected_year = st.selectbox(
+            "Academic Year", academic_years,
+            index=academic_years.index(current_year) if current_year in academic_years else 0,
+            key="paid_unpaid_year"
+        )
         MONTHS = [
             "APRIL", "MAY", "JUNE", "JULY", "AUGUST", "SEPTEMBER",
             "OCTOBER", "NOVEMBER", "DECEMBER", "JANUARY", "FEBRUARY", "MARCH"
         ]
         
-        all_combinations = pd.DataFrame([
-            (student['ID'], student['Student Name'], student['Class Category'], month)
-            for _, student in all_students.iterrows()
-            for month in MONTHS
-        ], columns=['ID', "Student Name", "Class Category", "Month"])
-        
-        payment_records = df[["ID", "Month", "Monthly Fee", "Received Amount"]]
-        merged = pd.merge(all_combinations, payment_records, on=["ID", "Month"], how="left")
-        
-        from database import load_student_fees
-        fees_data = load_student_fees()
-        
-        def get_student_fee(student_id):
-            if student_id in fees_data:
-                return fees_data[student_id]["monthly_fee"]
-            student_payments = df[(df['ID'] == student_id) & (df['Monthly Fee'] > 0)]
-            if not student_payments.empty:
-                return student_payments['Monthly Fee'].iloc[-1]
-            return 2000
+        merged, month_table, summary_table = paid_unpaid_tables(selected_year)
             
-        merged['Estimated Monthly Fee'] = merged['ID'].apply(get_student_fee)
+        default_month = pd.Timestamp.now().strftime("%B").upper()
+        month = lazy_tabs(MONTHS, key="paid_unpaid_month", default=default_month)
             
-        merged['Status'] = merged['Monthly Fee'].apply(
-            lambda x: "Paid" if pd.notna(x) and x > 0 else "Unpaid"
-        )
-        merged['Outstanding'] = merged.apply(
-            lambda row: 0 if row['Status'] == "Paid" else row['Estimated Monthly Fee'],
-            axis=1
-        )
-            
-        tabs = st.tabs(MONTHS)
+        in_month = (merged['Month'] == month).to_numpy()
+        status = month_status(merged, month)
             
-        for i, month in enumerate(MONTHS):
-            with tabs[i]:
-                month_data = merged[merged['Month'] == month].copy()
-                    
-                if not month_data.empty:
-                    total_students = len(month_data)
-                    paid_students = len(month_data[month_data["Status"] == "Paid"])
-                    unpaid_students = total_students - paid_students
-                    total_outstanding = month_data[month_data["Status"] == "Unpaid"]["Outstanding"].sum()
-                        
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        st.metric("Total Students", total_students)
-                    with col2:
-                        st.metric("Paid Students", paid_students)
-                    with col3:
-                        st.metric("Unpaid Students", unpaid_students, 
-                                delta=f"Rs. {int(total_outstanding):,}" if total_outstanding > 0 else "Rs. 0")
-                        
-                    def color_status(val):
-                        color = "green" if val == "Paid" else "red"
-                        return f"color: {color}"
-                        
-                    display_df = month_data[[
-                        "Student Name", "Class Category", "Estimated Monthly Fee", 
-                        "Received Amount", "Outstanding", "Status"
-                    ]]
-                    display_df = display_df.rename(columns={
-                        "Estimated Monthly Fee": "Monthly Fee",
-                        "Received Amount": "Amount Paid",
-                        "Outstanding": "Balance Due"
-                    })
-                        
-                    st.dataframe(
-                        display_df.style.format({
-                            "Monthly Fee": format_currency,
-                            "Amount Paid": format_currency,
-                            "Balance Due": format_currency
-                        }).applymap(color_status, subset=["Status"]),
-                        use_container_width=True
-                    )
-                            
-                    csv = display_df.to_csv(index=False).encode("utf-8")
-                                                    
-                st.subheader("Overall Payment Status")
-                student_summary = merged.groupby(["ID", "Student Name", "Class Category"]).agg({
-                    "Status": lambda x: (x == "Unpaid").sum(),
-                    "Outstanding": "sum"
-                }).reset_index()
-                student_summary.columns = [
-                    "ID", "Student Name", "Class Category", "Unpaid Months", "Total Outstanding"
-                ]
-        
-                st.dataframe(
-                    student_summary.style.format({
-                        "Total Outstanding": format_currency
-                    }),
-                    use_container_width=True
-                )
-                        
-                csv = student_summary.to_csv(index=False).encode("utf-8")
+        if status["Total Students"]:
+            total_outstanding = status["Total Outstanding"]
+                
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Total Students", status["Total Students"])
+            with col2:
+                st.metric("Paid Students", status["Paid Students"])
+            with col3:
+                st.metric("Unpaid Students", status["Unpaid Students"], 
+                        delta=f"Rs. {int(total_outstanding):,}" if total_outstanding > 0 else "Rs. 0")
+                
+            display_df = month_table[in_month]
+            show_table(display_df, PAID_UNPAID_CURRENCY)
+                                            
+        st.subheader("Overall Payment Status")
+        show_table(summary_table, ["Total Outstanding"])
 
 def student_yearly_report():
     """Student yearly report"""
     st.header("📊 Student Yearly Fee Report")
     
-    df = load_data()
+    df = load_data(columns=[
+        "Student Name", "Class Category", "Class Section", "Month",
+        "Monthly Fee", "Annual Charges", "Admission Fee", "Received Amount"
+    ])
     if df.empty:
         st.info("No fee records found")
     else:
@@ -303,58 +301,27 @@ def student_yearly_report():
                 
                 st.subheader("Fee Summary")
                 
-                total_monthly_fee = student_data["Monthly Fee"].sum()
-                annual_charges = student_data["Annual Charges"].sum()
-                admission_fee = student_data["Admission Fee"].sum()
-                total_received = student_data["Received Amount"].sum()
+                totals = fee_totals(student_data)
                 
                 col1, col2, col3, col4 = st.columns(4)
                 with col1:
-                    st.metric("Total Monthly Fee", format_currency(total_monthly_fee))
+                    st.metric("Total Monthly Fee", format_currency(totals["Monthly Fee"]))
                 with col2:
-                    st.metric("Annual Charges", format_currency(annual_charges))
+                    st.metric("Annual Charges", format_currency(totals["Annual Charges"]))
                 with col3:
-                    st.metric("Admission Fee", format_currency(admission_fee))
+                    st.metric("Admission Fee", format_currency(totals["Admission Fee"]))
                 with col4:
-                    st.metric("Total Received", format_currency(total_received))
+                    st.metric("Total Received", format_currency(totals["Received Amount"]))
                 
                 st.subheader("Monthly Fee Details")
                 
-                all_months = [
-                    "APRIL", "MAY", "JUNE", "JULY", "AUGUST", "SEPTEMBER",
-                    "OCTOBER", "NOVEMBER", "DECEMBER", "JANUARY", "FEBRUARY", "MARCH"
-                ]
+                monthly_report = monthly_fee_report(student_data)
                 
-                monthly_report = pd.DataFrame({"Month": all_months})
-                monthly_data = student_data.groupby("Month").agg({
-                    "Monthly Fee": "sum",
-                    "Received Amount": "sum"
-                }).reset_index()
-                
-                monthly_report = monthly_report.merge(monthly_data, on="Month", how="left").fillna(0)
-                monthly_report["Status"] = monthly_report.apply(
-                    lambda row: "Paid" if row["Monthly Fee"] > 0 else "Unpaid",
-                    axis=1
-                )
-                
-                def color_unpaid(val):
-                    if val == "Unpaid":
-                        return "color: red"
-                    return ""
-                
-                st.dataframe(
-                    monthly_report.style
-                    .applymap(color_unpaid, subset=["Status"])
-                    .format({
-                        "Monthly Fee": format_currency,
-                        "Received Amount": format_currency
-                    }),
-                    use_container_width=True
+                show_table(
+                    prepare(monthly_report, ["Monthly Fee", "Received Amount"], status="Status"),
+                    ["Monthly Fee", "Received Amount"]
                 )
                 
                 st.subheader("Payment Trends")
                 st.line_chart(monthly_report.set_index("Month")[["Monthly Fee", "Received Amount"]])
-                
-                st.divider()
-                csv = monthly_report.to_csv(index=False).encode("utf-8")
 # [file content end]
\ No newline at end of file
@@ -0,0 +1,88 @@
+#type:ignore
+import contextvars
+import functools
+import sys
+import threading
+from contextlib import contextmanager
+
+_scope = contextvars.ContextVar("rerun_cache_scope", default=None)
+_stats_lock = threading.Lock()
+
+# Process-wide totals across all reruns
+stats = {"reruns": 0, "loads": 0, "avoided_loads": 0}
+
+class RerunScope:
+    """Memoized read results for one execution of the Streamlit script"""
+
+    def __init__(self):
+        self.values = {}
+        self.loads = 0
+        self.avoided_loads = 0
+
+@contextmanager
+def rerun_scope():
+    """Dedupe identical memoized reads until the block exits"""
+    scope = RerunScope()
+    token = _scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _scope.reset(token)
+        with _stats_lock:
+            stats["reruns"] += 1
+            stats["loads"] += scope.loads
+            stats["avoided_loads"] += scope.avoided_loads
+
+def current_scope():
+    """Return the active RerunScope, or None outside a script run"""
+    return _scope.get()
+
+def _copy(value):
+    """Hand out copies so one caller's edits can't leak into another's result"""
+    # Only look for DataFrames once pandas is loaded, so light pages never import it
+    pd = sys.modules.get("pandas")
+    if pd is not None and isinstance(value, pd.DataFrame):
+        return value.copy()
+    if isinstance(value, dict):
+        return dict(value)
+    if isinstance(value, list):
+        return list(value)
+    return value
+
+def _freeze(value):
+    """Make list arguments usable as part of a memo key"""
+    return tuple(value) if isinstance(value, list) else value
+
+def memoize_per_rerun(func):
+    """Run func once per distinct arguments within the active rerun scope"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        scope = _scope.get()
+        if scope is None:
+            return func(*args, **kwargs)
+
+        key = (
+            func.__module__, func.__qualname__,
+            tuple(_freeze(arg) for arg in args),
+            tuple(sorted((name, _freeze(value)) for name, value in kwargs.items()))
+        )
+        try:
+            hash(key)
+        except TypeError:
+            return func(*args, **kwargs)
+
+        if key in scope.values:
+            scope.avoided_loads += 1
+            return _copy(scope.values[key])
+
+        value = func(*args, **kwargs)
+        scope.loads += 1
+        scope.values[key] = value
+        return _copy(value)
+    return wrapper
+
+def invalidate():
+    """Forget memoized reads of the active scope after a write"""
+    scope = _scope.get()
+    if scope is not None:
+        scope.values.clear()
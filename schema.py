@@ -0,0 +1,186 @@
+#type:ignore
+import uuid
+import pandas as pd
+import numpy as np
+from pandas.api.types import union_categoricals
+
+LEDGER_COLUMNS = [
+    "ID", "Student Name", "Class Category", "Class Section", "Month",
+    "Monthly Fee", "Annual Charges", "Admission Fee",
+    "Received Amount", "Payment Method", "Date", "Signature",
+    "Entry Timestamp", "Academic Year", "Record ID"
+]
+
+# Stable per-row key used to address single ledger records for updates and deletes
+RECORD_KEY = "Record ID"
+
+# Columns kept as the text they were written as, even when a value looks like a
+# number: generated IDs such as "32325559" or "7067E261" must not become numbers
+TEXT_COLUMNS = ["ID", "Student Name", "Class Section", "Signature", "Academic Year", RECORD_KEY]
+
+# pandas.read_csv options for ledger CSVs; only empty cells are missing, so a
+# student named "NA" stays a name
+CSV_READ_OPTIONS = {"dtype": {col: str for col in TEXT_COLUMNS}, "keep_default_na": False, "na_values": [""]}
+
+AMOUNT_COLUMNS = ["Monthly Fee", "Annual Charges", "Admission Fee", "Received Amount"]
+DATE_COLUMNS = ["Date", "Entry Timestamp"]
+
+CLASS_CATEGORIES = [
+    "Nursery", "KGI", "KGII",
+    "Class 1", "Class 2", "Class 3", "Class 4", "Class 5",
+    "Class 6", "Class 7", "Class 8", "Class 9", "Class 10 (Matric)"
+]
+
+MONTHS = [
+    "APRIL", "MAY", "JUNE", "JULY", "AUGUST", "SEPTEMBER",
+    "OCTOBER", "NOVEMBER", "DECEMBER", "JANUARY", "FEBRUARY", "MARCH"
+]
+
+PAYMENT_METHODS = ["Cash", "Bank Transfer", "Cheque", "Online Payment", "Other"]
+
+# Categorical columns and the categories they always carry; values seen in
+# the data but missing here are appended rather than dropped
+CATEGORY_COLUMNS = {
+    "Class Category": CLASS_CATEGORIES,
+    "Month": MONTHS + ["ANNUAL", "ADMISSION"],
+    "Payment Method": PAYMENT_METHODS,
+    "Academic Year": [],
+}
+
+def get_academic_year(date):
+    """Determine academic year based on date"""
+    year = date.year
+    if date.month >= 4:  # Academic year starts in April
+        return f"{year}-{year+1}"
+    return f"{year-1}-{year}"
+
+def _to_category(series, known):
+    observed = series.dropna().astype(str).unique().tolist()
+    extras = sorted(value for value in observed if value not in known)
+    values = series.where(series.isna(), series.astype(str))
+    return pd.Categorical(values, categories=known + extras)
+
+def to_text(df):
+    """Convert the text columns present in df to strings, leaving missing values missing"""
+    for col in TEXT_COLUMNS:
+        if col in df.columns and col not in CATEGORY_COLUMNS and not isinstance(df[col].dtype, pd.StringDtype):
+            series = df[col]
+            df[col] = series.where(series.isna(), series.astype(str))
+    return df
+
+def parse_dates(series):
+    """Parse ISO dates, falling back to day-first for rows written as dd-mm-YYYY"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    parsed = pd.to_datetime(series, format="ISO8601", errors="coerce")
+    retry = parsed.isna() & series.notna()
+    if retry.any():
+        parsed[retry] = pd.to_datetime(series[retry], dayfirst=True, format="mixed", errors="coerce")
+    return parsed
+
+def normalize_ledger(df):
+    """Add missing columns and convert raw ledger rows to the typed schema"""
+    for col in LEDGER_COLUMNS:
+        if col not in df.columns:
+            df[col] = np.nan
+    df = df.dropna(how='all')
+
+    for col in AMOUNT_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).round().astype("int64")
+
+    for col in DATE_COLUMNS:
+        df[col] = parse_dates(df[col])
+
+    for col, known in CATEGORY_COLUMNS.items():
+        df[col] = _to_category(df[col], known)
+
+    return to_text(df)
+
+def new_record_key():
+    """Return a fresh record key; the letter prefix keeps CSV readers from parsing it as a number"""
+    return f"r{uuid.uuid4().hex[:12]}"
+
+def with_record_keys(records):
+    """Return the records with a record key filled in where it is missing"""
+    return [
+        record if isinstance(record.get(RECORD_KEY), str) and record[RECORD_KEY]
+        else dict(record, **{RECORD_KEY: new_record_key()})
+        for record in records
+    ]
+
+def concat_ledgers(frames):
+    """Concatenate typed ledger frames, keeping the categorical columns categorical"""
+    frames = [frame for frame in frames if len(frame)] or frames[:1]
+    if len(frames) == 1:
+        return frames[0]
+
+    combined = pd.concat(frames)
+    for col in CATEGORY_COLUMNS:
+        if col in combined.columns and all(isinstance(frame[col].dtype, pd.CategoricalDtype) for frame in frames):
+            arrays = [frame[col].array for frame in frames]
+            if len({array.categories.dtype for array in arrays}) > 1:
+                # Frames without any value of a column carry empty object-typed categories
+                arrays = [array.set_categories(array.categories.astype(object)) for array in arrays]
+            merged = union_categoricals(arrays)
+            combined[col] = pd.Categorical(merged, categories=merged.categories)
+    return combined
+
+def set_row_values(df, index, values):
+    """Assign edited values to one ledger row, widening categories when needed"""
+    for col, value in values.items():
+        if col in CATEGORY_COLUMNS and pd.notna(value) and value not in df[col].cat.categories:
+            df[col] = df[col].cat.add_categories([value])
+        elif col in AMOUNT_COLUMNS:
+            value = int(round(value or 0))
+        elif col in DATE_COLUMNS:
+            value = pd.Timestamp(value)
+        df.loc[index, col] = value
+    return df
+
+def to_storage_frame(df):
+    """Convert a typed ledger back to plain values for writing (ISO dates, no categories)"""
+    out = df.reindex(columns=LEDGER_COLUMNS).copy()
+    for col in CATEGORY_COLUMNS:
+        out[col] = out[col].astype(object)
+    out["Date"] = parse_dates(out["Date"]).dt.strftime("%Y-%m-%d")
+    out["Entry Timestamp"] = parse_dates(out["Entry Timestamp"]).dt.strftime("%Y-%m-%d %H:%M:%S")
+    return out.astype(object).where(out.notna(), None)
+
+def to_storage_values(values):
+    """Convert edited values of one row the same way to_storage_frame would write them"""
+    row = to_storage_frame(pd.DataFrame([values])).iloc[0]
+    return {col: row[col] for col in values if col in LEDGER_COLUMNS}
+
+def apply_patches(df, patches, set_values=set_row_values):
+    """Apply update and delete patches, addressed by record key, to a copy of the ledger"""
+    keys = {patch["key"] for patch in patches}
+    hits = df.index[df[RECORD_KEY].isin(keys)]
+    labels = dict(zip(df.loc[hits, RECORD_KEY], hits))
+
+    df = df.copy()
+    deleted = []
+    for patch in patches:
+        label = labels.get(patch["key"])
+        if label is None:
+            continue
+        if patch["op"] == "delete":
+            deleted.append(label)
+            del labels[patch["key"]]
+        else:
+            df = set_values(df, label, patch["values"])
+    return df.drop(index=deleted)
+
+def memory_report(df):
+    """Per-column dtype and memory of the typed ledger next to an all-object copy"""
+    typed = df.memory_usage(deep=True, index=False)
+    untyped = df.astype(object).memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        "Column": typed.index,
+        "Dtype": [str(df[col].dtype) for col in typed.index],
+        "Bytes": typed.values,
+        "Object Bytes": untyped.values,
+    })
+    total = pd.DataFrame([{
+        "Column": "Total", "Dtype": "", "Bytes": typed.sum(), "Object Bytes": untyped.sum()
+    }])
+    return pd.concat([report, total], ignore_index=True)
@@ -0,0 +1,136 @@
+#type:ignore
+import base64
+import json
+import logging
+import os
+import threading
+import pandas as pd
+from ledger_cache import CacheEntry, file_signature, read_tail
+from perf import count_bytes_read
+from schema import to_text
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # snapshots are an optimization; CSV parsing still works without them
+    pa = None
+    pq = None
+
+METADATA_KEY = b"fee_app_snapshot"
+
+# Rewrite the snapshot once this many rows were appended to the CSV after it
+SNAPSHOT_EVERY_ROWS = 2000
+
+logger = logging.getLogger(__name__)
+
+_snapshot_rows = {}
+_writer_lock = threading.Lock()
+
+def snapshot_path(ledger_path):
+    """Return the Parquet snapshot path that mirrors a ledger CSV"""
+    return f"{os.path.splitext(ledger_path)[0]}.parquet"
+
+def parquet_bytes(path, columns=None):
+    """Compressed size of the given columns of a Parquet file (all of it without columns)"""
+    if columns is None:
+        return os.path.getsize(path)
+    metadata = pq.read_metadata(path)
+    wanted = set(columns)
+    return sum(
+        chunk.total_compressed_size
+        for group in (metadata.row_group(i) for i in range(metadata.num_row_groups))
+        for chunk in (group.column(j) for j in range(group.num_columns))
+        if chunk.path_in_schema in wanted
+    )
+
+def read_metadata(ledger_path):
+    """Return the CSV position recorded in the snapshot, or None without a usable snapshot"""
+    path = snapshot_path(ledger_path)
+    if pq is None or not os.path.exists(path):
+        return None
+    try:
+        raw = (pq.read_schema(path).metadata or {}).get(METADATA_KEY)
+    except Exception:
+        return None
+    return json.loads(raw) if raw else None
+
+def _matches(meta, ledger_path):
+    """Check the snapshot still describes the start of the current CSV file"""
+    signature = file_signature(ledger_path)
+    if meta is None or list(signature[:2]) != meta["file"] or signature[3] < meta["offset"]:
+        return False
+    probe = base64.b64decode(meta["probe"])
+    with open(ledger_path, 'rb') as f:
+        f.seek(meta["offset"] - len(probe))
+        return f.read(len(probe)) == probe
+
+def load_entry(ledger_path, columns=None):
+    """Build a ledger cache entry from a still-valid snapshot, reading only the given columns"""
+    meta = read_metadata(ledger_path)
+    if meta is None or not _matches(meta, ledger_path):
+        return None
+    try:
+        # Snapshots written before IDs were always read as text may hold them as numbers
+        df = to_text(pd.read_parquet(snapshot_path(ledger_path), columns=columns))
+    except Exception:
+        return None
+    count_bytes_read(parquet_bytes(snapshot_path(ledger_path), columns))
+    _snapshot_rows[ledger_path] = (tuple(meta["file"]), meta["raw_rows"])
+    return CacheEntry(df, meta["columns"], tuple(meta["file"]) + (None, None),
+                      meta["offset"], meta["raw_rows"], base64.b64decode(meta["probe"]))
+
+def read_projected(ledger_path, columns, transform, concat):
+    """Read only some ledger columns: snapshot columns plus the CSV rows appended after it"""
+    entry = load_entry(ledger_path, columns)
+    if entry is None:
+        return None
+    updated = read_tail(ledger_path, entry, lambda df: transform(df)[columns], concat)
+    return (updated or entry).df
+
+def write(ledger_path, entry):
+    """Atomically write the parsed ledger of a cache entry as the snapshot"""
+    table = pa.Table.from_pandas(entry.df)
+    metadata = dict(table.schema.metadata or {})
+    metadata[METADATA_KEY] = json.dumps({
+        "file": list(entry.signature[:2]),
+        "offset": entry.offset,
+        "raw_rows": entry.raw_rows,
+        "probe": base64.b64encode(entry.probe).decode("ascii"),
+        "columns": entry.columns,
+    }).encode("utf-8")
+
+    path = snapshot_path(ledger_path)
+    tmp_path = f"{path}.tmp"
+    pq.write_table(table.replace_schema_metadata(metadata), tmp_path)
+    os.replace(tmp_path, path)
+    _snapshot_rows[ledger_path] = (tuple(entry.signature[:2]), entry.raw_rows)
+
+def _write_in_background(ledger_path, entry):
+    try:
+        write(ledger_path, entry)
+    except Exception:
+        logger.exception("Failed to write the ledger snapshot of %s", ledger_path)
+    finally:
+        _writer_lock.release()
+
+def reset():
+    """Wait for a background snapshot write, then forget the snapshot positions seen so far"""
+    with _writer_lock:
+        _snapshot_rows.clear()
+
+def refresh_if_stale(ledger_path, entry):
+    """Rewrite the snapshot in a background thread when the CSV moved on too far from it"""
+    if pq is None or entry is None or entry.signature is None or not len(entry.df):
+        return
+
+    if ledger_path not in _snapshot_rows:
+        meta = read_metadata(ledger_path)
+        _snapshot_rows[ledger_path] = (tuple(meta["file"]), meta["raw_rows"]) if meta else (None, 0)
+    snapshot_file, snapshot_rows = _snapshot_rows[ledger_path]
+
+    same_file = snapshot_file == tuple(entry.signature[:2])
+    if same_file and entry.raw_rows - snapshot_rows < SNAPSHOT_EVERY_ROWS:
+        return
+    if not _writer_lock.acquire(blocking=False):
+        return
+    threading.Thread(target=_write_in_background, args=(ledger_path, entry), daemon=True).start()
@@ -0,0 +1,1124 @@
+#type:ignore
+import pandas as pd
+import numpy as np
+import csv
+import io
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from contextlib import closing, contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: the in-process ledger writer still serializes appends
+    fcntl = None
+import snapshot
+from snapshot import pa, pq, parquet_bytes
+from perf import count_bytes_read
+from ledger_cache import read_csv_cached, file_signature, get_entry
+from schema import (
+    LEDGER_COLUMNS, AMOUNT_COLUMNS, CATEGORY_COLUMNS, RECORD_KEY, normalize_ledger, concat_ledgers, to_storage_frame,
+    to_storage_values, new_record_key, with_record_keys, apply_patches, parse_dates, get_academic_year
+)
+
+FEES_CSV = "fees_data.csv"
+STUDENT_FEES_JSON = "student_fees.json"
+SQLITE_DB = "fees.db"
+LEDGER_DIR = "ledger"
+
+# Selects the storage backend: "csv" (default) or "sqlite"
+BACKEND_ENV_VAR = "FEES_STORAGE_BACKEND"
+
+# Appended rows are folded into a full rewrite of the ledger this often
+COMPACT_EVERY_ROWS = 5000
+
+# Pending record patches are folded into the ledger CSV in the background this often
+PATCH_COMPACT_EVERY = 200
+
+# Fee setting changes are folded into student_fees.json once this many were logged
+FEES_COMPACT_EVERY = 500
+
+# Record filters matched exactly; query_records also takes name_prefix, date_from and date_to
+EXACT_FILTERS = ["Class Category", "Month", "Academic Year"]
+
+# Rows per DataFrame handed out by iter_records
+EXPORT_CHUNK_ROWS = 10000
+
+# Academic years the partitioned backend keeps writable (the current one and
+# the one before it); older years are closed when the backend starts
+OPEN_ACADEMIC_YEARS = 2
+
+# Partition of ledger rows with neither an academic year nor a date
+UNASSIGNED_PARTITION = "unassigned"
+CLOSED_SUFFIX = ".closed.parquet"
+
+logger = logging.getLogger(__name__)
+
+def _filter_mask(df, filters):
+    """Boolean mask of the ledger rows matching query_records filters"""
+    mask = pd.Series(True, index=df.index)
+    for col in EXACT_FILTERS:
+        if filters.get(col) is not None:
+            mask &= df[col] == filters[col]
+    if filters.get("name_prefix"):
+        names = df["Student Name"].astype(str).str.lower()
+        mask &= names.str.startswith(filters["name_prefix"].lower())
+    if filters.get("date_from") is not None:
+        mask &= df["Date"] >= pd.Timestamp(filters["date_from"])
+    if filters.get("date_to") is not None:
+        mask &= df["Date"] < pd.Timestamp(filters["date_to"]) + pd.Timedelta(days=1)
+    return mask
+
+def _sql_filters(filters):
+    """WHERE clause and parameters for query_records filters"""
+    clauses, params = [], []
+    for col in EXACT_FILTERS:
+        if filters.get(col) is not None:
+            clauses.append(f'"{col}" = ?')
+            params.append(filters[col])
+    if filters.get("name_prefix"):
+        escaped = filters["name_prefix"].replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        clauses.append("\"Student Name\" LIKE ? ESCAPE '\\'")
+        params.append(f"{escaped}%")
+    if filters.get("date_from") is not None:
+        clauses.append('"Date" >= ?')
+        params.append(pd.Timestamp(filters["date_from"]).strftime("%Y-%m-%d"))
+    if filters.get("date_to") is not None:
+        clauses.append('"Date" < ?')
+        params.append((pd.Timestamp(filters["date_to"]) + pd.Timedelta(days=1)).strftime("%Y-%m-%d"))
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+def _sql_order(col):
+    """ORDER BY expression sorting categorical columns in their natural order, like pandas does"""
+    known = CATEGORY_COLUMNS.get(col)
+    if not known:
+        return f'"{col}"'
+    cases = " ".join(f"WHEN '{value}' THEN {i}" for i, value in enumerate(known))
+    return f'CASE "{col}" {cases} ELSE {len(known)} END'
+
+class StorageBackend:
+    """Interface for ledger and fee settings storage"""
+    name = None
+
+    def initialize(self):
+        """Create the storage if it doesn't exist"""
+        raise NotImplementedError
+
+    def load_ledger(self, columns=None):
+        """Return every ledger row as a normalized DataFrame, optionally only some columns"""
+        raise NotImplementedError
+
+    def ledger_view(self):
+        """Return the ledger for read-only use; backends may skip the defensive copy"""
+        return self.load_ledger()
+
+    def version(self):
+        """Return a value that changes whenever the stored ledger changes"""
+        raise NotImplementedError
+
+    def logical_version(self):
+        """Return a value that changes whenever the ledger records change, but not when they are compacted"""
+        return self.version()
+
+    def append_records(self, records, sync=False):
+        """Add new ledger rows; with sync=True they are on disk when this returns"""
+        raise NotImplementedError
+
+    def replace_ledger(self, df):
+        """Replace the whole ledger with the given DataFrame"""
+        raise NotImplementedError
+
+    def update_record(self, record_key, values):
+        """Change some fields of one record and return the record as it was before"""
+        raise NotImplementedError
+
+    def delete_record(self, record_key):
+        """Remove one record and return it"""
+        raise NotImplementedError
+
+    def find_record(self, record_key):
+        """Return one record as a dict, or None if the key is unknown"""
+        df = self.ledger_view()
+        if df.empty:
+            return None
+        rows = df[df[RECORD_KEY] == record_key]
+        return rows.iloc[0].to_dict() if len(rows) else None
+
+    def student_records(self, student_id, academic_year=None):
+        """Return the ledger rows of one student, optionally for one academic year"""
+        df = self.ledger_view()
+        if df.empty:
+            return df
+        mask = df["ID"] == student_id
+        if academic_year is not None:
+            mask &= df["Academic Year"] == academic_year
+        return df[mask]
+
+    def query_records(self, filters=None, sort_by="Date", descending=True, offset=0, limit=50):
+        """Return one sorted page of the ledger rows matching filters, and how many rows match
+
+        filters may hold exact values for the EXACT_FILTERS columns, a
+        case-insensitive "name_prefix" and an inclusive "date_from"/"date_to".
+        """
+        df, order = self._sorted_matches(filters, sort_by, descending)
+        return df.loc[order[offset:offset + limit]].copy(), len(order)
+
+    def iter_records(self, filters=None, sort_by="Date", descending=True, chunk_rows=EXPORT_CHUNK_ROWS):
+        """Yield the ledger rows matching filters, sorted like query_records, as DataFrames of chunk_rows rows"""
+        df, order = self._sorted_matches(filters, sort_by, descending)
+        for start in range(0, len(order), chunk_rows):
+            yield df.loc[order[start:start + chunk_rows]]
+
+    def _sorted_matches(self, filters, sort_by, descending):
+        """The shared ledger view and the index of its rows matching filters, in sort order"""
+        if sort_by not in LEDGER_COLUMNS:
+            raise ValueError(f"Cannot sort by '{sort_by}'")
+        df = self.ledger_view()
+        if df.empty:
+            return df, df.index
+        matched = df.loc[_filter_mask(df, filters or {}), sort_by]
+        return df, matched.sort_values(ascending=not descending, kind="stable", na_position="last").index
+
+    def compact(self):
+        """Reclaim space left by appends; no-op unless the backend needs it"""
+
+    _fees_cache = (None, None)
+
+    def read_fees(self):
+        """Parse the stored fee settings of all students keyed by student ID"""
+        raise NotImplementedError
+
+    def fees_version(self):
+        """Return a value that changes whenever the stored fee settings change"""
+        raise NotImplementedError
+
+    def fees_view(self):
+        """Return the fee settings for read-only use, parsed again only after they changed"""
+        version = self.fees_version()
+        cached_version, fees = self._fees_cache
+        if fees is None or version is None or cached_version != version:
+            fees = self.read_fees()
+            self._fees_cache = (version, fees)
+        return fees
+
+    def load_fees(self):
+        """Return a copy of the fee settings of all students keyed by student ID"""
+        return {student_id: dict(details) for student_id, details in self.fees_view().items()}
+
+    def save_fees(self, fees_data):
+        """Replace all fee settings"""
+        raise NotImplementedError
+
+    def upsert_fees(self, student_id, details):
+        """Create or replace the fee settings of one student"""
+        raise NotImplementedError
+
+    def delete_fees(self, student_id):
+        """Remove the fee settings of one student; unknown IDs are ignored"""
+        raise NotImplementedError
+
+def _frozen(value):
+    """A version read back from JSON, with its lists turned back into tuples"""
+    return tuple(_frozen(item) for item in value) if isinstance(value, list) else value
+
+@contextmanager
+def _locked(path, mode):
+    """Open path locked against other processes, reopening it when it was replaced while waiting
+
+    Compaction swaps in a new file under the lock of the old one, so a
+    writer that waited on the old file must not write to it afterwards.
+    """
+    while True:
+        f = open(path, mode)
+        try:
+            if fcntl is None:
+                yield f
+                return
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            opened = os.fstat(f.fileno())
+            current = os.stat(path) if os.path.exists(path) else None
+            if current is not None and (current.st_dev, current.st_ino) == (opened.st_dev, opened.st_ino):
+                yield f
+                return
+        finally:
+            f.close()
+
+@contextmanager
+def _swapped_in(tmp_path, path):
+    """Replace path with tmp_path, keeping the new file locked until the block ends
+
+    Writers that reach the new file then also wait for the files that go
+    with it to be rewritten.
+    """
+    with open(tmp_path, 'rb') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        os.replace(tmp_path, path)
+        yield
+
+def _write_json(path, data):
+    """Atomically replace a small JSON file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+def _read_raw(data, **options):
+    """Parse ledger CSV bytes as all-string rows, with only empty cells missing"""
+    return pd.read_csv(io.BytesIO(data), dtype=str, keep_default_na=False, **options).replace("", np.nan)
+
+def _raw_rows(df, columns):
+    """Raw ledger rows in the given column order, each with a record key"""
+    df = df.reindex(columns=columns).astype(object).dropna(how='all')
+    missing = df[RECORD_KEY].isna()
+    df.loc[missing, RECORD_KEY] = [new_record_key() for _ in range(missing.sum())]
+    return df
+
+def _set_raw_values(df, index, values):
+    """Assign patch values to a row of a raw (all-string) ledger frame"""
+    for col, value in values.items():
+        df.loc[index, col] = np.nan if value is None else str(value)
+    return df
+
+class CSVBackend(StorageBackend):
+    """Ledger in a CSV file and fee settings in a JSON file
+
+    Record updates and deletes are appended to a JSON-lines patch log next to
+    the ledger and merged in at read time; compaction folds them into the CSV.
+    Fee setting changes work the same way with their own log.
+    """
+    name = "csv"
+
+    def __init__(self, ledger_path=FEES_CSV, fees_path=STUDENT_FEES_JSON):
+        self.ledger_path = ledger_path
+        self.fees_path = fees_path
+        self.patch_path = f"{os.path.splitext(ledger_path)[0]}.patches.jsonl"
+        self.fees_log_path = f"{os.path.splitext(fees_path)[0]}.log.jsonl"
+        # Maps the file version left by the last compaction to the logical version before it
+        self.version_path = f"{os.path.splitext(ledger_path)[0]}.version.json"
+        self._rows_since_compaction = 0
+        self._lock = threading.RLock()
+        self._compaction_lock = threading.Lock()
+        self._patches = (None, [])
+        self._merged = (None, None, None)
+        self._fees_base = (None, {})
+        self._compacted = (None, None)
+
+    def initialize(self):
+        if not os.path.exists(self.ledger_path):
+            pd.DataFrame(columns=LEDGER_COLUMNS).to_csv(self.ledger_path, index=False)
+        elif RECORD_KEY not in self.read_header():
+            # Ledgers written before record keys existed get one per row once
+            self.compact()
+        if not os.path.exists(self.fees_path):
+            with open(self.fees_path, 'w') as f:
+                json.dump({}, f)
+
+    def read_header(self):
+        """Read only the header row of the ledger CSV"""
+        if not os.path.exists(self.ledger_path) or os.path.getsize(self.ledger_path) == 0:
+            return []
+        with open(self.ledger_path, 'r', newline='', encoding='utf-8') as f:
+            return next(csv.reader(f), [])
+
+    def _read_cached(self, copy):
+        """Read through the process-wide cache, seeded from the Parquet snapshot on a cold start"""
+        df = read_csv_cached(
+            self.ledger_path, normalize_ledger, copy=False, concat=concat_ledgers,
+            seed=lambda: snapshot.load_entry(self.ledger_path)
+        )
+        snapshot.refresh_if_stale(self.ledger_path, get_entry(self.ledger_path))
+
+        signature, patches = self.read_patches()
+        if patches:
+            base, merged_signature, merged = self._merged
+            if base is not df or merged_signature != signature:
+                merged = apply_patches(df, patches)
+                self._merged = (df, signature, merged)
+            df = merged
+        return df.copy() if copy else df
+
+    def read_patches(self):
+        """Return the signature and entries of the record patch log, parsed once per change"""
+        if not os.path.exists(self.patch_path):
+            return None, []
+        signature = file_signature(self.patch_path)
+        cached_signature, patches = self._patches
+        if cached_signature != signature:
+            patches = self._read_patch_log()
+            count_bytes_read(signature[3])
+            self._patches = (signature, patches)
+        return signature, patches
+
+    def _read_patch_log(self):
+        """Parse the patch log afresh; compaction cannot trust a signature another process may repeat"""
+        if not os.path.exists(self.patch_path):
+            return []
+        with open(self.patch_path, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    @contextmanager
+    def _ledger_lock(self):
+        """Hold the ledger and its patch log against writers in this and other processes
+
+        The flock on the ledger file also guards the patch log, so compaction
+        can swap both without losing rows or patches written meanwhile.
+        Yields the ledger opened for appending.
+        """
+        with self._lock, _locked(self.ledger_path, 'a+b') as f:
+            yield f
+
+    def _append_patch(self, patch):
+        """Durably append one patch to the log and schedule compaction when it grows long"""
+        with self._ledger_lock(), open(self.patch_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(patch) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        if len(self.read_patches()[1]) >= PATCH_COMPACT_EVERY:
+            self.compact_in_background()
+
+    def update_record(self, record_key, values):
+        with self._lock:
+            old = self.find_record(record_key)
+            if old is None:
+                raise KeyError(f"No ledger record with key {record_key}")
+            self._append_patch({"op": "update", "key": record_key, "values": to_storage_values(values)})
+        return old
+
+    def delete_record(self, record_key):
+        with self._lock:
+            old = self.find_record(record_key)
+            if old is None:
+                raise KeyError(f"No ledger record with key {record_key}")
+            self._append_patch({"op": "delete", "key": record_key})
+        return old
+
+    def load_ledger(self, columns=None):
+        if not os.path.exists(self.ledger_path) or os.path.getsize(self.ledger_path) == 0:
+            return pd.DataFrame()
+        if columns is None:
+            return self._read_cached(copy=True)
+
+        if get_entry(self.ledger_path) is None:
+            # Cold start: read just these columns instead of parsing the whole ledger
+            projected = snapshot.read_projected(self.ledger_path, list(columns), normalize_ledger, concat_ledgers)
+            if projected is not None:
+                return projected
+        return self._read_cached(copy=False)[list(columns)].copy()
+
+    def ledger_view(self):
+        if not os.path.exists(self.ledger_path) or os.path.getsize(self.ledger_path) == 0:
+            return pd.DataFrame()
+        return self._read_cached(copy=False)
+
+    def version(self):
+        if not os.path.exists(self.ledger_path):
+            return None
+        patches = file_signature(self.patch_path) if os.path.exists(self.patch_path) else None
+        return (file_signature(self.ledger_path), patches)
+
+    def logical_version(self):
+        version = self.version()
+        if version is None or not os.path.exists(self.version_path):
+            return version
+        signature = file_signature(self.version_path)
+        cached_signature, compacted = self._compacted
+        if cached_signature != signature:
+            with open(self.version_path, 'r', encoding='utf-8') as f:
+                compacted = json.load(f)
+            self._compacted = (signature, compacted)
+        if _frozen(compacted["version"]) == version:
+            return _frozen(compacted["logical"])
+        return version
+
+    def append_records(self, records, sync=False):
+        """Append records to the ledger CSV without reading existing rows
+
+        The rows are written in one call under an exclusive file lock and
+        truncated away again if the write fails, so a batch lands whole or not
+        at all.
+        """
+        header = self.read_header()
+        if header and any(col not in header for col in LEDGER_COLUMNS):
+            # Older files may lack columns; widen the header once before appending
+            self.compact()
+            header = self.read_header()
+
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=header or LEDGER_COLUMNS, extrasaction='ignore', lineterminator='\n')
+        if not header:
+            writer.writeheader()
+        writer.writerows(with_record_keys(records))
+        payload = buffer.getvalue().encode('utf-8')
+
+        with self._ledger_lock() as f:
+            end = f.seek(0, os.SEEK_END)
+            if header and end:
+                f.seek(end - 1)
+                if f.read(1) not in (b"\n", b"\r"):
+                    payload = b"\n" + payload
+            try:
+                f.write(payload)
+                f.flush()
+                if sync:
+                    os.fsync(f.fileno())
+            except Exception:
+                f.truncate(end)
+                raise
+
+        self._rows_since_compaction += len(records)
+        if self._rows_since_compaction >= COMPACT_EVERY_ROWS:
+            self.compact_in_background()
+
+    def replace_ledger(self, df):
+        tmp_path = f"{self.ledger_path}.tmp"
+        with self._ledger_lock():
+            to_storage_frame(df).to_csv(tmp_path, index=False)
+            with _swapped_in(tmp_path, self.ledger_path):
+                if os.path.exists(self.patch_path):
+                    os.remove(self.patch_path)
+
+    def compact(self):
+        """Rewrite the ledger CSV with normalized columns, record keys and pending patches folded in
+
+        The ledger is parsed and rewritten without holding the write lock, so
+        saves and edits carry on meanwhile. Under the lock, held against other
+        processes too, the rows appended since are added to the new file
+        before it replaces the old one, and patches logged since stay in the
+        patch log.
+        """
+        if not os.path.exists(self.ledger_path):
+            self.initialize()
+            return
+
+        with self._ledger_lock() as f:
+            # Kept open until the swap, so no file written meanwhile can take over its inode
+            original = open(self.ledger_path, 'rb')
+            f.seek(0)
+            data = f.read()
+            patches = self._read_patch_log()
+
+        with original:
+            df = _read_raw(data)
+            header = list(df.columns)
+            columns = LEDGER_COLUMNS + [col for col in header if col not in LEDGER_COLUMNS]
+            df = _raw_rows(df, columns)
+            if patches:
+                df = apply_patches(df, patches, set_values=_set_raw_values)
+            tmp_path = f"{self.ledger_path}.{os.getpid()}.{threading.get_ident()}.compact.tmp"
+            df.to_csv(tmp_path, index=False)
+
+            with self._ledger_lock() as f:
+                current = self._read_patch_log()
+                if not os.path.sameopenfile(original.fileno(), f.fileno()) or current[:len(patches)] != patches:
+                    # Replaced by another writer meanwhile; its file is as new as this one
+                    os.remove(tmp_path)
+                    return
+                f.seek(len(data))
+                tail = f.read()
+                if tail.strip():
+                    _raw_rows(_read_raw(tail, header=None, names=header), columns).to_csv(
+                        tmp_path, mode='a', header=False, index=False
+                    )
+                logical = self.logical_version()
+                ledger_signature = file_signature(tmp_path)
+                with _swapped_in(tmp_path, self.ledger_path):
+                    # Trimmed only after the rewrite; replaying patches on a folded ledger is harmless
+                    self._write_patches(current[len(patches):])
+                    patch_signature = file_signature(self.patch_path) if os.path.exists(self.patch_path) else None
+                    _write_json(self.version_path, {"version": (ledger_signature, patch_signature), "logical": logical})
+                self._rows_since_compaction = 0
+
+    def _write_patches(self, patches):
+        """Atomically replace the patch log with the given patches, removing it when there are none"""
+        if not patches:
+            if os.path.exists(self.patch_path):
+                os.remove(self.patch_path)
+            return
+        tmp_path = f"{self.patch_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(patch) + "\n" for patch in patches)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.patch_path)
+
+    def _compact_quietly(self):
+        try:
+            self.compact()
+        except Exception:
+            logger.exception("Failed to compact the ledger %s", self.ledger_path)
+        finally:
+            self._compaction_lock.release()
+
+    def compact_in_background(self):
+        """Fold the patch log into the ledger on a background thread unless one is running"""
+        if self._compaction_lock.acquire(blocking=False):
+            threading.Thread(target=self._compact_quietly, daemon=True).start()
+
+    def wait_for_compaction(self):
+        """Block until a running background compaction has finished"""
+        with self._compaction_lock:
+            pass
+
+    def _read_fees_file(self):
+        """Parse student_fees.json, reusing the last parse while the file is unchanged"""
+        if not os.path.exists(self.fees_path):
+            return {}
+        signature = file_signature(self.fees_path)
+        cached_signature, fees = self._fees_base
+        if cached_signature != signature:
+            with open(self.fees_path, 'r') as f:
+                fees = json.load(f)
+            count_bytes_read(signature[3])
+            self._fees_base = (signature, fees)
+        return fees
+
+    def _read_fees_log(self):
+        if not os.path.exists(self.fees_log_path):
+            return []
+        with open(self.fees_log_path, 'r', encoding='utf-8') as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+        count_bytes_read(os.path.getsize(self.fees_log_path))
+        return entries
+
+    def read_fees(self):
+        fees = dict(self._read_fees_file())
+        for entry in self._read_fees_log():
+            if entry["op"] == "delete":
+                fees.pop(entry["key"], None)
+            else:
+                fees[entry["key"]] = entry["value"]
+        return fees
+
+    def fees_version(self):
+        return tuple(
+            file_signature(path) if os.path.exists(path) else None
+            for path in (self.fees_path, self.fees_log_path)
+        )
+
+    def _write_fees_file(self, fees_data):
+        # Replacing the file gives it a new inode, so cached reads notice even same-size rewrites
+        tmp_path = f"{self.fees_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(fees_data, f, indent=4)
+        os.replace(tmp_path, self.fees_path)
+
+    def _open_fees_log(self):
+        """Open the fee settings log locked against other processes' writes and compactions"""
+        f = open(self.fees_log_path, 'a+', encoding='utf-8')
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        return f
+
+    def save_fees(self, fees_data):
+        with self._lock, self._open_fees_log() as log:
+            self._write_fees_file(fees_data)
+            log.truncate(0)
+
+    def _log_fees_change(self, entry):
+        with self._lock, self._open_fees_log() as log:
+            log.write(json.dumps(entry) + "\n")
+            log.flush()
+            os.fsync(log.fileno())
+            log.seek(0)
+            if sum(1 for line in log if line.strip()) >= FEES_COMPACT_EVERY:
+                # Fold the log into the JSON file while still holding its lock
+                self._write_fees_file(self.read_fees())
+                log.truncate(0)
+
+    def upsert_fees(self, student_id, details):
+        self._log_fees_change({"op": "upsert", "key": student_id, "value": details})
+
+    def delete_fees(self, student_id):
+        self._log_fees_change({"op": "delete", "key": student_id})
+
+class SQLiteBackend(StorageBackend):
+    """Ledger and fee settings in one SQLite database with indexed lookups"""
+    name = "sqlite"
+
+    def __init__(self, db_path=SQLITE_DB):
+        self.db_path = db_path
+
+    def connect(self):
+        """Open a connection; one per call keeps Streamlit session threads independent"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def initialize(self):
+        is_new = not os.path.exists(self.db_path)
+        column_defs = ", ".join(
+            f'"{col}" REAL' if col in AMOUNT_COLUMNS else f'"{col}" TEXT'
+            for col in LEDGER_COLUMNS
+        )
+        with closing(self.connect()) as conn, conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS fees ({column_defs})")
+            existing = [row[1] for row in conn.execute("PRAGMA table_info(fees)")]
+            if RECORD_KEY not in existing:
+                # Databases created before record keys existed get one per row once
+                conn.execute(f'ALTER TABLE fees ADD COLUMN "{RECORD_KEY}" TEXT')
+                conn.execute(f"""UPDATE fees SET "{RECORD_KEY}" = 'r' || lower(hex(randomblob(6)))
+                                 WHERE "{RECORD_KEY}" IS NULL""")
+            conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS idx_fees_record_key ON fees ("{RECORD_KEY}")')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_fees_id ON fees ("ID")')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_fees_academic_year ON fees ("Academic Year")')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_fees_month ON fees ("Month")')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_fees_class_category ON fees ("Class Category")')
+            conn.execute("CREATE TABLE IF NOT EXISTS student_fees (student_id TEXT PRIMARY KEY, data TEXT NOT NULL)")
+
+        if is_new:
+            self.import_files()
+
+    def version(self):
+        return tuple(
+            file_signature(path) if os.path.exists(path) else None
+            for path in (self.db_path, f"{self.db_path}-wal")
+        )
+
+    def import_files(self, ledger_path=FEES_CSV, fees_path=STUDENT_FEES_JSON):
+        """Copy an existing CSV ledger, with its pending patches, and JSON fee settings into the database"""
+        source = CSVBackend(ledger_path, fees_path)
+        df = source.load_ledger()
+        if not df.empty:
+            self.append_records(to_storage_frame(df).to_dict("records"))
+        if os.path.exists(fees_path):
+            fees_data = source.load_fees()
+            if fees_data:
+                self.save_fees(fees_data)
+
+    def load_ledger(self, columns=None):
+        selected = ", ".join(f'"{col}"' for col in columns) if columns is not None else "*"
+        with closing(self.connect()) as conn:
+            df = normalize_ledger(pd.read_sql_query(f"SELECT {selected} FROM fees", conn))
+        return df if columns is None else df[list(columns)]
+
+    def insert_rows(self, conn, records):
+        """Insert ledger records on an open connection"""
+        placeholders = ", ".join("?" for _ in LEDGER_COLUMNS)
+        columns = ", ".join(f'"{col}"' for col in LEDGER_COLUMNS)
+        rows = [
+            tuple(None if pd.isna(record.get(col)) else record.get(col) for col in LEDGER_COLUMNS)
+            for record in with_record_keys(records)
+        ]
+        conn.executemany(f"INSERT INTO fees ({columns}) VALUES ({placeholders})", rows)
+
+    def append_records(self, records, sync=False):
+        with closing(self.connect()) as conn:
+            if sync:
+                conn.execute("PRAGMA synchronous=FULL")
+            with conn:
+                self.insert_rows(conn, records)
+
+    def replace_ledger(self, df):
+        with closing(self.connect()) as conn, conn:
+            conn.execute("DELETE FROM fees")
+            self.insert_rows(conn, to_storage_frame(df).to_dict("records"))
+
+    def query_records(self, filters=None, sort_by="Date", descending=True, offset=0, limit=50):
+        if sort_by not in LEDGER_COLUMNS:
+            raise ValueError(f"Cannot sort by '{sort_by}'")
+        where, params = _sql_filters(filters or {})
+        direction = "DESC" if descending else "ASC"
+        with closing(self.connect()) as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM fees{where}", params).fetchone()[0]
+            df = pd.read_sql_query(
+                f'SELECT * FROM fees{where} ORDER BY "{sort_by}" IS NULL, {_sql_order(sort_by)} {direction}, rowid '
+                f'LIMIT ? OFFSET ?', conn, params=params + [limit, offset]
+            )
+        return normalize_ledger(df), total
+
+    def iter_records(self, filters=None, sort_by="Date", descending=True, chunk_rows=EXPORT_CHUNK_ROWS):
+        if sort_by not in LEDGER_COLUMNS:
+            raise ValueError(f"Cannot sort by '{sort_by}'")
+        where, params = _sql_filters(filters or {})
+        direction = "DESC" if descending else "ASC"
+        with closing(self.connect()) as conn:
+            # A single cursor read in chunks, so only one chunk is in memory at a time
+            for chunk in pd.read_sql_query(
+                f'SELECT * FROM fees{where} ORDER BY "{sort_by}" IS NULL, {_sql_order(sort_by)} {direction}, rowid',
+                conn, params=params, chunksize=chunk_rows
+            ):
+                yield normalize_ledger(chunk)
+
+    def find_record(self, record_key):
+        with closing(self.connect()) as conn:
+            df = pd.read_sql_query(f'SELECT * FROM fees WHERE "{RECORD_KEY}" = ?', conn, params=[record_key])
+        return normalize_ledger(df).iloc[0].to_dict() if len(df) else None
+
+    def update_record(self, record_key, values):
+        old = self.find_record(record_key)
+        if old is None:
+            raise KeyError(f"No ledger record with key {record_key}")
+        values = to_storage_values(values)
+        assignments = ", ".join(f'"{col}" = ?' for col in values)
+        with closing(self.connect()) as conn, conn:
+            conn.execute(f'UPDATE fees SET {assignments} WHERE "{RECORD_KEY}" = ?',
+                         list(values.values()) + [record_key])
+        return old
+
+    def delete_record(self, record_key):
+        old = self.find_record(record_key)
+        if old is None:
+            raise KeyError(f"No ledger record with key {record_key}")
+        with closing(self.connect()) as conn, conn:
+            conn.execute(f'DELETE FROM fees WHERE "{RECORD_KEY}" = ?', [record_key])
+        return old
+
+    def student_records(self, student_id, academic_year=None):
+        query = 'SELECT * FROM fees WHERE "ID" = ?'
+        params = [student_id]
+        if academic_year is not None:
+            query += ' AND "Academic Year" = ?'
+            params.append(academic_year)
+        with closing(self.connect()) as conn:
+            return normalize_ledger(pd.read_sql_query(query, conn, params=params))
+
+    def compact(self):
+        with closing(self.connect()) as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            conn.execute("VACUUM")
+
+    def read_fees(self):
+        with closing(self.connect()) as conn:
+            rows = conn.execute("SELECT student_id, data FROM student_fees").fetchall()
+        return {student_id: json.loads(data) for student_id, data in rows}
+
+    def fees_version(self):
+        return self.version()
+
+    def upsert_fees(self, student_id, details):
+        with closing(self.connect()) as conn, conn:
+            conn.execute(
+                "INSERT INTO student_fees (student_id, data) VALUES (?, ?) "
+                "ON CONFLICT(student_id) DO UPDATE SET data = excluded.data",
+                (student_id, json.dumps(details))
+            )
+
+    def delete_fees(self, student_id):
+        with closing(self.connect()) as conn, conn:
+            conn.execute("DELETE FROM student_fees WHERE student_id = ?", (student_id,))
+
+    def save_fees(self, fees_data):
+        with closing(self.connect()) as conn, conn:
+            conn.execute("DELETE FROM student_fees")
+            conn.executemany(
+                "INSERT INTO student_fees (student_id, data) VALUES (?, ?)",
+                [(student_id, json.dumps(details)) for student_id, details in fees_data.items()]
+            )
+
+def partition_file_name(academic_year):
+    """File name stem of an academic year's partition"""
+    return re.sub(r"[^\w.-]", "_", str(academic_year).strip()) or UNASSIGNED_PARTITION
+
+def partition_names(df):
+    """Partition of each ledger row: its Academic Year, else the academic year its Date falls in"""
+    names = pd.Series(UNASSIGNED_PARTITION, index=df.index, dtype=object)
+    known = pd.Series(False, index=df.index)
+    if "Academic Year" in df.columns:
+        years = df["Academic Year"].astype(object)
+        known = years.notna() & (years.astype(str).str.strip() != "")
+        names[known] = years[known].map(partition_file_name)
+    if "Date" in df.columns:
+        dates = parse_dates(df["Date"])
+        dated = ~known & dates.notna()
+        names[dated] = dates[dated].map(get_academic_year)
+    return names
+
+class ClosedPartition(StorageBackend):
+    """One closed academic year: a compressed Parquet file that is only ever read"""
+    name = "closed"
+
+    def __init__(self, path):
+        self.path = path
+        self._cached = (None, None)
+
+    def version(self):
+        return file_signature(self.path)
+
+    def ledger_view(self):
+        signature = self.version()
+        cached_signature, df = self._cached
+        if cached_signature != signature:
+            df = normalize_ledger(pq.read_table(self.path).to_pandas())
+            count_bytes_read(signature[3])
+            self._cached = (signature, df)
+        return df
+
+    def load_ledger(self, columns=None):
+        if columns is None or self._cached[0] == self.version():
+            df = self.ledger_view()
+            return (df if columns is None else df[list(columns)]).copy()
+        # Parquet is columnar, so a projection only reads the wanted columns
+        available = [col for col in columns if col in pq.read_schema(self.path).names]
+        count_bytes_read(parquet_bytes(self.path, available))
+        return normalize_ledger(pq.read_table(self.path, columns=available).to_pandas())[list(columns)]
+
+class PartitionedBackend(CSVBackend):
+    """Ledger split into one partition per academic year, fee settings as in the CSV backend
+
+    Open years are ledger CSVs under ledger/ with everything the CSV backend
+    does for one file (tail parsing, snapshots, patch logs), so appends,
+    edits and compactions only touch the current year's file. Closed years
+    are zstd-compressed Parquet files that refuse writes. Queries for one
+    academic year read only that partition.
+    """
+    name = "partitioned"
+
+    def __init__(self, ledger_dir=LEDGER_DIR, fees_path=STUDENT_FEES_JSON, legacy_path=FEES_CSV):
+        super().__init__(legacy_path, fees_path)
+        self.ledger_dir = ledger_dir
+        self._partitions = {}
+        self._combined = (None, None)
+
+    def initialize(self):
+        os.makedirs(self.ledger_dir, exist_ok=True)
+        if not self.partitions() and os.path.exists(self.ledger_path) and os.path.getsize(self.ledger_path) > 0:
+            self.import_ledger(self.ledger_path)
+        if not os.path.exists(self.fees_path):
+            with open(self.fees_path, 'w') as f:
+                json.dump({}, f)
+        self.close_stale_years()
+
+    def import_ledger(self, ledger_path):
+        """Split an existing single-file CSV ledger into academic year partitions; the file is left in place"""
+        source = CSVBackend(ledger_path, self.fees_path)
+        source.compact()
+        df = source.load_ledger()
+        if df.empty:
+            return
+        for name, rows in df.groupby(partition_names(df), sort=False):
+            self._partition(name, closed=False).replace_ledger(rows)
+
+    def _partition(self, name, closed):
+        with self._lock:
+            partition = self._partitions.get((name, closed))
+            if partition is None:
+                if closed:
+                    partition = ClosedPartition(os.path.join(self.ledger_dir, f"{name}{CLOSED_SUFFIX}"))
+                else:
+                    partition = CSVBackend(os.path.join(self.ledger_dir, f"{name}.csv"), self.fees_path)
+                self._partitions[(name, closed)] = partition
+            return partition
+
+    def partitions(self):
+        """Partitions on disk by name, oldest academic year first
+
+        A year that has a closed file is closed, even if a CSV of it was
+        left behind by an interrupted close.
+        """
+        closed = {}
+        if os.path.isdir(self.ledger_dir):
+            for file_name in os.listdir(self.ledger_dir):
+                if file_name.endswith(CLOSED_SUFFIX):
+                    closed[file_name[:-len(CLOSED_SUFFIX)]] = True
+                elif file_name.endswith(".csv"):
+                    closed.setdefault(file_name[:-len(".csv")], False)
+        return {name: self._partition(name, closed[name]) for name in sorted(closed)}
+
+    def _writable(self, name):
+        """Return the open partition for a name, refusing closed years"""
+        if os.path.exists(os.path.join(self.ledger_dir, f"{name}{CLOSED_SUFFIX}")):
+            raise ValueError(f"Academic year {name} is closed and can no longer be changed")
+        return self._partition(name, closed=False)
+
+    def version(self):
+        return tuple((name, partition.version()) for name, partition in self.partitions().items())
+
+    def logical_version(self):
+        return tuple((name, partition.logical_version()) for name, partition in self.partitions().items())
+
+    def ledger_view(self):
+        version = self.version()
+        cached_version, df = self._combined
+        if df is None or cached_version != version:
+            df = self._concat(partition.ledger_view() for partition in self.partitions().values())
+            self._combined = (version, df)
+        return df
+
+    def _concat(self, frames):
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return pd.DataFrame()
+        df = concat_ledgers(frames)
+        if len(frames) > 1:
+            # Each partition numbers its rows from zero; the combined view needs unique labels
+            df.index = pd.RangeIndex(len(df))
+        return df
+
+    def load_ledger(self, columns=None):
+        if columns is None:
+            return self.ledger_view().copy()
+        return self._concat(partition.load_ledger(columns) for partition in self.partitions().values())
+
+    def _pruned(self, filters):
+        """The partition an academic year filter selects, None when there is no such filter
+
+        Returns False for a year that has no partition.
+        """
+        year = (filters or {}).get("Academic Year")
+        if year is None:
+            return None
+        return self.partitions().get(partition_file_name(year), False)
+
+    def query_records(self, filters=None, sort_by="Date", descending=True, offset=0, limit=50):
+        partition = self._pruned(filters)
+        if partition is False:
+            return pd.DataFrame(columns=LEDGER_COLUMNS), 0
+        if partition is not None:
+            return partition.query_records(filters, sort_by, descending, offset, limit)
+        return super().query_records(filters, sort_by, descending, offset, limit)
+
+    def iter_records(self, filters=None, sort_by="Date", descending=True, chunk_rows=EXPORT_CHUNK_ROWS):
+        partition = self._pruned(filters)
+        if partition is False:
+            return iter(())
+        if partition is not None:
+            return partition.iter_records(filters, sort_by, descending, chunk_rows)
+        return super().iter_records(filters, sort_by, descending, chunk_rows)
+
+    def student_records(self, student_id, academic_year=None):
+        if academic_year is None:
+            return super().student_records(student_id)
+        partition = self._pruned({"Academic Year": academic_year})
+        if not partition:
+            return pd.DataFrame(columns=LEDGER_COLUMNS)
+        return partition.student_records(student_id, academic_year)
+
+    def _locate(self, record_key):
+        """Return the partition name, partition and current values of a record, newest year first"""
+        for name, partition in reversed(self.partitions().items()):
+            record = partition.find_record(record_key)
+            if record is not None:
+                return name, partition, record
+        raise KeyError(f"No ledger record with key {record_key}")
+
+    def find_record(self, record_key):
+        try:
+            return self._locate(record_key)[2]
+        except KeyError:
+            return None
+
+    def append_records(self, records, sync=False):
+        """Append records to their academic year partitions; nothing is written if any year is closed"""
+        records = with_record_keys(records)
+        if not records:
+            return
+        names = partition_names(pd.DataFrame(records))
+        groups = {}
+        for name, record in zip(names, records):
+            groups.setdefault(name, []).append(record)
+        partitions = {name: self._writable(name) for name in groups}
+        for name, group in groups.items():
+            partitions[name].append_records(group, sync)
+
+    def update_record(self, record_key, values):
+        with self._lock:
+            name, partition, old = self._locate(record_key)
+            self._writable(name)
+            updated = to_storage_values({**old, **values})
+            target = partition_names(pd.DataFrame([updated])).iloc[0]
+            if target == name:
+                return partition.update_record(record_key, values)
+            # A changed academic year moves the record, keeping its key
+            self._writable(target).append_records([updated], sync=True)
+            partition.delete_record(record_key)
+            return old
+
+    def delete_record(self, record_key):
+        with self._lock:
+            name, partition, _ = self._locate(record_key)
+            return self._writable(name).delete_record(record_key)
+
+    def replace_ledger(self, df):
+        with self._lock:
+            names = partition_names(df) if not df.empty else pd.Series(dtype=object)
+            partitions = self.partitions()
+            for name, partition in partitions.items():
+                if isinstance(partition, ClosedPartition):
+                    stored = set(partition.ledger_view()[RECORD_KEY].dropna())
+                    if set(df.loc[names == name, RECORD_KEY].dropna()) != stored:
+                        raise ValueError(f"Academic year {name} is closed and can no longer be changed")
+            for name in set(names) | set(partitions):
+                if not isinstance(partitions.get(name), ClosedPartition):
+                    self._partition(name, closed=False).replace_ledger(df[names == name])
+
+    def compact(self):
+        for partition in self.partitions().values():
+            partition.compact()
+
+    def wait_for_compaction(self):
+        super().wait_for_compaction()
+        with self._lock:
+            partitions = [partition for partition in self._partitions.values() if isinstance(partition, CSVBackend)]
+        for partition in partitions:
+            partition.wait_for_compaction()
+
+    def close_year(self, academic_year):
+        """Freeze an academic year into a compressed read-only Parquet file; returns whether it was closed
+
+        The current academic year can't be closed.
+        """
+        if pq is None:
+            raise RuntimeError("Closing academic years requires pyarrow")
+        name = partition_file_name(academic_year)
+        if name == get_academic_year(pd.Timestamp.now()):
+            raise ValueError(f"Academic year {name} is still in progress")
+        with self._lock:
+            partition = self.partitions().get(name)
+            if not isinstance(partition, CSVBackend):
+                return False
+            partition.compact()
+            df = to_storage_frame(partition.load_ledger()) if partition.version() else pd.DataFrame(columns=LEDGER_COLUMNS)
+            closed_path = os.path.join(self.ledger_dir, f"{name}{CLOSED_SUFFIX}")
+            tmp_path = f"{closed_path}.tmp"
+            pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp_path, compression="zstd")
+            os.replace(tmp_path, closed_path)
+            # The closed file wins from here on; the CSV and its side files are just removed
+            for path in (partition.ledger_path, partition.patch_path, partition.version_path,
+                         snapshot.snapshot_path(partition.ledger_path)):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._partitions.pop((name, False), None)
+        return True
+
+    def close_stale_years(self):
+        """Close the partitions of academic years older than the OPEN_ACADEMIC_YEARS most recent ones"""
+        if pq is None:
+            return
+        first_open = int(get_academic_year(pd.Timestamp.now())[:4]) - OPEN_ACADEMIC_YEARS + 1
+        for name, partition in self.partitions().items():
+            start = re.match(r"(\d{4})-\d{4}$", name)
+            if start and int(start.group(1)) < first_open and isinstance(partition, CSVBackend):
+                self.close_year(name)
+
+BACKENDS = {
+    CSVBackend.name: CSVBackend,
+    SQLiteBackend.name: SQLiteBackend,
+    PartitionedBackend.name: PartitionedBackend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend():
+    """Return the process-wide storage backend selected by FEES_STORAGE_BACKEND"""
+    global _backend
+    name = os.environ.get(BACKEND_ENV_VAR, CSVBackend.name).strip().lower()
+    with _backend_lock:
+        if _backend is None or _backend.name != name:
+            if name not in BACKENDS:
+                raise ValueError(f"Unknown storage backend '{name}'. Choose one of: {', '.join(BACKENDS)}")
+            _backend = BACKENDS[name]()
+        return _backend
+
+def reset_backend():
+    """Forget the process-wide backend so the next get_backend() starts from its files"""
+    global _backend
+    with _backend_lock:
+        if isinstance(_backend, CSVBackend):
+            _backend.wait_for_compaction()
+        _backend = None
@@ -0,0 +1,23 @@
+#type:ignore
+import functools
+import os
+import re
+import streamlit as st
+
+# Stylesheets shipped with the app, one .css file per name
+STYLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "styles")
+
+@functools.lru_cache(maxsize=None)
+def stylesheet(name):
+    """The minified <style> block of styles/<name>.css, built once per process"""
+    with open(os.path.join(STYLES_DIR, f"{name}.css"), 'r', encoding='utf-8') as f:
+        css = f.read()
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    return f"<style>{css.strip()}</style>"
+
+def hide_streamlit_elements():
+    """Hide only the GitHub icon while keeping deploy button"""
+    st.markdown(stylesheet("app"), unsafe_allow_html=True)
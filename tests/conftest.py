@@ -0,0 +1,30 @@
+#type:ignore
+import pytest
+from streamlit import config as streamlit_config
+from streamlit import logger as streamlit_logger
+import database
+import display
+from storage import BACKEND_ENV_VAR, BACKENDS
+
+# st.error outside a Streamlit run only logs bare-mode warnings
+streamlit_config.set_option("logger.level", "error")
+streamlit_logger.set_log_level("error")
+
+@pytest.fixture
+def school(tmp_path, monkeypatch):
+    """An empty school data directory as the working directory, with cold caches"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("FEES_PERF_LOG", "")
+    monkeypatch.setenv(BACKEND_ENV_VAR, "csv")
+    database.reset_caches()
+    display.clear_cache()
+    yield tmp_path
+    database.reset_caches()
+    display.clear_cache()
+
+@pytest.fixture(params=list(BACKENDS))
+def backend_name(request, school, monkeypatch):
+    """Run a test once per storage backend"""
+    monkeypatch.setenv(BACKEND_ENV_VAR, request.param)
+    database.ensure_initialized()
+    return request.param
@@ -0,0 +1,25 @@
+#type:ignore
+import database
+from storage import BACKEND_ENV_VAR
+
+def receipt(name, class_category="Class 5", month="APRIL", received=2000, academic_year="2025-2026", **values):
+    """One ledger record shaped like the fees entry page writes them"""
+    record = {
+        "ID": database.generate_student_id(name, class_category), "Student Name": name,
+        "Class Category": class_category, "Class Section": "A", "Month": month,
+        "Monthly Fee": 2000, "Annual Charges": 0, "Admission Fee": 0,
+        "Received Amount": received, "Payment Method": "Cash", "Date": "2025-04-10",
+        "Signature": "Tester", "Entry Timestamp": "2025-04-10 09:30:00",
+        "Academic Year": academic_year,
+    }
+    record.update(values)
+    return record
+
+def switch_backend(monkeypatch, name):
+    """Select another backend as a restarted app would, importing the current files"""
+    monkeypatch.setenv(BACKEND_ENV_VAR, name)
+    database.reset_caches()
+    database.ensure_initialized()
+
+def names(df):
+    return sorted(df["Student Name"].astype(str))
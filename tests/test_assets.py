@@ -0,0 +1,32 @@
+#type:ignore
+import os
+import pytest
+import assets
+
+pytestmark = pytest.mark.skipif(assets.Image is None, reason="Pillow is not installed")
+
+@pytest.fixture
+def static_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(assets, "STATIC_DIR", str(tmp_path / "static"))
+    assets._variant.cache_clear()
+    yield tmp_path / "static"
+    assets._variant.cache_clear()
+
+def test_existing_variant_is_not_encoded_again(static_dir, monkeypatch):
+    signature = assets.file_signature(assets.LOGO_PATH)
+    name = assets._variant(assets.LOGO_PATH, signature, (40, 40))
+    assert os.path.exists(static_dir / name)
+
+    # A fresh process finds the file by its name and leaves the image alone
+    assets._variant.cache_clear()
+    def encode(*args):
+        raise AssertionError("encoded an existing variant")
+    monkeypatch.setattr(assets, "_encode", encode)
+    assert assets._variant(assets.LOGO_PATH, signature, (40, 40)) == name
+
+def test_variant_name_follows_the_settings(static_dir):
+    signature = assets.file_signature(assets.LOGO_PATH)
+    small = assets._variant(assets.LOGO_PATH, signature, (40, 40))
+    large = assets._variant(assets.LOGO_PATH, signature, (80, 80))
+    assert small != large
+    assert sorted(os.listdir(static_dir)) == sorted([small, large])
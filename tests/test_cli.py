@@ -0,0 +1,61 @@
+#type:ignore
+import multiprocessing
+import pandas as pd
+import pytest
+import cli
+import database
+import storage
+from storage import get_backend
+from helpers import receipt
+
+def test_integrity_problems(school):
+    database.ensure_initialized()
+    database.save_to_csv([receipt("Sara"), receipt("Ali", month="MAY")])
+    df = database.load_data()
+    assert cli.integrity_problems(df, get_backend()) == ([], [])
+
+    broken = df.copy()
+    broken.loc[1, "Record ID"] = broken.loc[0, "Record ID"]
+    broken["Received Amount"] = [-5, 2000]
+    broken["Academic Year"] = broken["Academic Year"].cat.add_categories(["2025-2027"])
+    broken.loc[0, "Academic Year"] = "2025-2027"
+    broken.loc[1, "ID"] = "32325559"
+    errors, warnings = cli.integrity_problems(broken, get_backend())
+    assert errors == [
+        "1 records with a duplicate record key",
+        "1 records with a negative Received Amount",
+        "1 records with a malformed Academic Year",
+    ]
+    assert warnings == ["1 students whose ID doesn't match their name and class"]
+
+def test_check_and_report_commands(school, capsys):
+    database.ensure_initialized()
+    database.save_to_csv([receipt("Sara"), receipt("Ali", month="MAY")])
+    assert cli.main(["--data-dir", str(school), "check"]) == 0
+
+    assert cli.main(["report", "defaulters", "--year", "2025-2026", "--month", "MAY", "--workers", "1"]) == 0
+    defaulters = pd.read_csv(school / "batch_reports" / "defaulters-2025-2026-may.csv")
+    assert defaulters["Student Name"].tolist() == ["Sara"]
+    assert "Checked 2 records" in capsys.readouterr().out
+
+def _save_receipts(count):
+    backend = storage.CSVBackend()
+    for i in range(count):
+        backend.append_records([receipt(f"Student {i}")], sync=True)
+
+@pytest.mark.skipif(storage.fcntl is None, reason="needs flock")
+def test_compact_command_while_the_app_saves(school, capsys):
+    database.ensure_initialized()
+    database.save_to_csv([receipt(f"Sibling {i}") for i in range(500)])
+    app = multiprocessing.get_context("fork").Process(target=_save_receipts, args=(300,))
+    app.start()
+    while app.is_alive():
+        assert cli.main(["compact"]) == 0
+    app.join()
+    assert app.exitcode == 0
+
+    database.reset_caches()
+    df = database.load_data()
+    assert len(df) == 800 and df["Record ID"].is_unique
+    assert "Compacted the csv ledger" in capsys.readouterr().out
+    assert cli.main(["compact", "--close-years"]) == 1
@@ -0,0 +1,51 @@
+#type:ignore
+import json
+import pandas as pd
+from collection_cube import CollectionCube
+from report_data import student_counts
+from schema import normalize_ledger, to_storage_frame
+from helpers import receipt
+
+def ledger(*records):
+    return normalize_ledger(to_storage_frame(pd.DataFrame(records)))
+
+def test_totals_follow_applied_records(school):
+    rows = [receipt("Sara"), receipt("Ali", month="MAY", received=1500), receipt("Omar", "KGI")]
+    cube = CollectionCube()
+    cube.rebuild(ledger(*rows[:2]), "v1")
+    cube.apply(rows[2:])
+    cube.apply(rows[:1], sign=-1)
+
+    assert cube.totals()["Records"] == 2
+    assert cube.totals()["Received Amount"] == 3500
+    assert cube.totals(**{"Class Category": "Class 5"}) == {
+        "Records": 1, "Monthly Fee": 2000, "Annual Charges": 0, "Admission Fee": 0, "Received Amount": 1500,
+    }
+    assert cube.by("Month")["Records"].to_dict() == {"APRIL": 1, "MAY": 1}
+
+def test_persisted_cells_stay_fixed_size(school):
+    cube = CollectionCube()
+    cube.rebuild(ledger(*(receipt(f"Student {i}") for i in range(50))), "v1")
+    cube.flush()
+    with open(cube.path, 'r', encoding='utf-8') as f:
+        cells = json.load(f)["cells"]
+    assert cells == [[["2025-2026", "Class 5", "APRIL", "Cash"], 50, [100000, 0, 0, 100000]]]
+
+    loaded = CollectionCube()
+    assert loaded.load("v1") and not loaded.load("v2")
+    assert loaded.totals() == cube.totals()
+
+def test_save_failure_is_logged(school, caplog):
+    cube = CollectionCube(path=str(school / "missing" / "cube.json"))
+    cube.flush()
+    assert "Failed to save the collection cube" in caplog.text
+
+def test_student_counts():
+    df = ledger(
+        receipt("Sara"), receipt("Sara", month="MAY"), receipt("Ali", month="ANNUAL", **{"Monthly Fee": 0}),
+        receipt("Ali"), receipt("Omar", "KGI"),
+    )
+    counts = student_counts(df)
+    assert counts.loc["Class 5"].tolist() == [2, 1]
+    assert counts.loc["KGI"].tolist() == [1, 0]
+    assert counts.reindex(["Nursery"], fill_value=0).iloc[0].tolist() == [0, 0]
@@ -0,0 +1,33 @@
+#type:ignore
+import numpy as np
+import pandas as pd
+import pytest
+import database
+from exports import build_export, ledger_sheets, pq
+from schema import normalize_ledger, to_storage_frame
+from helpers import receipt
+
+def chunk(*records):
+    return normalize_ledger(to_storage_frame(pd.DataFrame(records)))
+
+@pytest.mark.skipif(pq is None, reason="pyarrow is not installed")
+def test_parquet_column_empty_in_the_first_chunk(school):
+    first = chunk(receipt("Sara", Signature=np.nan, **{"Class Section": np.nan}))
+    second = chunk(receipt("Ali"), receipt("Omar", Date=np.nan))
+    path = build_export("Parquet", [("Records", lambda: [first, second])])
+
+    df = pd.read_parquet(path)
+    assert df["Student Name"].tolist() == ["Sara", "Ali", "Omar"]
+    assert pd.isna(df["Signature"].iloc[0]) and df["Signature"].iloc[1] == "Tester"
+    assert df["Received Amount"].tolist() == [2000, 2000, 2000]
+    assert pd.api.types.is_datetime64_any_dtype(df["Date"]) and pd.isna(df["Date"].iloc[2])
+
+@pytest.mark.parametrize("fmt", ["CSV", "Parquet"])
+def test_ledger_export_round_trip(backend_name, fmt):
+    if fmt == "Parquet" and pq is None:
+        pytest.skip("pyarrow is not installed")
+    database.save_to_csv([receipt("Sara"), receipt("S107", ID="32325559", month="MAY")])
+    path = build_export(fmt, ledger_sheets({"Academic Year": "2025-2026"}, sort_by="Month", descending=False))
+
+    df = pd.read_parquet(path) if fmt == "Parquet" else pd.read_csv(path, dtype={"ID": str})
+    assert df["ID"].tolist() == [receipt("Sara")["ID"], "32325559"]
@@ -0,0 +1,45 @@
+#type:ignore
+import pytest
+import database
+import snapshot
+from storage import FEES_CSV
+from helpers import receipt
+
+# Generated IDs that a type-guessing CSV reader would take for an integer and a float
+NUMBER_LIKE_IDS = ["32325559", "7067E261"]
+
+@pytest.mark.parametrize("student_id", NUMBER_LIKE_IDS)
+def test_appended_ids_stay_text(backend_name, student_id):
+    database.save_to_csv([receipt("Sara")])
+    database.load_data()
+    # Parsed on its own as the tail appended to the cached ledger
+    database.save_to_csv([receipt("S107", ID=student_id)])
+
+    df = database.load_data()
+    assert df["ID"].tolist() == [receipt("Sara")["ID"], student_id]
+    assert len(database.load_student_records(student_id, "2025-2026")) == 1
+    assert database.get_payment_status(student_id, "2025-2026").unpaid_months()[0] == "MAY"
+
+@pytest.mark.parametrize("student_id", NUMBER_LIKE_IDS)
+def test_number_like_ids_in_the_first_rows(school, student_id):
+    database.ensure_initialized()
+    database.save_to_csv([receipt("S107", ID=student_id, Signature="0042")])
+    database.reset_caches()
+
+    df = database.load_data()
+    assert df["ID"].tolist() == [student_id]
+    assert df["Signature"].tolist() == ["0042"]
+
+@pytest.mark.skipif(snapshot.pq is None, reason="pyarrow is not installed")
+def test_projected_read_keeps_tail_ids_text(school):
+    database.ensure_initialized()
+    database.save_to_csv([receipt("Sara")])
+    database.load_data()
+    # The first read writes the snapshot in the background
+    snapshot.reset()
+    assert snapshot.read_metadata(FEES_CSV)["raw_rows"] == 1
+    database.save_to_csv([receipt("S107", ID="32325559")])
+
+    database.reset_caches()
+    df = database.load_data(["ID", "Month"])
+    assert df["ID"].tolist() == [receipt("Sara")["ID"], "32325559"]
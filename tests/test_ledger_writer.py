@@ -0,0 +1,58 @@
+#type:ignore
+import threading
+import pytest
+from ledger_writer import LedgerWriter
+
+class SlowLedger:
+    """A commit_batch that holds its first batch until released"""
+
+    def __init__(self):
+        self.batches = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, records):
+        self.started.set()
+        self.release.wait(5)
+        self.batches.append(records)
+
+def submit_in_background(writer, records, **options):
+    results = []
+    thread = threading.Thread(target=lambda: results.append(writer.submit(records, **options)))
+    thread.start()
+    return thread, results
+
+def test_batches_waiting_requests():
+    ledger = SlowLedger()
+    writer = LedgerWriter(ledger)
+    first, _ = submit_in_background(writer, ["a"])
+    ledger.started.wait(5)
+    others = [submit_in_background(writer, [name]) for name in ["b", "c"]]
+    ledger.release.set()
+    first.join(5)
+    for thread, _ in others:
+        thread.join(5)
+    assert ledger.batches == [["a"], ["b", "c"]]
+    assert all(results == [True] for _, results in others)
+
+def test_timed_out_request_is_never_written():
+    ledger = SlowLedger()
+    writer = LedgerWriter(ledger)
+    first, _ = submit_in_background(writer, ["a"])
+    ledger.started.wait(5)
+
+    # Queued behind the batch being written when its caller gives up
+    with pytest.raises(TimeoutError):
+        writer.submit(["b"], timeout=0.05)
+    ledger.release.set()
+    first.join(5)
+    assert writer.submit(["c"])
+    assert ledger.batches == [["a"], ["c"]]
+
+def test_timeout_during_the_write_waits_for_it():
+    ledger = SlowLedger()
+    writer = LedgerWriter(ledger)
+    threading.Timer(0.2, ledger.release.set).start()
+
+    assert writer.submit(["a"], timeout=0.05)
+    assert ledger.batches == [["a"]]
@@ -0,0 +1,147 @@
+#type:ignore
+import smtplib
+import sqlite3
+import time
+import pytest
+import outbox
+from outbox import Outbox
+
+class FakeSMTP:
+    """Stands in for smtplib.SMTP: records deliveries and fails the recipients it is told to"""
+
+    def __init__(self, server):
+        self.server = server
+
+    def sendmail(self, sender, recipient, body):
+        error = self.server.failures.get(recipient)
+        if error is not None:
+            raise error
+        self.server.delivered.append((sender, recipient, body))
+
+    def quit(self):
+        self.server.quits += 1
+
+class FakeServer:
+    def __init__(self):
+        self.delivered = []
+        self.failures = {}
+        self.connections = 0
+        self.quits = 0
+        self.refuse = None
+
+    def connect(self):
+        if self.refuse is not None:
+            raise self.refuse
+        self.connections += 1
+        return FakeSMTP(self)
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(outbox, "time", clock)
+    return clock
+
+@pytest.fixture
+def server():
+    return FakeServer()
+
+@pytest.fixture
+def box(tmp_path, server, monkeypatch):
+    """An outbox whose worker thread never starts, so tests deliver by hand"""
+    monkeypatch.setattr(Outbox, "start", lambda self: None)
+    return Outbox(server.connect, path=str(tmp_path / "outbox.db"))
+
+def messages(box):
+    with sqlite3.connect(box.path) as conn:
+        return conn.execute(
+            "SELECT recipient, status, attempts, next_attempt_at, last_error FROM messages ORDER BY id"
+        ).fetchall()
+
+def test_one_connection_per_batch(box, server, clock):
+    for i in range(3):
+        box.enqueue("school", f"parent{i}@example.com", f"Subject: {i}\n\nHello")
+    assert box.deliver_due() == 3
+
+    assert server.connections == 1 and server.quits == 1
+    assert [recipient for _, recipient, _ in server.delivered] == [f"parent{i}@example.com" for i in range(3)]
+    assert [status for _, status, *_ in messages(box)] == ["sent"] * 3
+    assert box.pending_count() == 0 and box.deliver_due() == 0
+    assert server.connections == 1
+
+def test_batches_are_capped(box, server, clock, monkeypatch):
+    monkeypatch.setattr(outbox, "BATCH_SIZE", 2)
+    for i in range(5):
+        box.enqueue("school", f"parent{i}@example.com", "Hello")
+    assert [box.deliver_due() for _ in range(4)] == [2, 2, 1, 0]
+    assert server.connections == 3
+
+def test_rejected_message_backs_off_then_fails(box, server, clock, caplog):
+    server.failures["bad@example.com"] = smtplib.SMTPRecipientsRefused({"bad@example.com": (550, b"no")})
+    box.enqueue("school", "bad@example.com", "Hello")
+    box.enqueue("school", "good@example.com", "Hello")
+
+    assert box.deliver_due() == 1
+    (_, status, attempts, next_attempt_at, error), sent = messages(box)
+    assert (status, attempts, next_attempt_at - clock.now) == ("pending", 1, outbox.RETRY_BASE_SECONDS)
+    assert "bad@example.com" in error and sent[1] == "sent"
+    assert "Failed to send queued email" in caplog.text
+
+    # Not due again until the backoff has passed, which doubles with every attempt
+    assert box.deliver_due() == 0
+    delays = [outbox.RETRY_BASE_SECONDS]
+    for attempt in range(2, outbox.MAX_ATTEMPTS):
+        clock.now = next_attempt_at
+        box.deliver_due()
+        _, status, attempts, next_attempt_at, _ = messages(box)[0]
+        assert (status, attempts) == ("pending", attempt)
+        delays.append(next_attempt_at - clock.now)
+    assert delays == [min(outbox.RETRY_BASE_SECONDS * 2 ** i, outbox.RETRY_MAX_SECONDS) for i in range(len(delays))]
+
+    clock.now = next_attempt_at
+    box.deliver_due()
+    assert messages(box)[0][1:3] == ("failed", outbox.MAX_ATTEMPTS)
+    clock.now += outbox.RETRY_MAX_SECONDS * 2
+    assert box.deliver_due() == 0 and box.pending_count() == 0
+
+def test_unreachable_server_retries_the_batch(box, server, clock, caplog):
+    server.refuse = ConnectionRefusedError("connection refused")
+    box.enqueue("school", "a@example.com", "Hello")
+    box.enqueue("school", "b@example.com", "Hello")
+
+    assert box.deliver_due() == 0
+    assert [row[1:3] for row in messages(box)] == [("pending", 1), ("pending", 1)]
+    assert "Failed to connect to the mail server" in caplog.text
+
+    server.refuse = None
+    clock.now += outbox.RETRY_BASE_SECONDS
+    assert box.deliver_due() == 2
+    assert server.connections == 1
+
+def test_dropped_connection_leaves_the_rest_of_the_batch(box, server, clock):
+    server.failures["b@example.com"] = smtplib.SMTPServerDisconnected("gone")
+    for recipient in ["a@example.com", "b@example.com", "c@example.com"]:
+        box.enqueue("school", recipient, "Hello")
+
+    assert box.deliver_due() == 1
+    assert [row[1:3] for row in messages(box)] == [("sent", 0), ("pending", 1), ("pending", 0)]
+    # The unsent message is picked up again once its claim expires
+    del server.failures["b@example.com"]
+    clock.now += outbox.CLAIM_SECONDS
+    assert box.deliver_due() == 2
+    assert [row[1] for row in messages(box)] == ["sent"] * 3
+
+def test_worker_delivers_in_the_background(tmp_path, server):
+    box = Outbox(server.connect, path=str(tmp_path / "outbox.db"))
+    box.enqueue("school", "parent@example.com", "Hello")
+    deadline = time.monotonic() + 5
+    while box.pending_count() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert box.pending_count() == 0
+    assert server.delivered == [("school", "parent@example.com", "Hello")]
@@ -0,0 +1,94 @@
+#type:ignore
+import pandas as pd
+import pytest
+import database
+from schema import MONTHS
+from storage import get_backend
+from helpers import receipt
+
+def school_receipts():
+    """24 receipts over two academic years; every sortable value used here is unique per row"""
+    records = []
+    for i in range(24):
+        year, start = ("2025-2026", "2025-04-01") if i < 16 else ("2024-2025", "2024-04-01")
+        date = pd.Timestamp(start) + pd.Timedelta(days=3 * i)
+        records.append(receipt(
+            f"{'Zara' if i % 5 == 0 else 'Student'} {i:02d}", "KGI" if i % 3 == 0 else "Class 5",
+            month=MONTHS[i % 12], received=1000 + 10 * i, academic_year=year,
+            Date=date.strftime("%Y-%m-%d"),
+        ))
+    return records
+
+@pytest.fixture
+def ledger(backend_name):
+    database.save_to_csv(school_receipts())
+    return database.load_data()
+
+def expected_names(ledger, mask, sort_by, descending):
+    rows = ledger[mask].sort_values(sort_by, ascending=not descending, kind="stable")
+    return rows["Student Name"].astype(str).tolist()
+
+def all_pages(filters, sort_by, descending, limit):
+    names, totals, sizes, offset = [], set(), [], 0
+    while True:
+        page, total = database.query_records(filters, sort_by, descending, offset, limit)
+        totals.add(total)
+        if page.empty:
+            return names, totals, sizes
+        names += page["Student Name"].astype(str).tolist()
+        sizes.append(len(page))
+        offset += limit
+
+@pytest.mark.parametrize("sort_by", ["Date", "Received Amount", "Student Name"])
+@pytest.mark.parametrize("descending", [True, False])
+def test_pages_cover_the_sorted_ledger(ledger, sort_by, descending):
+    names, totals, sizes = all_pages({}, sort_by, descending, limit=5)
+    assert names == expected_names(ledger, ledger.index == ledger.index, sort_by, descending)
+    assert totals == {24}
+    assert sizes == [5, 5, 5, 5, 4]
+
+def test_month_sorts_in_academic_order(ledger):
+    page, total = database.query_records({"Academic Year": "2025-2026", "Class Category": "Class 5"},
+                                         "Month", descending=False, limit=100)
+    months = page["Month"].astype(str).tolist()
+    assert total == len(page) == 10
+    assert months == sorted(months, key=MONTHS.index)
+    page, _ = database.query_records({"Academic Year": "2025-2026"}, "Month", descending=True, limit=1)
+    assert page["Month"].astype(str).tolist() == ["MARCH"]
+
+@pytest.mark.parametrize("filters", [
+    {"Academic Year": "2024-2025"},
+    {"Academic Year": "2025-2026", "Class Category": "KGI"},
+    {"Month": "MAY"},
+    {"name_prefix": "zara"},
+    {"name_prefix": "Student 1", "Class Category": "Class 5"},
+    {"date_from": "2025-04-10", "date_to": "2025-04-22"},
+    {"Academic Year": "2023-2024"},
+])
+def test_filters_and_totals(ledger, filters):
+    mask = pd.Series(True, index=ledger.index)
+    for col in ["Academic Year", "Class Category", "Month"]:
+        if col in filters:
+            mask &= ledger[col] == filters[col]
+    if "name_prefix" in filters:
+        mask &= ledger["Student Name"].str.lower().str.startswith(filters["name_prefix"].lower())
+    if "date_from" in filters:
+        mask &= ledger["Date"].between(pd.Timestamp(filters["date_from"]), pd.Timestamp(filters["date_to"]))
+
+    names, totals, sizes = all_pages(filters, "Date", True, limit=3)
+    assert names == expected_names(ledger, mask, "Date", True)
+    assert totals == {int(mask.sum())}
+    assert all(size == 3 for size in sizes[:-1]) and (not sizes or 1 <= sizes[-1] <= 3)
+
+def test_date_range_is_inclusive(ledger):
+    page, total = database.query_records({"date_from": "2025-04-04", "date_to": "2025-04-07"}, "Date", False)
+    assert total == 2
+    assert page["Date"].dt.strftime("%Y-%m-%d").tolist() == ["2025-04-04", "2025-04-07"]
+
+def test_page_past_the_end(ledger):
+    page, total = database.query_records({"Class Category": "KGI"}, "Date", True, offset=50, limit=10)
+    assert page.empty and total == 8
+
+def test_unknown_sort_column(ledger):
+    with pytest.raises(ValueError):
+        get_backend().query_records({}, sort_by='Date"; DROP TABLE fees; --')
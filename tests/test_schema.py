@@ -0,0 +1,23 @@
+#type:ignore
+import numpy as np
+import pandas as pd
+from schema import TEXT_COLUMNS, normalize_ledger
+
+def test_normalize_ledger_types_text_columns():
+    raw = pd.DataFrame({
+        "ID": pd.Series([32325559, "7067E261", np.nan], dtype=object),
+        "Student Name": ["Sara", 107, "Ali"],
+        "Class Section": [1, np.nan, "B"],
+        "Signature": [42, "Tester", np.nan],
+        "Record ID": ["r1", "r2", "r3"],
+        "Monthly Fee": ["2000", 1500.4, None],
+    })
+    df = normalize_ledger(raw)
+
+    for col in TEXT_COLUMNS:
+        assert all(isinstance(value, str) for value in df[col].dropna()), col
+    assert df["ID"].tolist()[:2] == ["32325559", "7067E261"]
+    assert pd.isna(df["ID"].iloc[2]) and pd.isna(df["Class Section"].iloc[1])
+    assert df.loc[df["ID"] == "32325559", "Student Name"].tolist() == ["Sara"]
+    assert df["Monthly Fee"].tolist() == [2000, 1500, 0]
+    assert df["Academic Year"].dtype == "category"
@@ -0,0 +1,227 @@
+#type:ignore
+import multiprocessing
+import pandas as pd
+import pytest
+import database
+import storage
+from collection_cube import collection_cube
+from payment_index import payment_index
+from schema import MONTHS
+from helpers import receipt, switch_backend, names
+
+def record_key(name, month="APRIL"):
+    df = database.load_data()
+    return df.loc[(df["Student Name"] == name) & (df["Month"] == month), "Record ID"].item()
+
+def test_save_and_load(backend_name):
+    assert database.save_to_csv([receipt("Sara"), receipt("Ali", month="MAY", received=1500)])
+
+    df = database.load_data()
+    assert names(df) == ["Ali", "Sara"]
+    assert df["Received Amount"].dtype == "int64"
+    assert df["Record ID"].notna().all() and df["Record ID"].is_unique
+
+    ali = database.load_student_records(receipt("Ali")["ID"], "2025-2026")
+    assert list(ali["Month"].astype(str)) == ["MAY"]
+    assert list(ali["Received Amount"]) == [1500]
+
+def test_update_record(backend_name):
+    database.save_to_csv([receipt("Sara"), receipt("Ali")])
+    assert database.update_record(record_key("Ali"), {"Received Amount": 500, "Payment Method": "Cheque"})
+
+    database.reset_caches()
+    ali = database.load_data().set_index("Student Name").loc["Ali"]
+    assert ali["Received Amount"] == 500
+    assert ali["Payment Method"] == "Cheque"
+    assert database.load_data().set_index("Student Name").loc["Sara", "Received Amount"] == 2000
+
+def test_delete_record(backend_name):
+    database.save_to_csv([receipt("Sara"), receipt("Ali")])
+    assert database.delete_record(record_key("Sara"))
+    assert names(database.load_data()) == ["Ali"]
+
+    database.reset_caches()
+    assert names(database.load_data()) == ["Ali"]
+    assert database.load_student_records(receipt("Sara")["ID"]).empty
+
+def test_update_data_replaces_the_ledger(backend_name):
+    database.save_to_csv([receipt("Sara"), receipt("Ali"), receipt("Omar")])
+    df = database.load_data()
+    assert database.update_data(df[df["Student Name"] != "Omar"])
+
+    database.reset_caches()
+    assert names(database.load_data()) == ["Ali", "Sara"]
+
+def test_compact_keeps_the_ledger(backend_name):
+    database.save_to_csv([receipt("Sara"), receipt("Ali")])
+    database.update_record(record_key("Ali"), {"Received Amount": 700})
+    database.delete_record(record_key("Sara"))
+    assert database.compact_ledger()
+
+    database.reset_caches()
+    df = database.load_data()
+    assert names(df) == ["Ali"]
+    assert list(df["Received Amount"]) == [700]
+
+def test_indexes_follow_writes(backend_name):
+    student_id = receipt("Sara")["ID"]
+    database.save_to_csv([receipt("Sara")])
+    assert database.get_payment_status(student_id, "2025-2026").unpaid_months() == MONTHS[1:]
+    assert database.get_collection_cube().totals(**{"Academic Year": "2025-2026"})["Received Amount"] == 2000
+
+    database.save_to_csv([receipt("Sara", month="MAY", received=1000)])
+    database.delete_record(record_key("Sara"))
+    assert database.get_payment_status(student_id, "2025-2026").unpaid_months() == MONTHS[:1] + MONTHS[2:]
+    cube = database.get_collection_cube()
+    assert cube.totals(**{"Academic Year": "2025-2026"})["Received Amount"] == database.load_data()["Received Amount"].sum()
+
+def test_migrate_from_csv(school, monkeypatch):
+    database.ensure_initialized()
+    database.save_to_csv([receipt("Sara"), receipt("Ali", academic_year="2024-2025", Date="2024-05-02")])
+    database.set_student_fee(receipt("Ali")["ID"], {"monthly_fee": 1500, "annual_charges": 0, "admission_fee": 0})
+    expected = database.load_data().sort_values("Record ID", ignore_index=True)
+
+    for name in ["sqlite", "partitioned"]:
+        switch_backend(monkeypatch, name)
+        migrated = database.load_data().sort_values("Record ID", ignore_index=True)
+        pd.testing.assert_frame_equal(
+            migrated[expected.columns], expected, check_dtype=False, check_categorical=False
+        )
+        assert database.get_student_fee_amount(receipt("Ali")["ID"], "monthly") == 1500
+        switch_backend(monkeypatch, "csv")
+
+def test_migrate_pending_patches(school, monkeypatch):
+    database.ensure_initialized()
+    database.save_to_csv([receipt("Sara"), receipt("Ali"), receipt("S107", ID="32325559")])
+    database.update_record(record_key("Ali"), {"Received Amount": 900})
+    database.delete_record(record_key("Sara"))
+    assert names(database.load_data()) == ["Ali", "S107"]
+
+    for name in ["sqlite", "partitioned"]:
+        switch_backend(monkeypatch, name)
+        df = database.load_data()
+        assert names(df) == ["Ali", "S107"]
+        assert df.set_index("Student Name").loc["Ali", "Received Amount"] == 900
+        assert len(database.load_student_records("32325559")) == 1
+        switch_backend(monkeypatch, "csv")
+
+def test_writes_during_compaction(school, monkeypatch):
+    database.ensure_initialized()
+    database.save_to_csv([receipt("Sara"), receipt("Ali"), receipt("Omar")])
+    backend = storage.get_backend()
+    read_raw = storage._read_raw
+
+    def read_raw_with_writes(data, **options):
+        # A save and two edits land while the compaction parses the old file
+        if "names" not in options:
+            database.save_to_csv([receipt("Zara", month="MAY")])
+            database.update_record(record_key("Ali"), {"Received Amount": 300})
+            database.delete_record(record_key("Omar"))
+        return read_raw(data, **options)
+
+    database.delete_record(record_key("Sara"))
+    monkeypatch.setattr(storage, "_read_raw", read_raw_with_writes)
+    backend.compact()
+    monkeypatch.setattr(storage, "_read_raw", read_raw)
+
+    assert len(backend.read_patches()[1]) == 2
+    database.reset_caches()
+    df = database.load_data()
+    assert names(df) == ["Ali", "Zara"]
+    assert df.set_index("Student Name").loc["Ali", "Received Amount"] == 300
+
+def test_compaction_runs_in_the_background(school, monkeypatch):
+    monkeypatch.setattr(storage, "COMPACT_EVERY_ROWS", 3)
+    database.ensure_initialized()
+    backend = storage.get_backend()
+    compactions = []
+    monkeypatch.setattr(backend, "compact_in_background", lambda: compactions.append(True))
+
+    database.save_to_csv([receipt("Sara"), receipt("Ali")])
+    assert not compactions
+    database.save_to_csv([receipt("Omar")])
+    assert compactions
+
+def test_background_compaction_keeps_every_save(school, monkeypatch):
+    monkeypatch.setattr(storage, "COMPACT_EVERY_ROWS", 5)
+    database.ensure_initialized()
+    for i in range(40):
+        database.save_to_csv([receipt(f"Student {i}")])
+        if i % 7 == 0:
+            database.update_record(record_key(f"Student {i}"), {"Received Amount": i})
+
+    database.reset_caches()
+    df = database.load_data().set_index("Student Name")
+    assert len(df) == 40 and df["Record ID"].is_unique
+    assert df.loc["Student 14", "Received Amount"] == 14
+
+def test_compaction_keeps_the_indexes(school, monkeypatch):
+    database.ensure_initialized()
+    backend = storage.get_backend()
+    student_id = receipt("Sara")["ID"]
+    database.save_to_csv([receipt("Sara"), receipt("Ali")])
+    database.delete_record(record_key("Ali"))
+    database.get_payment_status(student_id, "2025-2026")
+    database.get_collection_cube().flush()
+    version, logical = backend.version(), backend.logical_version()
+
+    backend.compact()
+    assert backend.version() != version and backend.logical_version() == logical
+    assert payment_index.version == collection_cube.version == logical
+
+    def rebuild(*args):
+        raise AssertionError("rebuilt after a compaction")
+    with monkeypatch.context() as patched:
+        patched.setattr(payment_index, "rebuild", rebuild)
+        patched.setattr(collection_cube, "rebuild", rebuild)
+        assert database.get_payment_status(student_id, "2025-2026").unpaid_months() == MONTHS[1:]
+        # A restarted app adopts the persisted cube
+        database.reset_caches()
+        assert database.get_collection_cube().totals()["Received Amount"] == 2000
+
+    # The next write moves the logical version on again and the indexes with it
+    database.save_to_csv([receipt("Sara", month="MAY")])
+    assert storage.get_backend().logical_version() not in (logical, None)
+    assert "MAY" not in database.get_payment_status(student_id, "2025-2026").unpaid_months()
+
+def test_background_compaction_failure_is_logged(school, monkeypatch, caplog):
+    database.ensure_initialized()
+    backend = storage.get_backend()
+
+    def compact():
+        raise OSError("disk full")
+    monkeypatch.setattr(backend, "compact", compact)
+    backend.compact_in_background()
+    backend.wait_for_compaction()
+    assert "Failed to compact the ledger" in caplog.text and "disk full" in caplog.text
+
+def _append_and_edit(count, edits):
+    backend = storage.CSVBackend()
+    for i in range(count):
+        backend.append_records([receipt(f"Child {i}")])
+        if i < len(edits):
+            backend.update_record(edits[i], {"Received Amount": i})
+
+@pytest.mark.skipif(storage.fcntl is None, reason="needs flock")
+def test_compaction_keeps_writes_from_other_processes(school, monkeypatch):
+    monkeypatch.setattr(storage, "COMPACT_EVERY_ROWS", 10 ** 6)
+    database.ensure_initialized()
+    database.save_to_csv([receipt(f"Parent {i}") for i in range(20)])
+    edits = [record_key(f"Parent {i}") for i in range(20)]
+    backend = storage.get_backend()
+
+    # Another process saves and edits while this one compacts over and over
+    writer = multiprocessing.get_context("fork").Process(target=_append_and_edit, args=(300, edits))
+    writer.start()
+    while writer.is_alive():
+        backend.compact()
+    writer.join()
+    assert writer.exitcode == 0
+    backend.compact()
+
+    database.reset_caches()
+    df = database.load_data()
+    assert len(df) == 320 and df["Record ID"].is_unique
+    assert names(df[df["Student Name"].str.startswith("Child")]) == sorted(f"Child {i}" for i in range(300))
+    received = df.set_index("Student Name")["Received Amount"]
+    assert [received[f"Parent {i}"] for i in range(20)] == list(range(20))
@@ -0,0 +1,91 @@
+#type:ignore
+import json
+import multiprocessing
+import os
+import pytest
+import user_store
+from user_store import UserStore, DuplicateUserError
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / "users.json")
+    UserStore(path).initialize()
+    return path
+
+def test_duplicates_are_rejected(path):
+    store = UserStore(path)
+    store.add("sara", {"email": "sara@example.com", "role": "user"})
+
+    with pytest.raises(DuplicateUserError) as error:
+        store.add("sara", {"email": "other@example.com"})
+    assert error.value.field == "username"
+    with pytest.raises(DuplicateUserError) as error:
+        store.add("sara2", {"email": "sara@example.com"})
+    assert error.value.field == "email"
+
+    # Another store that hasn't seen the write yet still checks the latest state
+    with pytest.raises(DuplicateUserError):
+        UserStore(path).add("ali", {"email": "sara@example.com"})
+
+    # A changed or deleted user's email is free again
+    store.update("sara", email="sara@school.example")
+    store.add("ali", {"email": "sara@example.com"})
+    assert store.email_owner("sara@example.com") == "ali"
+    assert store.delete("ali") and not store.delete("ali")
+    assert store.email_owner("sara@example.com") is None
+
+def test_log_is_replayed_after_a_restart(path):
+    store = UserStore(path)
+    store.add("sara", {"email": "sara@example.com", "role": "user"})
+    store.add("ali", {"email": "ali@example.com", "role": "user"})
+    store.update("sara", role="admin")
+    store.delete("ali")
+    with open(path, 'r') as f:
+        assert json.load(f) == {}
+
+    restarted = UserStore(path)
+    assert restarted.all() == {"sara": {"email": "sara@example.com", "role": "admin"}}
+    assert restarted.email_owner("sara@example.com") == "sara"
+    assert restarted.email_owner("ali@example.com") is None
+    assert restarted.update("missing", role="admin") is False
+
+def test_log_is_compacted_into_the_json_file(path, monkeypatch):
+    monkeypatch.setattr(user_store, "USERS_COMPACT_EVERY", 3)
+    store = UserStore(path)
+    for name in ["a", "b", "c", "d"]:
+        store.add(name, {"email": f"{name}@example.com"})
+
+    with open(path, 'r') as f:
+        assert sorted(json.load(f)) == ["a", "b", "c"]
+    with open(store.log_path, 'r') as f:
+        assert [json.loads(line)["username"] for line in f] == ["d"]
+    assert sorted(UserStore(path).all()) == ["a", "b", "c", "d"]
+
+def _add_users(path, prefix, count, emails):
+    store = UserStore(path)
+    for i in range(count):
+        try:
+            store.add(f"{prefix}{i}", {"email": f"user{i}@example.com" if emails else f"{prefix}{i}@example.com"})
+        except DuplicateUserError:
+            pass
+
+@pytest.mark.skipif(user_store.fcntl is None, reason="needs flock")
+def test_concurrent_writers(path, monkeypatch):
+    monkeypatch.setattr(user_store, "USERS_COMPACT_EVERY", 25)
+    context = multiprocessing.get_context("fork")
+    # Every process adds its own users; the shared emails can only be claimed once
+    workers = [
+        context.Process(target=_add_users, args=(path, f"p{n}-", 40, n < 2))
+        for n in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(30)
+        assert worker.exitcode == 0
+
+    users = UserStore(path).all()
+    shared = [details["email"] for details in users.values() if details["email"].startswith("user")]
+    assert len(users) == 40 * 3
+    assert sorted(shared) == sorted(f"user{i}@example.com" for i in range(40))
+    assert not os.path.exists(f"{path}.tmp")
@@ -0,0 +1,165 @@
+#type:ignore
+import json
+import os
+import threading
+from fileinfo import file_signature
+
+try:
+    import fcntl
+except ImportError:  # Windows: the in-process lock still serializes writers
+    fcntl = None
+
+USERS_JSON = "users.json"
+
+# Logged user changes are folded into users.json once this many piled up
+USERS_COMPACT_EVERY = 500
+
+class DuplicateUserError(ValueError):
+    """Raised when a username or email address is already registered"""
+
+    def __init__(self, field):
+        super().__init__(f"{field} already registered")
+        self.field = field
+
+class UserStore:
+    """Users keyed by username, with an index from email address to username
+
+    users.json holds the last compacted state and every change is appended to
+    a JSON-lines log next to it. The parsed users and the email index are
+    kept in memory per file version; writes from this process update them in
+    place, changes from other processes trigger a re-read.
+    """
+
+    def __init__(self, path=USERS_JSON):
+        self.path = path
+        self.log_path = f"{os.path.splitext(path)[0]}.log.jsonl"
+        self._lock = threading.RLock()
+        self._version = None
+        self._users = {}
+        self._by_email = {}
+        self._log_entries = 0
+
+    def initialize(self):
+        """Create an empty users.json if it doesn't exist"""
+        if not os.path.exists(self.path):
+            with open(self.path, 'w') as f:
+                json.dump({}, f)
+
+    def version(self):
+        return tuple(
+            file_signature(path) if os.path.exists(path) else None
+            for path in (self.path, self.log_path)
+        )
+
+    def _apply(self, entry):
+        """Apply one logged change to the in-memory users and email index"""
+        username = entry["username"]
+        old = self._users.get(username)
+        if old is not None and self._by_email.get(old.get("email")) == username:
+            del self._by_email[old["email"]]
+
+        if entry["op"] == "put":
+            details = entry["details"]
+            self._users[username] = details
+            if details.get("email"):
+                self._by_email[details["email"]] = username
+        else:
+            self._users.pop(username, None)
+
+    def _refresh(self):
+        """Re-read users.json and the log if they changed since the last read"""
+        version = self.version()
+        if version == self._version:
+            return
+
+        users = {}
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                users = json.load(f)
+        self._users = users
+        self._by_email = {
+            details["email"]: username
+            for username, details in users.items() if details.get("email")
+        }
+        self._log_entries = 0
+        if os.path.exists(self.log_path):
+            with open(self.log_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        self._apply(json.loads(line))
+                        self._log_entries += 1
+        self._version = version
+
+    def get(self, username):
+        """Return a copy of one user's details, or None"""
+        with self._lock:
+            self._refresh()
+            details = self._users.get(username)
+            return dict(details) if details is not None else None
+
+    def email_owner(self, email):
+        """Return the username registered with an email address, or None"""
+        with self._lock:
+            self._refresh()
+            return self._by_email.get(email)
+
+    def all(self):
+        """Return a copy of every user's details keyed by username"""
+        with self._lock:
+            self._refresh()
+            return {username: dict(details) for username, details in self._users.items()}
+
+    def _write(self, build_entry):
+        """Append the change build_entry() returns for the latest state; None means no change"""
+        with self._lock, open(self.log_path, 'a+', encoding='utf-8') as log:
+            if fcntl is not None:
+                fcntl.flock(log.fileno(), fcntl.LOCK_EX)
+            self._refresh()
+            entry = build_entry()
+            if entry is None:
+                return False
+
+            log.write(json.dumps(entry) + "\n")
+            log.flush()
+            os.fsync(log.fileno())
+            self._apply(entry)
+            self._log_entries += 1
+
+            if self._log_entries >= USERS_COMPACT_EVERY:
+                # Fold the log into users.json while still holding its lock
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(self._users, f)
+                os.replace(tmp_path, self.path)
+                log.truncate(0)
+                self._log_entries = 0
+            self._version = self.version()
+            return True
+
+    def add(self, username, details):
+        """Register a new user; raises DuplicateUserError for a taken username or email"""
+        def build_entry():
+            if username in self._users:
+                raise DuplicateUserError("username")
+            if details.get("email") and details["email"] in self._by_email:
+                raise DuplicateUserError("email")
+            return {"op": "put", "username": username, "details": details}
+        self._write(build_entry)
+
+    def update(self, username, **changes):
+        """Change some fields of an existing user; returns False if there was no such user"""
+        def build_entry():
+            if username not in self._users:
+                return None
+            return {"op": "put", "username": username, "details": dict(self._users[username], **changes)}
+        return self._write(build_entry)
+
+    def delete(self, username):
+        """Remove a user; returns False if there was no such user"""
+        def build_entry():
+            if username not in self._users:
+                return None
+            return {"op": "delete", "username": username}
+        return self._write(build_entry)
+
+user_store = UserStore()
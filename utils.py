@@ -4,182 +4,10 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from database import load_data
+from database import get_payment_status
+from schema import MONTHS, get_academic_year
 from auth import logout
-
-def hide_streamlit_elements():
-    """Hide only the GitHub icon while keeping deploy button"""
-    st.markdown("""
-    <style>
-    /* Hide only the GitHub icon specifically */
-    div[data-testid="stToolbar"] > div:nth-child(1) > div:nth-child(1) > div:nth-child(2) {
-        display: none !important;
-    }
-    
-    /* Alternative selector for GitHub icon */
-    button[title="View app source on GitHub"] {
-        display: none !important;
-    }
-    
-    /* Hide GitHub fork button */
-    .stActionButton:has([title*="GitHub"]) {
-        display: none !important;
-    }
-    
-    /* More specific GitHub icon hiding */
-    div[data-testid="stToolbar"] button[kind="header"]:first-child {
-        display: none !important;
-    }
-    
-    /* Hide the GitHub icon in the toolbar */
-    .stApp > header button:first-child {
-        display: none !important;
-    }
-    
-    /* Keep deploy button visible but hide GitHub */
-    div[data-testid="stToolbar"] > div > div > div:first-child {
-        display: none !important;
-    }
-    
-    /* Alternative approach - hide by icon content */
-    button[aria-label*="GitHub"] {
-        display: none !important;
-    }
-    
-    /* Click-to-Show Navbar Styles - SIMPLIFIED */
-    .navbar-toggle-container {
-        position: fixed;
-        bottom: 20px;
-        left: 50%;
-        transform: translateX(-50%);
-        z-index: 1000;
-        width: 90%;
-        max-width: 400px;
-    }
-    
-    .navbar-toggle-btn {
-        width: 100%;
-        padding: 0.8rem 1.5rem;
-        border-radius: 25px;
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        border: none;
-        font-weight: 600;
-        font-size: 1rem;
-        cursor: pointer;
-        box-shadow: 0 8px 25px rgba(0, 0, 0, 0.2);
-        transition: all 0.3s ease;
-        display: flex;
-        justify-content: center;
-        align-items: center;
-        gap: 10px;
-    }
-    
-    .navbar-toggle-btn:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 12px 30px rgba(0, 0, 0, 0.3);
-    }
-        
-    @keyframes slideUp {
-        from {
-            opacity: 0;
-            transform: translate(-50%, 20px);
-        }
-        to {
-            opacity: 1;
-            transform: translate(-50%, 0);
-        }
-    }
-    
-    .navbar-expanded-content {
-        display: flex;
-        flex-direction: column;
-        gap: 8px;
-    }
-    
-    .nav-expanded-btn {
-        background: #f8f9fa;
-        color: #333;
-        padding: 0.8rem 1rem;
-        border-radius: 10px;
-        border: 1px solid #e0e0e0;
-        cursor: pointer;
-        font-weight: 500;
-        font-size: 0.9rem;
-        transition: all 0.3s ease;
-        display: flex;
-        align-items: center;
-        gap: 12px;
-        text-align: left;
-    }
-    
-    .nav-expanded-btn:hover {
-        background: #e9ecef;
-        border-color: #667eea;
-    }
-    
-    .nav-expanded-btn.active {
-        background: #667eea;
-        color: white;
-        border-color: #667eea;
-    }
-    
-    .user-info-expanded {
-        display: flex;
-        flex-direction: column;
-        gap: 10px;
-        margin-top: 15px;
-        padding-top: 15px;
-        border-top: 1px solid #e0e0e0;
-    }
-    
-    .user-badge-expanded {
-        background: #00b894;
-        color: white;
-        padding: 0.6rem 1rem;
-        border-radius: 10px;
-        font-size: 0.85rem;
-        font-weight: 600;
-        text-align: center;
-    }
-    
-    .admin-badge {
-        background: #0984e3 !important;
-    }
-    
-    .trial-badge-expanded {
-        background: #fdcb6e;
-        color: #333;
-        padding: 0.6rem 1rem;
-        border-radius: 10px;
-        font-size: 0.85rem;
-        font-weight: 600;
-        text-align: center;
-    }
-    
-    .logout-btn-expanded {
-        background: #e17055;
-        color: white;
-        border: none;
-        padding: 0.8rem 1rem;
-        border-radius: 10px;
-        cursor: pointer;
-        font-weight: 600;
-        font-size: 0.9rem;
-        transition: all 0.3s ease;
-        margin-top: 5px;
-    }
-    
-    .logout-btn-expanded:hover {
-        background: #d63031;
-    }
-    
-    /* Prevent content from being hidden behind navbar */
-    .stApp {
-        padding-bottom: 100px;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+from perf import timed
 
 def navbar_collapsible_component(menu_options):
     """Click-to-Show Navbar without purple div"""
@@ -213,7 +41,8 @@ def navbar_collapsible_component(menu_options):
             "Paid & Unpaid Students Record": "✅",
             "Student Yearly Report": "📊",
             "User Management": "👥",
-            "Set Student Fees": "💸"
+            "Set Student Fees": "💸",
+            "Performance": "⏱️"
         }
         
         st.markdown('<div class="navbar-expanded-content">', unsafe_allow_html=True)
@@ -286,7 +115,8 @@ def navbar_component(menu_options):
                 "Paid & Unpaid Students Record": "✅",
                 "Student Yearly Report": "📊",
                 "User Management": "👥",
-                "Set Student Fees": "💸"
+                "Set Student Fees": "💸",
+                "Performance": "⏱️"
             }
             icon = icon_map.get(option, "📄")
             
@@ -337,7 +167,8 @@ def navbar_bottom_component(menu_options):
             "Paid & Unpaid Students Record": "✅",
             "Student Yearly Report": "📊",
             "User Management": "👥",
-            "Set Student Fees": "💸"
+            "Set Student Fees": "💸",
+            "Performance": "⏱️"
         }
 
         for option in menu_options:
@@ -374,6 +205,20 @@ def navbar_bottom_component(menu_options):
 
     return st.session_state.selected_nav_menu
 
+def lazy_tabs(labels, key, default=None):
+    """Tab-like selector that returns the chosen label
+
+    Unlike st.tabs, which runs the body of every tab on each rerun, callers
+    render only the section for the returned label.
+    """
+    if default not in labels:
+        default = labels[0]
+    selected = st.segmented_control(
+        "Section", labels, default=default, key=key, label_visibility="collapsed"
+    )
+    # Clicking the selected option clears it; keep showing the default section
+    return selected if selected is not None else default
+
 def format_currency(val):
     """Format currency with Pakistani Rupees symbol and thousand separators"""
     try:
@@ -381,77 +226,27 @@ def format_currency(val):
     except:
         return "Rs. 0"
 
-def style_row(row):
-    """Apply styling to DataFrame rows based on payment status"""
-    today = datetime.now()
-    is_between_1st_and_10th = 1 <= today.day <= 10
-    styles = [''] * len(row)
-    
-    if is_between_1st_and_10th:
-        if row['Monthly Fee'] == 0:
-            styles[0] = 'color: red'
-        else:
-            styles[0] = 'color: green'
-    return styles
-
-def get_academic_year(date):
-    """Determine academic year based on date"""
-    year = date.year
-    if date.month >= 4:  # Academic year starts in April
-        return f"{year}-{year+1}"
-    return f"{year-1}-{year}"
-
+@timed
 def check_annual_admission_paid(student_id, academic_year):
     """Check if annual charges or admission fee have been paid for the academic year"""
-    df = load_data()
-    if df.empty:
+    status = get_payment_status(student_id, academic_year)
+    if status is None:
         return False, False
     
-    student_records = df[(df['ID'] == student_id) & (df['Academic Year'] == academic_year)]
-    annual_paid = student_records['Annual Charges'].sum() > 0
-    admission_paid = student_records['Admission Fee'].sum() > 0
-    
-    return annual_paid, admission_paid
+    return status.annual_paid, status.admission_paid
 
-def get_unpaid_months(student_id):
-    """Get list of unpaid months for a specific student"""
-    df = load_data()
-    all_months = [
-        "APRIL", "MAY", "JUNE", "JULY", "AUGUST", "SEPTEMBER",
-        "OCTOBER", "NOVEMBER", "DECEMBER", "JANUARY", "FEBRUARY", "MARCH"
-    ]
-    
-    if df.empty or student_id is None:
-        return all_months
+@timed
+def get_unpaid_months(student_id, academic_year=None):
+    """Get list of unpaid months for a specific student in an academic year (current year by default)"""
+    if student_id is None:
+        return list(MONTHS)
     
-    paid_months = df[(df['ID'] == student_id) & (df['Monthly Fee'] > 0)]['Month'].unique().tolist()
+    if academic_year is None:
+        academic_year = get_academic_year(datetime.now())
     
-    unpaid_months = [month for month in all_months if month not in paid_months]
-    
-    return unpaid_months
-
-def get_student_fee_amount(student_id, fee_type):
-    """Get specific fee amount for a student from database"""
-    from database import load_student_fees
-    
-    fees_data = load_student_fees()
-    
-    if student_id in fees_data:
-        fee_mapping = {
-            "monthly": "monthly_fee",
-            "annual": "annual_charges", 
-            "admission": "admission_fee"
-        }
-        
-        if fee_type in fee_mapping:
-            fee_key = fee_mapping[fee_type]
-            return fees_data[student_id].get(fee_key, 0)
+    status = get_payment_status(student_id, academic_year)
+    if status is None:
+        return list(MONTHS)
     
-    # Default fees if not set by admin
-    default_fees = {
-        "monthly": 2000,
-        "annual": 2000,
-        "admission": 1000
-    }
-    return default_fees.get(fee_type, 0)
+    return status.unpaid_months()
 # [file content end]
\ No newline at end of file